@@ -1,7 +1,14 @@
 """Rate equation models for ODMR simulations."""
 
 from odmr_sim.models.base import RateModel
+from odmr_sim.models.compiled import CompiledRateModel
 from odmr_sim.models.seven_level import SevenLevelModel
 from odmr_sim.models.presets import get_preset, list_presets
 
-__all__ = ["RateModel", "SevenLevelModel", "get_preset", "list_presets"]
+__all__ = [
+    "RateModel",
+    "CompiledRateModel",
+    "SevenLevelModel",
+    "get_preset",
+    "list_presets",
+]
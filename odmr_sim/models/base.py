@@ -3,7 +3,9 @@ Base rate equation model with configurable N-level support.
 """
 
 import numpy as np
-from typing import Optional, Dict, Tuple, List
+from typing import Optional, Dict, Tuple, List, Sequence, Union
+
+from odmr_sim.models.compiled import CompiledRateModel
 
 
 class RateModel:
@@ -60,10 +62,25 @@ class RateModel:
         # Dictionary of (from_state, to_state) -> rate (in MHz)
         self._rates: Dict[Tuple[int, int], float] = {}
 
+        # Optional names for fixed rates (e.g., 'k47') -> (from_state, to_state)
+        self.rate_names: Dict[str, Tuple[int, int]] = {}
+
         # Dictionary for dynamic rate parameters (e.g., excitation rate, MW rate)
         self._dynamic_rate_specs: Dict[str, List[Tuple[int, int, float]]] = {}
 
-    def set_rate(self, from_state: int, to_state: int, rate: float) -> None:
+        # Cached compiled representation, invalidated whenever rates change
+        self._compiled: Optional[CompiledRateModel] = None
+
+        # Named linear observables: name -> (state weights, weighted transitions)
+        self._observables: Dict[str, Tuple[np.ndarray, List[Tuple[int, int, float]]]] = {}
+
+    def set_rate(
+        self,
+        from_state: int,
+        to_state: int,
+        rate: float,
+        name: Optional[str] = None
+    ) -> None:
         """Set a fixed transition rate from one state to another.
 
         Parameters
@@ -74,6 +91,9 @@ class RateModel:
             Index of the target state (0-indexed).
         rate : float
             Transition rate in MHz.
+        name : str, optional
+            Name for the rate (e.g., 'k47'), so it can be referred to by
+            name in parameter sweeps.
         """
         self._validate_state_index(from_state, "from_state")
         self._validate_state_index(to_state, "to_state")
@@ -82,6 +102,9 @@ class RateModel:
             raise ValueError("Cannot set rate from a state to itself")
 
         self._rates[(from_state, to_state)] = rate
+        if name is not None:
+            self.rate_names[name] = (from_state, to_state)
+        self._compiled = None
 
     def set_rates(self, rates: Dict[Tuple[int, int], float]) -> None:
         """Set multiple transition rates at once.
@@ -129,12 +152,35 @@ class RateModel:
             self._dynamic_rate_specs[param_name] = []
 
         self._dynamic_rate_specs[param_name].append((from_state, to_state, coefficient))
+        self._compiled = None
+
+    def compile(self) -> CompiledRateModel:
+        """Get the compiled (array-based) representation of the model.
 
-    def build_rate_matrix(self, **kwargs) -> np.ndarray:
+        The compiled model holds the fixed-rate matrix and one sparse
+        index/coefficient basis per dynamic parameter. It is cached and
+        rebuilt only after set_rate() or add_dynamic_rate() is called.
+
+        Returns
+        -------
+        compiled : CompiledRateModel
+            Compiled representation of the current rates.
+        """
+        if self._compiled is None:
+            self._compiled = CompiledRateModel(
+                self.n_states, self._rates, self._dynamic_rate_specs
+            )
+        return self._compiled
+
+    def build_rate_matrix(self, sparse: Optional[str] = None, **kwargs):
         """Build the N×N rate matrix W.
 
         Parameters
         ----------
+        sparse : str, optional
+            If 'csr' or 'csc', return a scipy.sparse matrix assembled
+            directly from the rate triplets, without a dense intermediate.
+            Default (None) returns a dense np.ndarray.
         **kwargs : float
             Dynamic rate parameters (e.g., gamma=0.1, kmw_minus=1.0).
             These are multiplied by their coefficients and added to
@@ -142,30 +188,337 @@ class RateModel:
 
         Returns
         -------
-        W : np.ndarray
+        W : np.ndarray or scipy.sparse matrix
             The rate matrix with shape (n_states, n_states) in units of 1/s.
             Convention: W[j, i] = rate from state i to state j.
-            Diagonal elements ensure probability conservation (row sums = 0).
+            Diagonal elements ensure probability conservation (column sums = 0).
+        """
+        if sparse is not None:
+            return self.compile().build_sparse(format=sparse, **kwargs)
+        return self.compile().build(**kwargs)
+
+    def build_rate_matrices(self, **kwargs) -> np.ndarray:
+        """Build a stack of rate matrices for arrays of dynamic parameters.
+
+        Parameters
+        ----------
+        **kwargs : float or np.ndarray
+            Dynamic rate parameters in MHz (e.g., gamma=np.logspace(-2, 1, 50)).
+            Arrays are broadcast against each other.
+
+        Returns
+        -------
+        W : np.ndarray
+            Rate matrices with shape broadcast_shape + (n_states, n_states)
+            in units of 1/s, e.g. (B, n_states, n_states) for 1-D inputs
+            of length B.
+
+        Examples
+        --------
+        >>> W_stack = model.build_rate_matrices(gamma=np.array([0.1, 1.0]), kmw_minus=1.0)
+        >>> W_stack.shape
+        (2, 7, 7)
+        """
+        return self.compile().build(**kwargs)
+
+    def resolve_parameter(
+        self,
+        name: Union[str, Tuple[int, int]]
+    ) -> Tuple[str, Union[str, Tuple[int, int]]]:
+        """Classify a model parameter as a dynamic parameter or a fixed rate.
+
+        Parameters
+        ----------
+        name : str or (from_state, to_state)
+            A dynamic parameter (e.g. 'gamma'), a named fixed rate (e.g.
+            'k41') or a transition tuple.
+
+        Returns
+        -------
+        kind : str
+            'param' for dynamic parameters, 'rate' for fixed rates.
+        key : str or (from_state, to_state)
+            The parameter name or the transition of the rate.
+        """
+        if isinstance(name, tuple):
+            from_state, to_state = name
+            self._validate_state_index(from_state, "from_state")
+            self._validate_state_index(to_state, "to_state")
+            return 'rate', name
+        if name in self.compile().param_names:
+            return 'param', name
+        if name in self.rate_names:
+            return 'rate', self.rate_names[name]
+        raise ValueError(
+            f"Unknown parameter '{name}'. Use a dynamic parameter "
+            f"({', '.join(self.compile().param_names)}), a named rate "
+            f"({', '.join(self.rate_names)}) or a (from_state, to_state) tuple"
+        )
+
+    def rate_matrix_derivatives(
+        self,
+        parameters: Sequence[Union[str, Tuple[int, int]]]
+    ) -> np.ndarray:
+        """Derivatives dW/dθ of the rate matrix with respect to parameters.
+
+        W is affine in every dynamic parameter and fixed rate, so the
+        derivatives are the constant bases of the compiled model and do
+        not depend on the point at which they are taken.
+
+        Parameters
+        ----------
+        parameters : sequence
+            Dynamic parameters, named fixed rates or transition tuples (see
+            :meth:`resolve_parameter`).
+
+        Returns
+        -------
+        dW : np.ndarray
+            Derivatives with shape (n_params, n_states, n_states) in units
+            of 1/s per MHz.
+        """
+        compiled = self.compile()
+        n = self.n_states
+        dW = np.zeros((len(parameters), n, n))
+        for k, name in enumerate(parameters):
+            kind, key = self.resolve_parameter(name)
+            if kind == 'param':
+                indices, coefficients = compiled.param_basis(key)
+            else:
+                indices, coefficients = compiled.transition_basis(*key)
+            np.add.at(dW[k].reshape(-1), indices, coefficients)
+        return dW
+
+    def observable_weight_derivatives(
+        self,
+        parameters: Sequence[Union[str, Tuple[int, int]]],
+        names: Optional[Sequence[str]] = None
+    ) -> np.ndarray:
+        """Derivatives of the observable weights with respect to parameters.
+
+        Only transition-based observables depend on the rates: the weight
+        of a transition's source state grows by one per MHz of its rate.
+
+        Parameters
+        ----------
+        parameters : sequence
+            Dynamic parameters, named fixed rates or transition tuples (see
+            :meth:`resolve_parameter`).
+        names : sequence of str, optional
+            Observables to include, in order. Default is all of them.
+
+        Returns
+        -------
+        dweights : np.ndarray
+            Derivatives with shape (n_params, n_obs, n_states).
         """
-        W = np.zeros((self.n_states, self.n_states))
+        names = self._observable_names(names)
+        dweights = np.zeros((len(parameters), len(names), self.n_states))
+        for k, name in enumerate(parameters):
+            kind, key = self.resolve_parameter(name)
+            if kind != 'rate':
+                continue
+            for i, observable in enumerate(names):
+                if key in self._observables[observable][1]:
+                    dweights[k, i, key[0]] += 1.0
+        return dweights
+
+    def add_observable(
+        self,
+        name: str,
+        weights: Optional[Union[Sequence[float], Dict[int, float]]] = None,
+        transitions: Optional[Sequence[Tuple[int, int]]] = None
+    ) -> None:
+        """Declare a named linear observable of the populations.
+
+        An observable is a weight vector w, evaluated as w @ P. It can be
+        given directly as state weights, or as transitions whose current
+        rates are used as weights (the rate of events, e.g. photons, along
+        those transitions). Both may be combined.
 
-        # Add fixed rates
-        for (from_state, to_state), rate in self._rates.items():
-            W[to_state, from_state] += rate
+        Parameters
+        ----------
+        name : str
+            Name of the observable (e.g., 'pl', 'es_total').
+        weights : sequence or dict, optional
+            State weights, as a length-n_states sequence or a dict mapping
+            state index to weight.
+        transitions : sequence of (from_state, to_state), optional
+            Transitions whose rates (in MHz) are added to the weight of
+            their source state. Rates are looked up when the observable is
+            evaluated, so they follow set_rate() and sweep overrides.
 
-        # Add dynamic rates
-        for param_name, transitions in self._dynamic_rate_specs.items():
-            param_value = kwargs.get(param_name, 0.0)
-            for from_state, to_state, coefficient in transitions:
-                W[to_state, from_state] += param_value * coefficient
+        Examples
+        --------
+        >>> model.add_observable('es_total', weights={3: 1.0, 4: 1.0})
+        >>> model.add_observable('pl', transitions=[(3, 0), (4, 1)])
+        """
+        if weights is None and transitions is None:
+            raise ValueError("An observable needs weights and/or transitions")
+
+        state_weights = np.zeros(self.n_states)
+        if isinstance(weights, dict):
+            for state_index, weight in weights.items():
+                self._validate_state_index(state_index, "state_index")
+                state_weights[state_index] += weight
+        elif weights is not None:
+            weights = np.asarray(weights, dtype=float)
+            if weights.shape != (self.n_states,):
+                raise ValueError(
+                    f"weights must have shape ({self.n_states},), got {weights.shape}"
+                )
+            state_weights += weights
+
+        transition_list = []
+        for from_state, to_state in transitions or []:
+            self._validate_state_index(from_state, "from_state")
+            self._validate_state_index(to_state, "to_state")
+            transition_list.append((from_state, to_state))
+
+        self._observables[name] = (state_weights, transition_list)
+
+    @property
+    def observables(self) -> Tuple[str, ...]:
+        """Names of the declared observables."""
+        return tuple(self._observables)
+
+    def observable_transitions(self, name: str) -> List[Tuple[int, int]]:
+        """Transitions whose rates contribute to a declared observable.
 
-        # Set diagonal elements for probability conservation
-        # Diagonal = negative sum of outgoing rates from that state
-        for i in range(self.n_states):
-            W[i, i] = -np.sum(W[:, i]) + W[i, i]
+        Parameters
+        ----------
+        name : str
+            Name of the observable.
 
-        # Convert from MHz to Hz (1/s)
-        return W * 1e6
+        Returns
+        -------
+        transitions : list of (from_state, to_state)
+            The transitions given to add_observable() (empty for purely
+            state-weighted observables).
+        """
+        name, = self._observable_names([name])
+        return list(self._observables[name][1])
+
+    def resolve_photon_transitions(
+        self,
+        transitions: Optional[Sequence[Tuple[int, int]]] = None
+    ) -> List[Tuple[int, int]]:
+        """Validate photon-emitting transitions, defaulting to the 'pl' observable.
+
+        Parameters
+        ----------
+        transitions : sequence of (from_state, to_state), optional
+            Transitions that emit a photon. Default is the transitions of
+            the 'pl' observable.
+
+        Returns
+        -------
+        transitions : list of (from_state, to_state)
+            The validated, non-empty list of transitions.
+        """
+        if transitions is None:
+            if 'pl' not in self.observables:
+                raise ValueError(
+                    "photon_transitions is required for models without a 'pl' observable"
+                )
+            transitions = self.observable_transitions('pl')
+        for from_state, to_state in transitions:
+            self._validate_state_index(from_state, "from_state")
+            self._validate_state_index(to_state, "to_state")
+        if not transitions:
+            raise ValueError("At least one photon transition is required")
+        return [tuple(t) for t in transitions]
+
+    def observable_weights(
+        self,
+        names: Optional[Sequence[str]] = None,
+        rates: Optional[Dict[Tuple[int, int], np.ndarray]] = None
+    ) -> np.ndarray:
+        """Weight matrix of the requested observables.
+
+        Parameters
+        ----------
+        names : sequence of str, optional
+            Observables to include, in order. Default is all of them.
+        rates : dict, optional
+            Overrides for fixed rates as (from_state, to_state) -> value(s)
+            in MHz, as accepted by :meth:`CompiledRateModel.build`. Array
+            values give a stack of weight matrices.
+
+        Returns
+        -------
+        weights : np.ndarray
+            Weights with shape (n_obs, n_states), or
+            broadcast_shape + (n_obs, n_states) for array rate overrides.
+        """
+        names = self._observable_names(names)
+        rates = rates or {}
+        compiled_rates = self.compile().rates
+
+        flux_rates = {
+            transition: np.asarray(rates.get(transition, compiled_rates.get(transition, 0.0)),
+                                   dtype=float)
+            for name in names for transition in self._observables[name][1]
+        }
+        shape = np.broadcast_shapes(*(v.shape for v in flux_rates.values()))
+
+        weights = np.zeros(shape + (len(names), self.n_states))
+        for i, name in enumerate(names):
+            state_weights, transitions = self._observables[name]
+            weights[..., i, :] = state_weights
+            for transition in transitions:
+                weights[..., i, transition[0]] += flux_rates[transition]
+        return weights
+
+    def evaluate_observables(
+        self,
+        populations: np.ndarray,
+        names: Optional[Sequence[str]] = None,
+        rates: Optional[Dict[Tuple[int, int], np.ndarray]] = None
+    ) -> Dict[str, np.ndarray]:
+        """Evaluate observables on arbitrarily batched populations.
+
+        All observables are obtained from one matrix product of the
+        populations with the stacked weight vectors.
+
+        Parameters
+        ----------
+        populations : np.ndarray
+            Populations with shape (..., n_states).
+        names : sequence of str, optional
+            Observables to evaluate. Default is all of them.
+        rates : dict, optional
+            Fixed-rate overrides for transition-based observables; array
+            values must broadcast against populations.shape[:-1].
+
+        Returns
+        -------
+        values : dict
+            Observable name -> array of shape populations.shape[:-1].
+        """
+        names = self._observable_names(names)
+        weights = self.observable_weights(names, rates=rates)
+        populations = np.asarray(populations)
+
+        if weights.ndim == 2:
+            projected = populations @ weights.T
+        else:
+            projected = np.einsum('...s,...os->...o', populations, weights)
+        return {name: projected[..., i] for i, name in enumerate(names)}
+
+    def _observable_names(self, names: Optional[Sequence[str]]) -> List[str]:
+        """Validate observable names, defaulting to all declared ones."""
+        if names is None:
+            return list(self._observables)
+        if isinstance(names, str):
+            names = [names]
+        for name in names:
+            if name not in self._observables:
+                raise ValueError(
+                    f"Unknown observable '{name}'. "
+                    f"Available: {', '.join(self._observables) or 'none'}"
+                )
+        return list(names)
 
     def get_initial_state(self, state_index: int) -> np.ndarray:
         """Get initial probability vector with population in a single state.
@@ -185,6 +538,23 @@ class RateModel:
         P0[state_index] = 1.0
         return P0
 
+    def get_default_initial_state(self) -> np.ndarray:
+        """Get the default initial state of time-resolved simulations.
+
+        Equal population in the first half of the states, which models
+        usually declare as ground states. Subclasses with known ground
+        states override this.
+
+        Returns
+        -------
+        P0 : np.ndarray
+            Initial probability vector.
+        """
+        n_gs = self.n_states // 2
+        P0 = np.zeros(self.n_states)
+        P0[:n_gs] = 1.0 / n_gs
+        return P0
+
     def get_mixed_initial_state(self, populations: Dict[int, float]) -> np.ndarray:
         """Get initial probability vector with specified populations.
 
@@ -0,0 +1,279 @@
+"""
+Compiled (array-based) representation of a rate model.
+
+A rate matrix is affine in the dynamic parameters:
+
+    W(p) = W_base + sum_k p_k * B_k
+
+where W_base holds the fixed rates and each basis B_k holds the transitions
+driven by parameter p_k (including their diagonal loss terms). Storing B_k
+as flat index/coefficient pairs lets whole stacks of rate matrices be built
+with a few broadcast operations.
+"""
+
+import numpy as np
+import scipy.sparse as sp
+from typing import Dict, List, Optional, Tuple
+
+
+# Rates are specified in MHz; rate matrices are returned in 1/s
+MHZ_TO_HZ = 1e6
+
+
+class CompiledRateModel:
+    """Precomputed base matrix and sparse parameter bases of a RateModel.
+
+    Instances are normally obtained from :meth:`RateModel.compile`, which
+    caches them until the model's rates change.
+
+    Parameters
+    ----------
+    n_states : int
+        Number of states in the model.
+    rates : dict
+        Fixed rates as (from_state, to_state) -> rate in MHz.
+    dynamic_rate_specs : dict
+        Dynamic rates as param_name -> list of (from_state, to_state, coefficient).
+
+    Attributes
+    ----------
+    rates : dict
+        Copy of the fixed rates the model was compiled from, in MHz.
+    base : np.ndarray
+        Rate matrix of the fixed rates alone, in units of 1/s.
+    param_names : tuple of str
+        Names of the dynamic parameters.
+    """
+
+    def __init__(
+        self,
+        n_states: int,
+        rates: Dict[Tuple[int, int], float],
+        dynamic_rate_specs: Dict[str, List[Tuple[int, int, float]]]
+    ):
+        self.n_states = n_states
+        self.rates = dict(rates)
+        self._base: Optional[np.ndarray] = None
+
+        # Off-diagonal (to_state, from_state, rate in 1/s) triplets
+        self._fixed_triplets = self._triplets(
+            [(i, j, rate) for (i, j), rate in rates.items()]
+        )
+
+        self.param_names = tuple(dynamic_rate_specs)
+        self._bases: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._param_triplets: Dict[str, Tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+        for param_name, transitions in dynamic_rate_specs.items():
+            self._bases[param_name] = self._merge_transitions(transitions)
+            self._param_triplets[param_name] = self._triplets(transitions)
+
+    @property
+    def base(self) -> np.ndarray:
+        """Dense rate matrix of the fixed rates alone, in units of 1/s.
+
+        Computed on first use, so purely sparse workflows never allocate
+        an (n_states, n_states) dense array.
+        """
+        if self._base is None:
+            n = self.n_states
+            base = np.zeros((n, n))
+            for (from_state, to_state), rate in self.rates.items():
+                indices, coefficients = self.transition_basis(from_state, to_state)
+                base.flat[indices] += rate * coefficients
+            self._base = base
+        return self._base
+
+    def transition_basis(
+        self,
+        from_state: int,
+        to_state: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Flat indices and coefficients of a unit-rate transition.
+
+        A transition from state i to state j with rate k adds k at W[j, i]
+        and removes k from the diagonal W[i, i].
+
+        Parameters
+        ----------
+        from_state, to_state : int
+            Source and target state indices.
+
+        Returns
+        -------
+        indices : np.ndarray
+            Flat indices into an (n_states, n_states) matrix.
+        coefficients : np.ndarray
+            Matrix entries per MHz of rate, in units of 1/s.
+        """
+        n = self.n_states
+        indices = np.array([to_state * n + from_state, from_state * n + from_state])
+        coefficients = np.array([MHZ_TO_HZ, -MHZ_TO_HZ])
+        return indices, coefficients
+
+    def param_basis(self, param_name: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Flat indices and coefficients of a dynamic parameter's basis.
+
+        Parameters
+        ----------
+        param_name : str
+            Name of the dynamic parameter.
+
+        Returns
+        -------
+        indices : np.ndarray
+            Unique flat indices into an (n_states, n_states) matrix.
+        coefficients : np.ndarray
+            dW/dparam at those indices, in units of 1/s per MHz.
+        """
+        if param_name not in self._bases:
+            raise ValueError(
+                f"Unknown dynamic parameter '{param_name}'. "
+                f"Available: {', '.join(self.param_names)}"
+            )
+        return self._bases[param_name]
+
+    def build(
+        self,
+        rates: Optional[Dict[Tuple[int, int], np.ndarray]] = None,
+        **params
+    ) -> np.ndarray:
+        """Build a stack of rate matrices from broadcastable parameter arrays.
+
+        Parameters
+        ----------
+        rates : dict, optional
+            Overrides for fixed rates as (from_state, to_state) -> value(s)
+            in MHz. Transitions not already in the model are added.
+        **params : float or np.ndarray
+            Dynamic parameter values in MHz. Arrays are broadcast against
+            each other and against the rate overrides; unspecified
+            parameters default to 0 and unknown names are ignored.
+
+        Returns
+        -------
+        W : np.ndarray
+            Rate matrices with shape broadcast_shape + (n_states, n_states)
+            in units of 1/s. Scalar inputs give a single (n_states, n_states)
+            matrix.
+        """
+        n = self.n_states
+        rates = rates or {}
+        values = {
+            name: np.asarray(params[name], dtype=float)
+            for name in self.param_names if name in params
+        }
+        overrides = {
+            key: np.asarray(value, dtype=float) for key, value in rates.items()
+        }
+        shape = np.broadcast_shapes(
+            *(v.shape for v in values.values()),
+            *(v.shape for v in overrides.values())
+        )
+
+        W = np.empty(shape + (n, n))
+        W[...] = self.base
+        W_flat = W.reshape(shape + (n * n,))
+
+        for name, value in values.items():
+            indices, coefficients = self._bases[name]
+            W_flat[..., indices] += value[..., np.newaxis] * coefficients
+
+        for (from_state, to_state), value in overrides.items():
+            indices, coefficients = self.transition_basis(from_state, to_state)
+            delta = value - self.rates.get((from_state, to_state), 0.0)
+            W_flat[..., indices] += delta[..., np.newaxis] * coefficients
+
+        return W
+
+    def build_sparse(
+        self,
+        format: str = 'csr',
+        rates: Optional[Dict[Tuple[int, int], float]] = None,
+        **params
+    ) -> sp.spmatrix:
+        """Build a single rate matrix directly in a scipy.sparse format.
+
+        The off-diagonal entries are assembled from the (to, from, rate)
+        triplets of the fixed and dynamic rates; the diagonal is the
+        negative column sum. No dense (n_states, n_states) array is formed.
+        Every dynamic transition and the full diagonal are stored, even
+        when zero, so all matrices of one model share a sparsity pattern.
+
+        Parameters
+        ----------
+        format : str
+            Sparse format of the result, 'csr' or 'csc'.
+        rates : dict, optional
+            Overrides for fixed rates as (from_state, to_state) -> value in MHz.
+        **params : float
+            Dynamic parameter values in MHz (scalars).
+
+        Returns
+        -------
+        W : scipy.sparse matrix
+            Rate matrix with shape (n_states, n_states) in units of 1/s.
+        """
+        if format not in ('csr', 'csc'):
+            raise ValueError(f"Unsupported sparse format '{format}' (use 'csr' or 'csc')")
+
+        rows = [self._fixed_triplets[0]]
+        cols = [self._fixed_triplets[1]]
+        values = [self._fixed_triplets[2]]
+
+        for name in self.param_names:
+            p_rows, p_cols, p_values = self._param_triplets[name]
+            rows.append(p_rows)
+            cols.append(p_cols)
+            values.append(float(params.get(name, 0.0)) * p_values)
+
+        for (from_state, to_state), value in (rates or {}).items():
+            delta = value - self.rates.get((from_state, to_state), 0.0)
+            rows.append(np.array([to_state]))
+            cols.append(np.array([from_state]))
+            values.append(np.array([delta * MHZ_TO_HZ]))
+
+        n = self.n_states
+        rows = np.concatenate(rows)
+        cols = np.concatenate(cols)
+        values = np.concatenate(values)
+
+        # Diagonal = negative sum of outgoing rates from each state
+        diagonal = np.arange(n)
+        loss = np.bincount(cols, weights=values, minlength=n)
+
+        W = sp.coo_matrix(
+            (np.concatenate([values, -loss]),
+             (np.concatenate([rows, diagonal]), np.concatenate([cols, diagonal]))),
+            shape=(n, n)
+        )
+        return W.asformat(format)
+
+    @staticmethod
+    def _triplets(
+        transitions: List[Tuple[int, int, float]]
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Off-diagonal (rows, cols, values) of transitions, in 1/s."""
+        rows = np.array([to_state for _, to_state, _ in transitions], dtype=int)
+        cols = np.array([from_state for from_state, _, _ in transitions], dtype=int)
+        values = np.array([value for _, _, value in transitions], dtype=float)
+        return rows, cols, values * MHZ_TO_HZ
+
+    def _merge_transitions(
+        self,
+        transitions: List[Tuple[int, int, float]]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Combine transitions into unique flat indices and coefficients."""
+        all_indices = []
+        all_coefficients = []
+        for from_state, to_state, coefficient in transitions:
+            indices, coefficients = self.transition_basis(from_state, to_state)
+            all_indices.append(indices)
+            all_coefficients.append(coefficient * coefficients)
+
+        if not all_indices:
+            return np.zeros(0, dtype=int), np.zeros(0)
+
+        indices, inverse = np.unique(np.concatenate(all_indices), return_inverse=True)
+        coefficients = np.zeros(len(indices))
+        np.add.at(coefficients, inverse, np.concatenate(all_coefficients))
+        return indices, coefficients
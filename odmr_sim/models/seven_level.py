@@ -34,6 +34,12 @@ class SevenLevelModel(RateModel):
         kmw_minus : Microwave rate for |0> <-> |-> transition
         kmw_plus  : Microwave rate for |0> <-> |+> transition
 
+    Observables (see evaluate_observables):
+        pl       : PL intensity, ES populations × radiative rates (MHz)
+        es_total : Total excited-state population
+        gs0      : Population of GS|0>
+        singlet  : Population of the singlet state
+
     Parameters
     ----------
     k41 : float, optional
@@ -85,6 +91,9 @@ class SevenLevelModel(RateModel):
     ES_PLUS = 5
     SINGLET = 6
 
+    # Radiative (photon-emitting) transitions as (from_state, to_state)
+    RADIATIVE_TRANSITIONS = [(ES_0, GS_0), (ES_MINUS, GS_MINUS), (ES_PLUS, GS_PLUS)]
+
     def __init__(
         self,
         k41: float = 62.5,
@@ -118,22 +127,25 @@ class SevenLevelModel(RateModel):
         # Set up dynamic rates (gamma, kmw)
         self._setup_dynamic_rates()
 
+        # Named observables (PL, ES total, ...)
+        self._setup_observables()
+
     def _setup_fixed_rates(self) -> None:
         """Set up the fixed transition rates."""
         # Radiative decay (ES -> GS)
-        self.set_rate(self.ES_0, self.GS_0, self.k41)
-        self.set_rate(self.ES_MINUS, self.GS_MINUS, self.k52)
-        self.set_rate(self.ES_PLUS, self.GS_PLUS, self.k63)
+        self.set_rate(self.ES_0, self.GS_0, self.k41, name='k41')
+        self.set_rate(self.ES_MINUS, self.GS_MINUS, self.k52, name='k52')
+        self.set_rate(self.ES_PLUS, self.GS_PLUS, self.k63, name='k63')
 
         # Upper ISC (ES -> Singlet)
-        self.set_rate(self.ES_0, self.SINGLET, self.k47)
-        self.set_rate(self.ES_MINUS, self.SINGLET, self.k57)
-        self.set_rate(self.ES_PLUS, self.SINGLET, self.k67)
+        self.set_rate(self.ES_0, self.SINGLET, self.k47, name='k47')
+        self.set_rate(self.ES_MINUS, self.SINGLET, self.k57, name='k57')
+        self.set_rate(self.ES_PLUS, self.SINGLET, self.k67, name='k67')
 
         # Lower ISC (Singlet -> GS)
-        self.set_rate(self.SINGLET, self.GS_0, self.k71)
-        self.set_rate(self.SINGLET, self.GS_MINUS, self.k72)
-        self.set_rate(self.SINGLET, self.GS_PLUS, self.k73)
+        self.set_rate(self.SINGLET, self.GS_0, self.k71, name='k71')
+        self.set_rate(self.SINGLET, self.GS_MINUS, self.k72, name='k72')
+        self.set_rate(self.SINGLET, self.GS_PLUS, self.k73, name='k73')
 
     def _setup_dynamic_rates(self) -> None:
         """Set up dynamic rate specifications for gamma and kmw."""
@@ -150,12 +162,22 @@ class SevenLevelModel(RateModel):
         self.add_dynamic_rate('kmw_plus', self.GS_0, self.GS_PLUS)
         self.add_dynamic_rate('kmw_plus', self.GS_PLUS, self.GS_0)
 
+    def _setup_observables(self) -> None:
+        """Declare the standard linear observables of the 7-level model."""
+        self.add_observable('pl', transitions=self.RADIATIVE_TRANSITIONS)
+        self.add_observable(
+            'es_total', weights={self.ES_0: 1.0, self.ES_MINUS: 1.0, self.ES_PLUS: 1.0}
+        )
+        self.add_observable('gs0', weights={self.GS_0: 1.0})
+        self.add_observable('singlet', weights={self.SINGLET: 1.0})
+
     def build_rate_matrix(
         self,
         gamma: float = 0.0,
         kmw_minus: float = 0.0,
-        kmw_plus: float = 0.0
-    ) -> np.ndarray:
+        kmw_plus: float = 0.0,
+        sparse: Optional[str] = None
+    ):
         """Build the 7×7 rate matrix.
 
         Parameters
@@ -166,13 +188,41 @@ class SevenLevelModel(RateModel):
             Microwave rate for |0> <-> |-> transition in MHz.
         kmw_plus : float
             Microwave rate for |0> <-> |+> transition in MHz.
+        sparse : str, optional
+            'csr' or 'csc' to return a scipy.sparse matrix.
 
         Returns
         -------
-        W : np.ndarray
+        W : np.ndarray or scipy.sparse matrix
             The 7×7 rate matrix in units of 1/s.
         """
         return super().build_rate_matrix(
+            sparse=sparse,
+            gamma=gamma,
+            kmw_minus=kmw_minus,
+            kmw_plus=kmw_plus
+        )
+
+    def build_rate_matrices(
+        self,
+        gamma: np.ndarray = 0.0,
+        kmw_minus: np.ndarray = 0.0,
+        kmw_plus: np.ndarray = 0.0
+    ) -> np.ndarray:
+        """Build a stack of 7×7 rate matrices from parameter arrays.
+
+        Parameters
+        ----------
+        gamma, kmw_minus, kmw_plus : float or np.ndarray
+            Optical excitation and microwave rates in MHz. Arrays are
+            broadcast against each other.
+
+        Returns
+        -------
+        W : np.ndarray
+            Rate matrices with shape broadcast_shape + (7, 7) in units of 1/s.
+        """
+        return super().build_rate_matrices(
             gamma=gamma,
             kmw_minus=kmw_minus,
             kmw_plus=kmw_plus
@@ -192,6 +242,10 @@ class SevenLevelModel(RateModel):
         P0[self.GS_PLUS] = 1/3
         return P0
 
+    def get_default_initial_state(self) -> np.ndarray:
+        """Get the default initial state: the mixed ground state."""
+        return self.get_ground_state_mixed()
+
     def get_rate_summary(self) -> str:
         """Get a formatted summary of all rate parameters."""
         return (
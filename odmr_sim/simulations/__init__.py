@@ -3,5 +3,22 @@
 from odmr_sim.simulations.initialization import InitializationSimulation
 from odmr_sim.simulations.readout import ReadoutSimulation
 from odmr_sim.simulations.odmr import ODMRSimulation
+from odmr_sim.simulations.sweep import GridSweep
+from odmr_sim.simulations.pulsed import PulseSegment, PulseSequenceSimulation
+from odmr_sim.simulations.fitting import ContrastData, ReadoutData, RateFitter
+from odmr_sim.simulations.photons import PhotonTrajectorySimulation
+from odmr_sim.simulations.correlation import PhotonCorrelationSimulation
 
-__all__ = ["InitializationSimulation", "ReadoutSimulation", "ODMRSimulation"]
+__all__ = [
+    "InitializationSimulation",
+    "ReadoutSimulation",
+    "ODMRSimulation",
+    "GridSweep",
+    "PulseSegment",
+    "PulseSequenceSimulation",
+    "ContrastData",
+    "ReadoutData",
+    "RateFitter",
+    "PhotonTrajectorySimulation",
+    "PhotonCorrelationSimulation",
+]
@@ -0,0 +1,446 @@
+"""
+Least-squares fitting of model rates to measured ODMR and readout data.
+
+Every dataset is evaluated from the compiled model with rate overrides, so
+no model is rebuilt during a fit. All steady-state contrast points of all
+datasets are solved in one batch, and the Jacobian is exact: it comes from
+the forward sensitivities of RateSolver (one shared factorization for the
+steady states, one block propagation per readout trace).
+"""
+
+import numpy as np
+from functools import partial
+from scipy.optimize import least_squares
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+from odmr_sim.models.base import RateModel
+from odmr_sim.models.presets import PRESETS
+from odmr_sim.models.seven_level import SevenLevelModel
+from odmr_sim.solvers.rate_solver import RateSolver
+from odmr_sim.simulations.parallel import run_chunks
+
+
+class ContrastData:
+    """Measured steady-state ODMR contrast points.
+
+    Parameters
+    ----------
+    contrast : array_like
+        Measured contrasts, (I_noMW - I_MW) / I_noMW.
+    gamma, kmw_minus, kmw_plus : float or array_like
+        Excitation and microwave rates of each point in MHz, broadcast
+        against contrast.
+    sigma : float or array_like
+        Measurement uncertainties. Default is 1.
+    label : str, optional
+        Key of the dataset in the fit result's 'dataset_costs'.
+    """
+
+    def __init__(
+        self,
+        contrast: np.ndarray,
+        gamma: Union[float, np.ndarray],
+        kmw_minus: Union[float, np.ndarray] = 0.0,
+        kmw_plus: Union[float, np.ndarray] = 0.0,
+        sigma: Union[float, np.ndarray] = 1.0,
+        label: Optional[str] = None
+    ):
+        self.contrast = np.atleast_1d(np.asarray(contrast, dtype=float)).ravel()
+        shape = self.contrast.shape
+        self.gamma = np.broadcast_to(np.asarray(gamma, dtype=float), shape)
+        self.kmw_minus = np.broadcast_to(np.asarray(kmw_minus, dtype=float), shape)
+        self.kmw_plus = np.broadcast_to(np.asarray(kmw_plus, dtype=float), shape)
+        self.sigma = np.broadcast_to(np.asarray(sigma, dtype=float), shape)
+        self.label = label
+
+    def __len__(self) -> int:
+        return len(self.contrast)
+
+
+class ReadoutData:
+    """Measured PL transient under optical excitation (no microwave).
+
+    Parameters
+    ----------
+    t : array_like
+        Time points in seconds.
+    pl : array_like
+        Measured PL at each time point.
+    gamma : float
+        Optical excitation rate in MHz.
+    initial_state : int or np.ndarray
+        State index or population vector at t = 0. Default is 0 (GS|0>
+        of SevenLevelModel).
+    sigma : float or array_like
+        Measurement uncertainties. Default is 1.
+    scale : float, optional
+        Factor converting the model PL (photons per second per MHz of
+        radiative rate) to measured units. If None (default), the best
+        scale is found in closed form at every evaluation.
+    label : str, optional
+        Key of the dataset in the fit result's 'dataset_costs'.
+    """
+
+    def __init__(
+        self,
+        t: np.ndarray,
+        pl: np.ndarray,
+        gamma: float,
+        initial_state: Union[int, np.ndarray] = 0,
+        sigma: Union[float, np.ndarray] = 1.0,
+        scale: Optional[float] = None,
+        label: Optional[str] = None
+    ):
+        self.t = np.asarray(t, dtype=float).ravel()
+        self.pl = np.asarray(pl, dtype=float).ravel()
+        if self.t.shape != self.pl.shape:
+            raise ValueError("t and pl must have the same length")
+        self.gamma = float(gamma)
+        self.initial_state = initial_state
+        self.sigma = np.broadcast_to(np.asarray(sigma, dtype=float), self.t.shape)
+        self.scale = scale
+        self.label = label
+
+    def __len__(self) -> int:
+        return len(self.t)
+
+
+class RateFitter:
+    """Fit fixed model rates to contrast and readout datasets.
+
+    Rates are optimized in log space (so they stay positive) with
+    scipy.optimize.least_squares and an analytic Jacobian.
+
+    Parameters
+    ----------
+    model : RateModel or SevenLevelModel
+        Model providing the structure and the rates that are not fitted.
+        It needs a 'pl' observable. The model itself is not modified.
+    datasets : sequence of ContrastData or ReadoutData
+        Measurements to fit simultaneously.
+    parameters : sequence, optional
+        Fixed rates to fit, as named rates or (from_state, to_state)
+        tuples. Default is the intersystem-crossing rates
+        ('k47', 'k57', 'k67', 'k71', 'k72', 'k73').
+    bounds : dict, optional
+        Parameter -> (lower, upper) in MHz. Unbounded by default.
+
+    Examples
+    --------
+    >>> from odmr_sim.simulations import ContrastData, RateFitter
+    >>>
+    >>> data = ContrastData(measured, gamma=gammas, kmw_minus=1.0, kmw_plus=1.0)
+    >>> fitter = RateFitter(get_preset('nv_bulk'), [data])
+    >>> result = fitter.fit(starts=['nv_bulk', 'g9_g8_30dp'], executor='processes')
+    >>> result['values']['k71']
+    """
+
+    def __init__(
+        self,
+        model: Union[RateModel, SevenLevelModel],
+        datasets: Sequence[Union[ContrastData, ReadoutData]],
+        parameters: Sequence[Union[str, Tuple[int, int]]] = (
+            'k47', 'k57', 'k67', 'k71', 'k72', 'k73'
+        ),
+        bounds: Optional[Dict[Union[str, Tuple[int, int]], Tuple[float, float]]] = None
+    ):
+        if 'pl' not in model.observables:
+            raise ValueError("RateFitter requires a model with a 'pl' observable")
+        if not datasets:
+            raise ValueError("At least one dataset is required")
+        for dataset in datasets:
+            if not isinstance(dataset, (ContrastData, ReadoutData)):
+                raise ValueError(f"Unsupported dataset type: {type(dataset).__name__}")
+
+        self.model = model
+        self.datasets = list(datasets)
+        self.parameters = list(parameters)
+        self.solver = RateSolver()
+
+        self._transitions = []
+        for name in self.parameters:
+            kind, key = model.resolve_parameter(name)
+            if kind != 'rate':
+                raise ValueError(f"Only fixed rates can be fitted, got '{name}'")
+            self._transitions.append(key)
+
+        bounds = bounds or {}
+        lower, upper = np.array(
+            [bounds.get(name, (0.0, np.inf)) for name in self.parameters], dtype=float
+        ).reshape(-1, 2).T
+        with np.errstate(divide='ignore'):
+            self._log_bounds = (np.log(lower), np.log(upper))
+
+        # W and the PL weights are affine in the rates: constant derivatives
+        self._dW = model.rate_matrix_derivatives(self.parameters)
+        self._dweights = model.observable_weight_derivatives(self.parameters, ['pl'])
+
+    @property
+    def n_residuals(self) -> int:
+        """Total number of data points over all datasets."""
+        return sum(len(dataset) for dataset in self.datasets)
+
+    def initial_values(self) -> np.ndarray:
+        """Current model values of the fitted rates in MHz."""
+        rates = self.model.compile().rates
+        return np.array([rates.get(key, 0.0) for key in self._transitions])
+
+    def residuals(self, values: np.ndarray) -> np.ndarray:
+        """Weighted residuals (model - data) / sigma for rates in MHz."""
+        return self._evaluate(values)[0]
+
+    def jacobian(self, values: np.ndarray) -> np.ndarray:
+        """Jacobian of the residuals with respect to the rates (per MHz)."""
+        return self._evaluate(values)[1]
+
+    def fit(
+        self,
+        starts: Optional[Sequence[Union[str, Dict, np.ndarray]]] = None,
+        n_starts: int = 1,
+        seed: Optional[int] = None,
+        spread: float = 10.0,
+        executor: str = 'serial',
+        n_workers: Optional[int] = None,
+        **least_squares_kwargs
+    ) -> dict:
+        """Fit the rates, optionally from several starting points.
+
+        Parameters
+        ----------
+        starts : sequence, optional
+            Starting points, each a preset name, a dict of parameter ->
+            value in MHz (missing parameters take the model value) or an
+            array in parameter order. Default is the model's current rates.
+        n_starts : int
+            Total number of starts. Starts beyond the given ones are drawn
+            log-uniformly within a factor ``spread`` of the model values.
+        seed : int, optional
+            Seed for the random starts.
+        spread : float
+            Range factor of the random starts. Default is 10.
+        executor : str
+            'serial', 'threads' or 'processes' for running the starts.
+        n_workers : int, optional
+            Number of workers. Defaults to the CPU count.
+        **least_squares_kwargs
+            Passed to scipy.optimize.least_squares (e.g. method, ftol).
+
+        Returns
+        -------
+        result : dict
+            Dictionary containing:
+            - 'values': best-fit parameter -> rate in MHz
+            - 'x': best-fit rates as an array in parameter order
+            - 'cost': 0.5 * sum of squared residuals at the optimum
+            - 'residuals': weighted residuals at the optimum
+            - 'dataset_costs': dataset label (or index) -> its share of
+              the cost
+            - 'stderr': parameter -> standard error in MHz (from J^T J)
+            - 'success', 'message', 'nfev': from least_squares
+            - 'starts': per-start summaries (x0, x, cost, success), in
+              start order
+        """
+        x0_list = self._starting_points(starts, n_starts, seed, spread)
+        runs = run_chunks(
+            partial(self._fit_from, least_squares_kwargs), x0_list,
+            executor=executor, n_workers=n_workers
+        )
+        best = min(runs, key=lambda run: run['cost'] if run['success'] else np.inf)
+
+        x = best['x']
+        residuals, jacobian = self._evaluate(x)
+        # Pseudo-inverse: unidentifiable combinations do not poison the rest
+        covariance = np.linalg.pinv(jacobian.T @ jacobian)
+        dof = max(len(residuals) - len(x), 1)
+        stderr = np.sqrt(np.maximum(np.diag(covariance), 0) * 2 * best['cost'] / dof)
+
+        bounds = np.cumsum([0] + [len(dataset) for dataset in self.datasets])
+        dataset_costs = {
+            dataset.label if dataset.label is not None else i:
+                0.5 * float(np.sum(residuals[start:stop] ** 2))
+            for i, (dataset, start, stop) in enumerate(
+                zip(self.datasets, bounds[:-1], bounds[1:])
+            )
+        }
+
+        return {
+            'values': dict(zip(self.parameters, x)),
+            'x': x,
+            'cost': best['cost'],
+            'residuals': residuals,
+            'dataset_costs': dataset_costs,
+            'stderr': dict(zip(self.parameters, stderr)),
+            'success': best['success'],
+            'message': best['message'],
+            'nfev': best['nfev'],
+            'starts': runs,
+        }
+
+    def _fit_from(self, least_squares_kwargs: Dict, x0: np.ndarray) -> dict:
+        """Run one least-squares fit from x0 (rates in MHz)."""
+        lower, upper = self._log_bounds
+        log_x0 = np.clip(np.log(x0), lower, upper)
+
+        # least_squares asks for residuals and Jacobian separately; keep the
+        # last evaluation local to this run so that thread workers never share it
+        cache = {}
+
+        def evaluate(log_x):
+            key = log_x.tobytes()
+            if key not in cache:
+                cache.clear()
+                cache[key] = self._evaluate(np.exp(log_x))
+            return cache[key]
+
+        def fun(log_x):
+            return evaluate(log_x)[0]
+
+        def jac(log_x):
+            return evaluate(log_x)[1] * np.exp(log_x)
+
+        solution = least_squares(
+            fun, log_x0, jac=jac, bounds=(lower, upper), **least_squares_kwargs
+        )
+        return {
+            'x0': x0,
+            'x': np.exp(solution.x),
+            'cost': float(solution.cost),
+            'success': bool(solution.success),
+            'message': solution.message,
+            'nfev': solution.nfev,
+        }
+
+    def _starting_points(
+        self,
+        starts: Optional[Sequence],
+        n_starts: int,
+        seed: Optional[int],
+        spread: float
+    ) -> List[np.ndarray]:
+        """Resolve start specifications to rate arrays in MHz."""
+        default = self.initial_values()
+        x0_list = []
+        for start in starts if starts is not None else [default]:
+            if isinstance(start, str):
+                start = self._preset_values(start)
+            if isinstance(start, dict):
+                x0 = default.copy()
+                for name, value in start.items():
+                    x0[self.parameters.index(name)] = value
+                x0_list.append(x0)
+            else:
+                x0_list.append(np.asarray(start, dtype=float))
+
+        rng = np.random.default_rng(seed)
+        n_random = max(n_starts - len(x0_list), 0)
+        factors = np.exp(rng.uniform(-1, 1, (n_random, len(default))) * np.log(spread))
+        x0_list.extend(default * factor for factor in factors)
+
+        for x0 in x0_list:
+            if x0.shape != default.shape or np.any(x0 <= 0):
+                raise ValueError("Starting rates must be positive, one per parameter")
+        return x0_list
+
+    def _preset_values(self, name: str) -> Dict:
+        """Fitted parameters taken from a SevenLevelModel preset."""
+        key = name.lower().replace("-", "_").replace("@", "_").replace(" ", "_")
+        if key not in PRESETS:
+            raise ValueError(
+                f"Unknown preset '{name}'. Available presets: {', '.join(PRESETS)}"
+            )
+        return {p: PRESETS[key][p] for p in self.parameters if p in PRESETS[key]}
+
+    def _evaluate(self, values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Residuals and Jacobian (per MHz) of every dataset at the given rates."""
+        values = np.asarray(values, dtype=float)
+        overrides = dict(zip(self._transitions, values))
+        compiled = self.model.compile()
+        weights = self.model.observable_weights(['pl'], rates=overrides)[0]
+        dweights = self._dweights[:, 0]
+
+        residuals = np.empty(self.n_residuals)
+        jacobian = np.empty((self.n_residuals, len(self.parameters)))
+        slices = []
+        start = 0
+        for dataset in self.datasets:
+            slices.append(slice(start, start + len(dataset)))
+            start += len(dataset)
+
+        # All contrast points, with and without microwave, in one batch
+        contrast_sets = [
+            (dataset, s) for dataset, s in zip(self.datasets, slices)
+            if isinstance(dataset, ContrastData)
+        ]
+        if contrast_sets:
+            gamma = np.concatenate([d.gamma for d, _ in contrast_sets])
+            kmw_minus = np.concatenate([d.kmw_minus for d, _ in contrast_sets])
+            kmw_plus = np.concatenate([d.kmw_plus for d, _ in contrast_sets])
+            n_points = len(gamma)
+            W = compiled.build(
+                rates=overrides,
+                gamma=np.concatenate([gamma, gamma]),
+                kmw_minus=np.concatenate([np.zeros(n_points), kmw_minus]),
+                kmw_plus=np.concatenate([np.zeros(n_points), kmw_plus]),
+            )
+            P, dP = self.solver.solve_steady_state_sensitivity(W, self._dW)
+            intensity = P @ weights
+            dintensity = dP @ weights + P @ dweights.T
+            I_nomw, I_mw = intensity[:n_points], intensity[n_points:]
+            dI_nomw, dI_mw = dintensity[:n_points], dintensity[n_points:]
+
+            safe = np.where(I_nomw == 0, 1.0, I_nomw)
+            contrast = np.where(I_nomw == 0, 0.0, 1.0 - I_mw / safe)
+            dcontrast = (I_mw[:, None] * dI_nomw - I_nomw[:, None] * dI_mw) / safe[:, None] ** 2
+            dcontrast[I_nomw == 0] = 0.0
+
+            offset = 0
+            for dataset, s in contrast_sets:
+                n = len(dataset)
+                residuals[s] = (contrast[offset:offset + n] - dataset.contrast) / dataset.sigma
+                jacobian[s] = dcontrast[offset:offset + n] / dataset.sigma[:, None]
+                offset += n
+
+        for dataset, s in zip(self.datasets, slices):
+            if isinstance(dataset, ReadoutData):
+                residuals[s], jacobian[s] = self._readout_residuals(
+                    dataset, compiled, overrides, weights, dweights
+                )
+
+        return residuals, jacobian
+
+    def _readout_residuals(
+        self,
+        dataset: ReadoutData,
+        compiled,
+        overrides: Dict,
+        weights: np.ndarray,
+        dweights: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Residuals and Jacobian of one readout trace."""
+        W = compiled.build(rates=overrides, gamma=dataset.gamma)
+        if isinstance(dataset.initial_state, (int, np.integer)):
+            P0 = self.model.get_initial_state(int(dataset.initial_state))
+        else:
+            P0 = np.asarray(dataset.initial_state, dtype=float)
+
+        pl, dpl = self.solver.solve_expm_sensitivity(
+            W, self._dW, P0, dataset.t, weights=weights, dweights=dweights[:, None, :]
+        )
+        pl, dpl = pl[:, 0], dpl[:, :, 0]
+
+        inv_var = 1.0 / dataset.sigma ** 2
+        if dataset.scale is None:
+            # Closed-form best scale a = <m, y> / <m, m> and its derivative
+            norm = np.sum(inv_var * pl * pl)
+            if norm == 0:
+                scale, dscale = 0.0, np.zeros(len(self.parameters))
+            else:
+                scale = np.sum(inv_var * pl * dataset.pl) / norm
+                dscale = (
+                    (inv_var * dataset.pl) @ dpl - 2 * scale * (inv_var * pl) @ dpl
+                ) / norm
+        else:
+            scale, dscale = dataset.scale, np.zeros(len(self.parameters))
+
+        residuals = (scale * pl - dataset.pl) / dataset.sigma
+        jacobian = (scale * dpl + pl[:, None] * dscale) / dataset.sigma[:, None]
+        return residuals, jacobian
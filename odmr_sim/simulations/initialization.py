@@ -3,10 +3,14 @@ Initialization (spin polarization) simulations.
 """
 
 import numpy as np
-from typing import Optional, List, Union
+from functools import partial
+from typing import Optional, List, Sequence, Tuple, Union
 from odmr_sim.models.base import RateModel
 from odmr_sim.models.seven_level import SevenLevelModel
 from odmr_sim.solvers.rate_solver import RateSolver
+from odmr_sim.simulations.parallel import (
+    fill_chunks, partition, resolve_workers, shared_outputs
+)
 
 
 class InitializationSimulation:
@@ -45,6 +49,7 @@ class InitializationSimulation:
         t_min: float = 1e-9,
         n_points: int = 1000,
         use_log_time: bool = True,
+        observables: Optional[Sequence[str]] = None,
         **model_kwargs
     ) -> dict:
         """Run initialization simulation.
@@ -68,6 +73,10 @@ class InitializationSimulation:
             Number of time points.
         use_log_time : bool
             If True, use logarithmic time spacing.
+        observables : sequence of str, optional
+            Names of model observables (e.g. ['pl', 'gs0']) to evaluate
+            instead of the populations. They are projected during the
+            propagation, so memory scales with n_points * n_observables.
         **model_kwargs
             Additional keyword arguments passed to model.build_rate_matrix().
 
@@ -77,43 +86,77 @@ class InitializationSimulation:
             Dictionary containing:
             - 't': time array in seconds
             - 't_ns': time array in nanoseconds
-            - 'populations': population array (n_times, n_states)
+            - 'populations': population array (n_times, n_states), or None
+              if observables are requested
+            - 'observables': dict of observable name -> (n_times,) array
+              (if observables are requested)
             - 'labels': state labels
             - 'model': the model used
             - 'params': simulation parameters
         """
-        # Build rate matrix
+        W = self._build_rate_matrix(gamma, kmw_minus, kmw_plus, **model_kwargs)
+        if P0 is None:
+            P0 = self.model.get_default_initial_state()
+
+        t_eval = self._time_grid(t_min, t_max, n_points, use_log_time)
+
+        # Solve
+        weights = None if observables is None else self.model.observable_weights(observables)
+        values = self.solver.solve_expm(W, P0, t_eval, method='auto', weights=weights)
+
+        return self._make_result(
+            t_eval, values, gamma, kmw_minus, kmw_plus, P0, observables
+        )
+
+    def _build_rate_matrix(
+        self,
+        gamma: float,
+        kmw_minus: float,
+        kmw_plus: float,
+        **model_kwargs
+    ) -> np.ndarray:
+        """Build the rate matrix for one operating point."""
         if isinstance(self.model, SevenLevelModel):
-            W = self.model.build_rate_matrix(
+            return self.model.build_rate_matrix(
                 gamma=gamma,
                 kmw_minus=kmw_minus,
                 kmw_plus=kmw_plus
             )
-            if P0 is None:
-                P0 = self.model.get_ground_state_mixed()
-        else:
-            W = self.model.build_rate_matrix(
-                gamma=gamma,
-                kmw_minus=kmw_minus,
-                kmw_plus=kmw_plus,
-                **model_kwargs
-            )
-            if P0 is None:
-                # Equal population in first half of states (assume ground states)
-                n_gs = self.model.n_states // 2
-                P0 = np.zeros(self.model.n_states)
-                P0[:n_gs] = 1.0 / n_gs
+        return self.model.build_rate_matrix(
+            gamma=gamma,
+            kmw_minus=kmw_minus,
+            kmw_plus=kmw_plus,
+            **model_kwargs
+        )
 
-        # Create time array
+    @staticmethod
+    def _time_grid(
+        t_min: float,
+        t_max: float,
+        n_points: int,
+        use_log_time: bool
+    ) -> np.ndarray:
+        """Create the time array in seconds."""
         if use_log_time:
-            t_eval = np.logspace(np.log10(t_min), np.log10(t_max), n_points)
-        else:
-            t_eval = np.linspace(t_min, t_max, n_points)
+            return np.logspace(np.log10(t_min), np.log10(t_max), n_points)
+        return np.linspace(t_min, t_max, n_points)
 
-        # Solve
-        populations = self.solver.solve_expm(W, P0, t_eval)
+    def _make_result(
+        self,
+        t_eval: np.ndarray,
+        populations: np.ndarray,
+        gamma: float,
+        kmw_minus: float,
+        kmw_plus: float,
+        P0: np.ndarray,
+        observables: Optional[Sequence[str]] = None
+    ) -> dict:
+        """Assemble the result dictionary returned by run().
 
-        return {
+        With observables, `populations` holds the projected values with
+        one column per observable.
+        """
+        result = {
             't': t_eval,
             't_ns': t_eval * 1e9,
             'populations': populations,
@@ -126,6 +169,12 @@ class InitializationSimulation:
                 'P0': P0,
             }
         }
+        if observables is not None:
+            result['populations'] = None
+            result['observables'] = {
+                name: populations[..., i] for i, name in enumerate(observables)
+            }
+        return result
 
     def run_sweep_gamma(
         self,
@@ -136,29 +185,93 @@ class InitializationSimulation:
         t_max: float = 1e-1,
         t_min: float = 1e-9,
         n_points: int = 1000,
+        executor: str = 'serial',
+        n_workers: Optional[int] = None,
+        out: Optional[np.ndarray] = None,
+        observables: Optional[Sequence[str]] = None,
     ) -> List[dict]:
         """Run initialization for multiple excitation rates.
 
+        All populations are written into one (n_gammas, n_points, n_states)
+        array. With the 'processes' executor, workers write into it in
+        place, so only chunk indices travel back to the parent process: the
+        default output is allocated in shared memory, and an np.memmap
+        ``out`` is reopened by the workers. A plain ndarray ``out`` is
+        filled through a temporary shared-memory copy, which doubles the
+        peak memory of the output.
+
         Parameters
         ----------
         gammas : list of float
             List of excitation rates to sweep.
+        executor : str
+            'serial', 'threads' or 'processes'. The gammas are split into
+            contiguous chunks that are evaluated by the executor.
+        n_workers : int, optional
+            Number of workers for 'threads' and 'processes'. Defaults to
+            the CPU count.
+        out : np.ndarray, optional
+            Preallocated C-contiguous array (e.g. an np.memmap) of shape
+            (len(gammas), n_points, n_states) that receives the populations,
+            or (len(gammas), n_points, n_observables) with observables.
+        observables : sequence of str, optional
+            Names of model observables to evaluate instead of the
+            populations (see run()).
 
         Returns
         -------
         results : list of dict
-            List of result dictionaries, one for each gamma value.
+            List of result dictionaries, one for each gamma value. Their
+            'populations' (or 'observables') entries are views into the
+            shared output array.
         """
-        results = []
-        for gamma in gammas:
-            result = self.run(
-                gamma=gamma,
-                kmw_minus=kmw_minus,
-                kmw_plus=kmw_plus,
-                P0=P0,
-                t_max=t_max,
-                t_min=t_min,
-                n_points=n_points,
+        n_workers = resolve_workers(executor, n_workers)
+        gammas = list(gammas)
+        if observables is None:
+            weights = None
+            shape = (len(gammas), n_points, self.model.n_states)
+        else:
+            weights = self.model.observable_weights(observables)
+            shape = (len(gammas), n_points, len(weights))
+
+        if out is not None and out.shape != shape:
+            raise ValueError(f"out must have shape {shape}, got {out.shape}")
+
+        if P0 is None:
+            P0 = self.model.get_default_initial_state()
+        t_eval = self._time_grid(t_min, t_max, n_points, use_log_time=True)
+
+        ranges = [(chunk.start, chunk.stop) for chunk in partition(len(gammas), n_workers)]
+        allocate = [shape] if out is None else []
+        with shared_outputs(allocate, executor, len(ranges)) as allocated:
+            fill_chunks(
+                partial(self._fill_sweep_chunk, gammas, kmw_minus, kmw_plus, P0, t_eval, weights),
+                ranges, allocated or [out], executor=executor, n_workers=n_workers
+            )
+        if out is None:
+            out = np.asarray(allocated[0])
+
+        return [
+            self._make_result(t_eval, out[i], gamma, kmw_minus, kmw_plus, P0, observables)
+            for i, gamma in enumerate(gammas)
+        ]
+
+    def _fill_sweep_chunk(
+        self,
+        gammas: List[float],
+        kmw_minus: float,
+        kmw_plus: float,
+        P0: np.ndarray,
+        t_eval: np.ndarray,
+        weights: Optional[np.ndarray],
+        arrays: List[np.ndarray],
+        index_range: Tuple[int, int]
+    ) -> Tuple[int, int]:
+        """Write populations (or observables) for gammas[start:stop] into arrays[0]."""
+        start, stop = index_range
+        for i in range(start, stop):
+            W = self._build_rate_matrix(gammas[i], kmw_minus, kmw_plus)
+            arrays[0][i] = self.solver.solve_expm(
+                W, P0, t_eval, method='auto', weights=weights
             )
-            results.append(result)
-        return results
+        return index_range
@@ -3,10 +3,22 @@ ODMR contrast simulations.
 """
 
 import numpy as np
-from typing import Optional, Union, Tuple
+from collections import OrderedDict
+from functools import partial
+from typing import Dict, Optional, Sequence, Tuple, Union
 from odmr_sim.models.base import RateModel
+from odmr_sim.models.compiled import MHZ_TO_HZ
 from odmr_sim.models.seven_level import SevenLevelModel
 from odmr_sim.solvers.rate_solver import RateSolver
+from odmr_sim.simulations.parallel import partition, resolve_workers, run_chunks
+
+
+# NV electron-spin gyromagnetic ratio in Hz/T
+NV_GYROMAGNETIC_RATIO = 28.024951e9
+
+# Integrated PL below this fraction of the largest possible value (every
+# emitter excited for the whole window) is rounding noise, not light
+_DARK_FRACTION = 1e-12
 
 
 class ODMRSimulation:
@@ -19,6 +31,9 @@ class ODMRSimulation:
     ----------
     model : RateModel or SevenLevelModel
         The rate equation model to use.
+    reference_cache_size : int, optional
+        Maximum number of microwave-off reference intensities (one per
+        gamma) kept between calls. Default is 256.
 
     Examples
     --------
@@ -31,10 +46,24 @@ class ODMRSimulation:
     >>> print(f"ODMR contrast: {contrast*100:.2f}%")
     """
 
-    def __init__(self, model: Union[RateModel, SevenLevelModel]):
+    def __init__(
+        self,
+        model: Union[RateModel, SevenLevelModel],
+        reference_cache_size: int = 256
+    ):
         self.model = model
         self.solver = RateSolver()
 
+        # Steady-state PL without microwave, keyed by gamma (LRU order)
+        self.reference_cache_size = reference_cache_size
+        self._reference_cache: "OrderedDict[float, float]" = OrderedDict()
+        self._reference_compiled = None
+
+    def clear_cache(self) -> None:
+        """Discard cached microwave-off reference intensities."""
+        self._reference_cache.clear()
+        self._reference_compiled = None
+
     def compute_contrast(
         self,
         gamma: float = 0.1,
@@ -64,7 +93,7 @@ class ODMRSimulation:
         method : str
             'steady_state': Use null-space steady state (t -> infinity)
             'transient': Use final ES population at t_integration
-            'time_integrated': Use trapz-integrated fluorescence over [0, t_integration]
+            'time_integrated': Use exactly integrated fluorescence over [0, t_integration]
 
         Returns
         -------
@@ -87,6 +116,123 @@ class ODMRSimulation:
         else:
             raise ValueError(f"Unknown method: {method}")
 
+    def compute_contrast_with_gradient(
+        self,
+        gamma: float = 0.1,
+        kmw_minus: float = 0.0,
+        kmw_plus: float = 0.0,
+        P0: Optional[np.ndarray] = None,
+        t_integration: float = 1e-3,
+        method: str = 'steady_state',
+        parameters: Optional[Sequence[Union[str, Tuple[int, int]]]] = None
+    ) -> Tuple[float, Dict[Union[str, Tuple[int, int]], float]]:
+        """Compute ODMR contrast and its gradient with respect to the rates.
+
+        The gradient is exact (forward-mode sensitivities), not a finite
+        difference:
+
+        - 'steady_state': the derivatives of the steady state reuse the LU
+          factorization of the normalized system, so all of them cost about
+          one extra solve.
+        - 'transient' and 'time_integrated': the whole gradient comes from
+          one adjoint matrix exponential of twice (three times, integrated)
+          the model size (see :meth:`RateSolver.solve_sensitivity`).
+
+        The PL weights depend on the radiative rates themselves; that
+        contribution is included. Where the reference emits no light
+        (e.g. gamma=0) the contrast is 0, as in :meth:`compute_contrast`,
+        and the gradient is reported as 0.
+
+        Parameters
+        ----------
+        gamma, kmw_minus, kmw_plus : float
+            Excitation and microwave rates in MHz.
+        P0 : np.ndarray, optional
+            Initial population for the time-resolved methods. Default is
+            the mixed ground state.
+        t_integration : float
+            Integration time in seconds (time-resolved methods).
+        method : str
+            'steady_state', 'transient' or 'time_integrated', as in
+            :meth:`compute_contrast`.
+        parameters : sequence, optional
+            Parameters to differentiate with respect to: dynamic parameters,
+            named fixed rates or (from_state, to_state) tuples. Default is
+            every dynamic parameter followed by every named rate
+            (gamma, kmw_minus, kmw_plus, k41, ..., k73).
+
+        Returns
+        -------
+        contrast : float
+            ODMR contrast, identical to :meth:`compute_contrast`.
+        gradient : dict
+            Parameter -> dcontrast/dparameter, per MHz.
+
+        Raises
+        ------
+        ValueError
+            For 'steady_state', if the microwave-on steady state is not
+            unique although the reference emits light.
+        """
+        if not isinstance(self.model, SevenLevelModel):
+            raise ValueError("compute_contrast requires SevenLevelModel")
+        if method not in ('steady_state', 'transient', 'time_integrated'):
+            raise ValueError(f"Unknown method: {method}")
+
+        if parameters is None:
+            parameters = self.model.compile().param_names + tuple(self.model.rate_names)
+        parameters = list(parameters)
+        zero_gradient = {name: 0.0 for name in parameters}
+
+        # A dark reference has no unique steady state to differentiate
+        if method == 'steady_state' and self._reference_intensity(gamma) == 0:
+            return 0.0, zero_gradient
+
+        dW = self.model.rate_matrix_derivatives(parameters)
+        # The microwave-off reference does not depend on the microwave rates
+        dW_nomw = dW.copy()
+        for k, name in enumerate(parameters):
+            if name in ('kmw_minus', 'kmw_plus'):
+                dW_nomw[k] = 0.0
+
+        observable = 'es_total' if method == 'transient' else 'pl'
+        weights = self.model.observable_weights([observable])[0]
+        dweights = self.model.observable_weight_derivatives(parameters, [observable])[:, 0]
+
+        W_nomw = self.model.build_rate_matrix(gamma=gamma, kmw_minus=0.0, kmw_plus=0.0)
+        W_mw = self.model.build_rate_matrix(
+            gamma=gamma, kmw_minus=kmw_minus, kmw_plus=kmw_plus
+        )
+
+        if P0 is None:
+            P0 = self.model.get_ground_state_mixed()
+
+        intensities = []
+        for W, dW_case in ((W_nomw, dW_nomw), (W_mw, dW)):
+            if method == 'steady_state':
+                P, dP = self.solver.solve_steady_state_sensitivity(W, dW_case)
+                intensities.append((weights @ P, dP @ weights + dweights @ P))
+            else:
+                I, dI = self.solver.solve_sensitivity(
+                    W, dW_case, P0, t_integration,
+                    integrated=(method == 'time_integrated'),
+                    weights=weights, dweights=dweights[:, np.newaxis]
+                )
+                intensities.append((I[0], dI[:, 0]))
+
+        (I_nomw, dI_nomw), (I_mw, dI_mw) = intensities
+        if I_nomw == 0 or (
+            method == 'time_integrated' and self._is_dark_integral(I_nomw, t_integration)
+        ):
+            return 0.0, zero_gradient
+
+        contrast = (I_nomw - I_mw) / I_nomw
+        # d(1 - I_mw/I_nomw) = (I_mw dI_nomw - I_nomw dI_mw) / I_nomw^2
+        gradient = (I_mw * dI_nomw - I_nomw * dI_mw) / I_nomw ** 2
+        return float(contrast), {
+            name: float(value) for name, value in zip(parameters, gradient)
+        }
+
     def _contrast_steady_state(
         self,
         gamma: float,
@@ -94,35 +240,89 @@ class ODMRSimulation:
         kmw_plus: float
     ) -> float:
         """Compute contrast using steady-state populations."""
-        # Without microwave
-        W_nomw = self.model.build_rate_matrix(
-            gamma=gamma, kmw_minus=0.0, kmw_plus=0.0
+        return float(self._contrast_steady_state_batch(gamma, kmw_minus, kmw_plus))
+
+    def _contrast_steady_state_batch(
+        self,
+        gamma: np.ndarray,
+        kmw_minus: np.ndarray,
+        kmw_plus: np.ndarray,
+        reference: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """Compute steady-state contrasts for broadcastable parameter arrays.
+
+        The microwave-off reference comes from the per-gamma cache unless
+        it is passed in as ``reference`` (broadcastable to the result);
+        all microwave-on rate matrices are solved together in one batch.
+        Parallel workers always receive ``reference``, so only the calling
+        thread touches the cache.
+        """
+        shape = np.broadcast_shapes(
+            np.shape(gamma), np.shape(kmw_minus), np.shape(kmw_plus)
         )
-        P_ss_nomw = self.solver.solve_steady_state(W_nomw)
+        gamma = np.broadcast_to(gamma, shape)
+
+        # Without microwave (depends on gamma only, so it is cached)
+        if reference is None:
+            I_nomw = self._reference_intensity(gamma)
+        else:
+            I_nomw = np.broadcast_to(reference, shape)
 
         # With microwave
-        W_mw = self.model.build_rate_matrix(
+        W_mw = self.model.build_rate_matrices(
             gamma=gamma, kmw_minus=kmw_minus, kmw_plus=kmw_plus
         )
-        P_ss_mw = self.solver.solve_steady_state(W_mw)
-
-        # PL intensity ∝ sum of excited state populations × radiative rates
-        # For simplicity, assume equal radiative rates
-        I_nomw = (
-            P_ss_nomw[SevenLevelModel.ES_0] * self.model.k41 +
-            P_ss_nomw[SevenLevelModel.ES_MINUS] * self.model.k52 +
-            P_ss_nomw[SevenLevelModel.ES_PLUS] * self.model.k63
-        )
-        I_mw = (
-            P_ss_mw[SevenLevelModel.ES_0] * self.model.k41 +
-            P_ss_mw[SevenLevelModel.ES_MINUS] * self.model.k52 +
-            P_ss_mw[SevenLevelModel.ES_PLUS] * self.model.k63
-        )
+        P_ss_mw = self.solver.solve_steady_state_batch(W_mw)
 
-        if I_nomw == 0:
-            return 0.0
+        I_mw = self._pl_intensity(P_ss_mw)
+
+        contrast = np.zeros(shape)
+        nonzero = I_nomw != 0
+        contrast[nonzero] = (I_nomw[nonzero] - I_mw[nonzero]) / I_nomw[nonzero]
+
+        return contrast
+
+    def _reference_intensity(self, gamma: np.ndarray) -> np.ndarray:
+        """Steady-state PL without microwave for an array of gammas.
+
+        Values are looked up in a bounded LRU cache; missing gammas are
+        solved together in one batch and added to it. The cache is reset
+        whenever the model's rates change.
+        """
+        compiled = self.model.compile()
+        if compiled is not self._reference_compiled:
+            self._reference_cache.clear()
+            self._reference_compiled = compiled
+
+        gamma = np.asarray(gamma, dtype=float)
+        unique_gammas, inverse = np.unique(gamma, return_inverse=True)
+
+        unique_gammas = [float(g) for g in unique_gammas]
+        missing = [g for g in unique_gammas if g not in self._reference_cache]
+        if missing:
+            W_nomw = self.model.build_rate_matrices(gamma=np.array(missing))
+            P_ss_nomw = self.solver.solve_steady_state_batch(W_nomw)
+            for g, intensity in zip(missing, self._pl_intensity(P_ss_nomw)):
+                self._reference_cache[g] = float(intensity)
+
+        intensities = np.empty(len(unique_gammas))
+        for i, g in enumerate(unique_gammas):
+            intensities[i] = self._reference_cache[g]
+            self._reference_cache.move_to_end(g)
+
+        while len(self._reference_cache) > self.reference_cache_size:
+            self._reference_cache.popitem(last=False)
+
+        return intensities[inverse].reshape(gamma.shape)
+
+    def _is_dark_integral(self, intensity: float, t_integration: float) -> bool:
+        """True if time-integrated PL is zero up to rounding."""
+        bound = np.max(self.model.observable_weights(['pl'])[0]) * t_integration
+        return bool(intensity <= _DARK_FRACTION * bound)
 
-        return (I_nomw - I_mw) / I_nomw
+    def _pl_intensity(self, populations: np.ndarray) -> np.ndarray:
+        """PL intensity ∝ sum of excited state populations × radiative rates."""
+        return self.model.evaluate_observables(populations, ['pl'])['pl']
 
     def _contrast_transient(
         self,
@@ -156,16 +356,9 @@ class ODMRSimulation:
         pop_mw = self.solver.solve_expm(W_mw, P0, t_eval)
 
         # Get final ES populations (at t_integration)
-        ES_nomw = (
-            pop_nomw[-1, SevenLevelModel.ES_0] +
-            pop_nomw[-1, SevenLevelModel.ES_MINUS] +
-            pop_nomw[-1, SevenLevelModel.ES_PLUS]
-        )
-        ES_mw = (
-            pop_mw[-1, SevenLevelModel.ES_0] +
-            pop_mw[-1, SevenLevelModel.ES_MINUS] +
-            pop_mw[-1, SevenLevelModel.ES_PLUS]
-        )
+        ES_nomw, ES_mw = self.model.evaluate_observables(
+            np.stack([pop_nomw[-1], pop_mw[-1]]), ['es_total']
+        )['es_total']
 
         if ES_nomw == 0:
             return 0.0
@@ -181,48 +374,40 @@ class ODMRSimulation:
         P0: Optional[np.ndarray],
         t_integration: float
     ) -> float:
-        """Compute contrast using time-integrated fluorescence."""
+        """Compute contrast using exactly time-integrated fluorescence."""
         if P0 is None:
             # Start from mixed ground state
             P0 = self.model.get_ground_state_mixed()
 
-        # Time array
-        t_eval = np.linspace(0, t_integration, 10000)
-
         # Without microwave
         W_nomw = self.model.build_rate_matrix(
             gamma=gamma, kmw_minus=0.0, kmw_plus=0.0
         )
-        pop_nomw = self.solver.solve_expm(W_nomw, P0, t_eval)
+        int_nomw = self.solver.solve_time_integrated(W_nomw, P0, t_integration)
 
         # With microwave
         W_mw = self.model.build_rate_matrix(
             gamma=gamma, kmw_minus=kmw_minus, kmw_plus=kmw_plus
         )
-        pop_mw = self.solver.solve_expm(W_mw, P0, t_eval)
-
-        # Compute time-integrated fluorescence
-        def compute_pl(populations):
-            return (
-                populations[:, SevenLevelModel.ES_0] * self.model.k41 +
-                populations[:, SevenLevelModel.ES_MINUS] * self.model.k52 +
-                populations[:, SevenLevelModel.ES_PLUS] * self.model.k63
-            )
+        int_mw = self.solver.solve_time_integrated(W_mw, P0, t_integration)
 
-        I_nomw = np.trapz(compute_pl(pop_nomw), t_eval)
-        I_mw = np.trapz(compute_pl(pop_mw), t_eval)
+        # Time-integrated fluorescence
+        I_nomw = self._pl_intensity(int_nomw)
+        I_mw = self._pl_intensity(int_mw)
 
-        if I_nomw == 0:
+        if self._is_dark_integral(I_nomw, t_integration):
             return 0.0
 
-        return (I_nomw - I_mw) / I_nomw
+        return float((I_nomw - I_mw) / I_nomw)
 
     def sweep_gamma(
         self,
         gammas: np.ndarray,
         kmw_minus: float = 0.0,
         kmw_plus: float = 0.0,
-        method: str = 'steady_state'
+        method: str = 'steady_state',
+        executor: str = 'serial',
+        n_workers: Optional[int] = None
     ) -> Tuple[np.ndarray, np.ndarray]:
         """Sweep excitation rate and compute contrast.
 
@@ -234,6 +419,13 @@ class ODMRSimulation:
             Microwave rates.
         method : str
             Contrast computation method.
+        executor : str
+            'serial', 'threads' or 'processes'. The gammas are split into
+            contiguous chunks that are evaluated by the executor and
+            reassembled in order.
+        n_workers : int, optional
+            Number of workers for 'threads' and 'processes'. Defaults to
+            the CPU count.
 
         Returns
         -------
@@ -242,11 +434,52 @@ class ODMRSimulation:
         contrasts : np.ndarray
             Computed contrasts.
         """
-        contrasts = np.array([
+        if not isinstance(self.model, SevenLevelModel):
+            raise ValueError("compute_contrast requires SevenLevelModel")
+
+        n_workers = resolve_workers(executor, n_workers)
+        gamma_array = np.asarray(gammas, dtype=float)
+        # Solve the references for all gammas before fanning out; workers
+        # get their slice instead of sharing the cache
+        if method == 'steady_state':
+            reference = self._reference_intensity(gamma_array)
+        else:
+            reference = np.zeros_like(gamma_array)
+        chunks = [
+            (gamma_array[chunk], reference[chunk])
+            for chunk in partition(len(gamma_array), n_workers)
+        ]
+
+        results = run_chunks(
+            partial(self._sweep_gamma_chunk, kmw_minus=kmw_minus,
+                    kmw_plus=kmw_plus, method=method),
+            chunks, executor=executor, n_workers=n_workers
+        )
+        contrasts = np.concatenate(results) if results else np.zeros(0)
+        return gammas, contrasts
+
+    def _sweep_gamma_chunk(
+        self,
+        chunk: Tuple[np.ndarray, np.ndarray],
+        kmw_minus: float,
+        kmw_plus: float,
+        method: str
+    ) -> np.ndarray:
+        """Contrasts for one contiguous chunk of a gamma sweep.
+
+        ``chunk`` holds the gammas and, for the steady-state method, their
+        precomputed microwave-off references.
+        """
+        gammas, reference = chunk
+        if method == 'steady_state':
+            return self._contrast_steady_state_batch(
+                gammas, kmw_minus, kmw_plus, reference=reference
+            )
+
+        return np.array([
             self.compute_contrast(gamma, kmw_minus, kmw_plus, method=method)
             for gamma in gammas
         ])
-        return gammas, contrasts
 
     def run_spectrum(
         self,
@@ -258,6 +491,10 @@ class ODMRSimulation:
         peak_freq_plus: Optional[float] = None,
         linewidth: float = 0.05,   # GHz
         kmw_amplitude: float = 1.0,  # MHz
+        frequencies: Optional[np.ndarray] = None,  # GHz
+        batch_size: int = 65536,
+        executor: str = 'serial',
+        n_workers: Optional[int] = None,
     ) -> dict:
         """Simulate ODMR spectrum.
 
@@ -282,17 +519,32 @@ class ODMRSimulation:
             Lorentzian linewidth in GHz.
         kmw_amplitude : float
             Maximum microwave rate at resonance in MHz.
+        frequencies : np.ndarray, optional
+            Explicit microwave frequencies in GHz (e.g. a non-uniform grid
+            refined around hyperfine lines). If given, freq_center,
+            freq_width and n_points only set the default peak positions.
+        batch_size : int
+            Maximum number of frequencies solved per batch, which bounds
+            the memory used by the rate-matrix stack.
+        executor : str
+            'serial', 'threads' or 'processes' for evaluating the batches.
+        n_workers : int, optional
+            Number of workers for 'threads' and 'processes'. Defaults to
+            the CPU count.
 
         Returns
         -------
         result : dict
             Dictionary with 'frequencies' and 'contrast' arrays.
         """
-        frequencies = np.linspace(
-            freq_center - freq_width,
-            freq_center + freq_width,
-            n_points
-        )
+        if frequencies is None:
+            frequencies = np.linspace(
+                freq_center - freq_width,
+                freq_center + freq_width,
+                n_points
+            )
+        else:
+            frequencies = np.asarray(frequencies, dtype=float)
 
         # Default peak positions (symmetric around center)
         if peak_freq_minus is None:
@@ -300,26 +552,36 @@ class ODMRSimulation:
         if peak_freq_plus is None:
             peak_freq_plus = freq_center + freq_width / 4
 
-        contrasts = []
-
-        for freq in frequencies:
-            # Lorentzian profiles for MW coupling efficiency
-            lorentz_minus = self._lorentzian(freq, peak_freq_minus, linewidth)
-            lorentz_plus = self._lorentzian(freq, peak_freq_plus, linewidth)
-
-            kmw_minus = kmw_amplitude * lorentz_minus
-            kmw_plus = kmw_amplitude * lorentz_plus
+        if not isinstance(self.model, SevenLevelModel):
+            raise ValueError("compute_contrast requires SevenLevelModel")
 
-            contrast = self.compute_contrast(
-                gamma=gamma,
-                kmw_minus=kmw_minus,
-                kmw_plus=kmw_plus,
-            )
-            contrasts.append(contrast)
+        # Lorentzian profiles for MW coupling efficiency, over all frequencies
+        kmw_minus = kmw_amplitude * self._lorentzian(frequencies, peak_freq_minus, linewidth)
+        kmw_plus = kmw_amplitude * self._lorentzian(frequencies, peak_freq_plus, linewidth)
+
+        n_workers = resolve_workers(executor, n_workers)
+        n_freqs = frequencies.size
+        n_chunks = max(-(-n_freqs // batch_size), n_workers)
+        chunks = [
+            (kmw_minus.ravel()[chunk], kmw_plus.ravel()[chunk])
+            for chunk in partition(n_freqs, n_chunks)
+        ]
+
+        # Solve the shared reference before fanning out and hand it to the
+        # workers, so they never touch the cache
+        reference = float(self._reference_intensity(gamma))
+
+        results = run_chunks(
+            partial(self._spectrum_chunk, gamma, reference),
+            chunks, executor=executor, n_workers=n_workers
+        )
+        contrasts = (
+            np.concatenate(results) if results else np.zeros(0)
+        ).reshape(frequencies.shape)
 
         return {
             'frequencies': frequencies,
-            'contrast': np.array(contrasts),
+            'contrast': contrasts,
             'params': {
                 'gamma': gamma,
                 'peak_freq_minus': peak_freq_minus,
@@ -329,7 +591,178 @@ class ODMRSimulation:
             }
         }
 
+    def _spectrum_chunk(
+        self,
+        gamma: float,
+        reference: float,
+        kmw: Tuple[np.ndarray, np.ndarray]
+    ) -> np.ndarray:
+        """Contrasts for one chunk of (kmw_minus, kmw_plus) spectrum points."""
+        kmw_minus, kmw_plus = kmw
+        return self._contrast_steady_state_batch(
+            gamma, kmw_minus, kmw_plus, reference=reference
+        )
+
+    def sensitivity_map(
+        self,
+        gammas: np.ndarray,
+        kmw_amplitudes: np.ndarray,
+        linewidths: np.ndarray,
+        transition: str = 'minus',
+        detunings: Optional[np.ndarray] = None,
+        collection_efficiency: float = 1.0
+    ) -> dict:
+        """Shot-noise-limited magnetic sensitivity over operating parameters.
+
+        For one Lorentzian ODMR line, kmw(f) = A / (1 + x^2) with
+        x = (f - f0) / linewidth, the detected PL rate R(f) and its slope
+
+            dR/df = dR/dkmw * dkmw/dx / linewidth
+
+        give the sensitivity of a magnetometer operated at detuning x:
+
+            η = sqrt(R) / (γ_e |dR/df|)   [T/sqrt(Hz)]
+
+        For every gamma, all (amplitude, detuning) points are solved in one
+        batched steady-state solve, with dR/dkmw from the steady-state
+        sensitivities (no finite differences). The steady state does not
+        depend on the linewidth, which only rescales the slope, so the
+        linewidth axis costs no further solves. At each grid point the
+        detuning with the smallest η is used.
+
+        Parameters
+        ----------
+        gammas : np.ndarray
+            Optical excitation rates in MHz.
+        kmw_amplitudes : np.ndarray
+            Microwave rates at resonance in MHz.
+        linewidths : np.ndarray
+            Lorentzian linewidths in GHz (as in :meth:`run_spectrum`).
+        transition : str
+            Driven spin transition, 'minus' or 'plus'.
+        detunings : np.ndarray, optional
+            Candidate operating detunings in units of the linewidth.
+            Default is 256 points from 0.01 to 30, log-spaced.
+        collection_efficiency : float
+            Fraction of emitted photons that are detected. Default is 1.
+
+        Returns
+        -------
+        result : dict
+            Dictionary containing:
+            - 'dims': ('gamma', 'kmw_amplitude', 'linewidth')
+            - 'coords': dict mapping each dim to its values
+            - 'contrast': on-resonance contrast, shape (n_gamma, n_amplitude)
+            - 'pl_rate': detected PL rate without microwave in photons/s,
+              shape (n_gamma,)
+            - 'operating_pl_rate': detected PL rate at the operating
+              detuning, shape (n_gamma, n_amplitude)
+            - 'detuning': operating detuning in GHz, full grid shape
+            - 'slope': |dR/df| at the operating detuning in photons/s per
+              Hz, full grid shape
+            - 'sensitivity': η in T/sqrt(Hz), full grid shape; inf where
+              the reference emits no light (e.g. gamma=0)
+            - 'optimum': dict with the gamma, kmw_amplitude, linewidth,
+              detuning, sensitivity, contrast, pl_rate and grid index of
+              the smallest η
+        """
+        if not isinstance(self.model, SevenLevelModel):
+            raise ValueError("sensitivity_map requires SevenLevelModel")
+        if transition not in ('minus', 'plus'):
+            raise ValueError(f"Unknown transition '{transition}' (use 'minus' or 'plus')")
+        if not 0 < collection_efficiency <= 1:
+            raise ValueError("collection_efficiency must be in (0, 1]")
+
+        gammas = np.atleast_1d(np.asarray(gammas, dtype=float))
+        amplitudes = np.atleast_1d(np.asarray(kmw_amplitudes, dtype=float))
+        linewidths = np.atleast_1d(np.asarray(linewidths, dtype=float))
+        if detunings is None:
+            detunings = np.geomspace(1e-2, 30.0, 256)
+        # x = 0 (resonance) gives the contrast; its slope is zero
+        x = np.concatenate([[0.0], np.abs(np.asarray(detunings, dtype=float))])
+
+        param = f'kmw_{transition}'
+        dW = self.model.rate_matrix_derivatives([param])
+        weights = (self.model.observable_weights(['pl'])[0]
+                   * MHZ_TO_HZ * collection_efficiency)
+
+        profile = 1.0 / (1.0 + x ** 2)
+        dprofile = -2.0 * x / (1.0 + x ** 2) ** 2
+        kmw = amplitudes[:, np.newaxis] * profile
+
+        n_g, n_a = len(gammas), len(amplitudes)
+        contrast = np.zeros((n_g, n_a))
+        operating_rate = np.zeros((n_g, n_a))
+        operating_x = np.zeros((n_g, n_a))
+        slope_x = np.zeros((n_g, n_a))
+        pl_rate = self._reference_intensity(gammas) * MHZ_TO_HZ * collection_efficiency
+        # Without light (e.g. gamma=0) there is no unique steady state and
+        # no signal; these points get η = inf
+        dark = pl_rate <= 0
+
+        for i, gamma in enumerate(gammas):
+            if dark[i]:
+                continue
+            W = self.model.build_rate_matrices(gamma=gamma, **{param: kmw})
+            P, dP = self.solver.solve_steady_state_sensitivity(W, dW)
+            rate = P @ weights
+            drate_dx = (dP[..., 0, :] @ weights) * amplitudes[:, np.newaxis] * dprofile
+
+            # Figure of merit |dR/dx| / sqrt(R); maximal where η is minimal
+            merit = np.abs(drate_dx[:, 1:]) / np.sqrt(np.maximum(rate[:, 1:], 1e-300))
+            best = np.argmax(merit, axis=1) + 1
+            rows = np.arange(n_a)
+
+            contrast[i] = 1.0 - rate[:, 0] / pl_rate[i]
+            operating_rate[i] = rate[rows, best]
+            operating_x[i] = x[best]
+            slope_x[i] = np.abs(drate_dx[rows, best])
+
+        # Linewidth (GHz) only rescales the frequency axis
+        linewidth_hz = linewidths * 1e9
+        slope = slope_x[..., np.newaxis] / linewidth_hz
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sensitivity = (np.sqrt(operating_rate)[..., np.newaxis]
+                           / (NV_GYROMAGNETIC_RATIO * slope))
+        sensitivity[dark] = np.inf
+
+        index = np.unravel_index(np.nanargmin(sensitivity), sensitivity.shape)
+        optimum = {
+            'gamma': gammas[index[0]],
+            'kmw_amplitude': amplitudes[index[1]],
+            'linewidth': linewidths[index[2]],
+            'detuning': operating_x[index[:2]] * linewidths[index[2]],
+            'sensitivity': sensitivity[index],
+            'contrast': contrast[index[:2]],
+            'pl_rate': pl_rate[index[0]],
+            'index': tuple(int(i) for i in index),
+        }
+
+        return {
+            'dims': ('gamma', 'kmw_amplitude', 'linewidth'),
+            'coords': {
+                'gamma': gammas,
+                'kmw_amplitude': amplitudes,
+                'linewidth': linewidths,
+            },
+            'contrast': contrast,
+            'pl_rate': pl_rate,
+            'operating_pl_rate': operating_rate,
+            'detuning': operating_x[..., np.newaxis] * linewidths,
+            'slope': slope,
+            'sensitivity': sensitivity,
+            'optimum': optimum,
+            'params': {
+                'transition': transition,
+                'collection_efficiency': collection_efficiency,
+            },
+        }
+
     @staticmethod
-    def _lorentzian(x: float, x0: float, gamma: float) -> float:
-        """Lorentzian function normalized to peak = 1."""
+    def _lorentzian(
+        x: Union[float, np.ndarray],
+        x0: float,
+        gamma: float
+    ) -> Union[float, np.ndarray]:
+        """Lorentzian function normalized to peak = 1 (elementwise on arrays)."""
         return gamma**2 / ((x - x0)**2 + gamma**2)
@@ -0,0 +1,395 @@
+"""
+Executors for running sweep chunks serially, on threads or on processes.
+
+Each sweep splits its points into contiguous chunks, evaluates the chunks
+with the chosen executor and reassembles the results in chunk order, so
+the output does not depend on the executor or the number of workers.
+
+Large outputs can instead be written by the workers directly into shared
+buffers (see fill_chunks), so that only small status values travel back
+through the process pool. Outputs allocated with shared_outputs are
+written in place, without a full-size copy in the parent.
+"""
+
+import multiprocessing
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+from multiprocessing import shared_memory
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+EXECUTORS = ('serial', 'threads', 'processes')
+
+# RAM-backed directory for temporary output files, where the OS has one
+_SHARED_TMPDIR = '/dev/shm' if os.path.isdir('/dev/shm') else None
+
+# Environment variables read by common BLAS/OpenMP runtimes at start-up
+_BLAS_THREAD_VARS = (
+    'OMP_NUM_THREADS',
+    'OPENBLAS_NUM_THREADS',
+    'MKL_NUM_THREADS',
+    'BLIS_NUM_THREADS',
+    'VECLIB_MAXIMUM_THREADS',
+    'NUMEXPR_NUM_THREADS',
+)
+
+
+def partition(n_items: int, n_chunks: int) -> List[slice]:
+    """Split range(n_items) into at most n_chunks contiguous slices.
+
+    Parameters
+    ----------
+    n_items : int
+        Number of items to split.
+    n_chunks : int
+        Maximum number of chunks.
+
+    Returns
+    -------
+    chunks : list of slice
+        Contiguous, non-empty slices covering range(n_items) in order.
+    """
+    n_chunks = max(1, min(n_chunks, n_items))
+    bounds = np.linspace(0, n_items, n_chunks + 1).astype(int)
+    return [
+        slice(start, stop)
+        for start, stop in zip(bounds[:-1], bounds[1:]) if stop > start
+    ]
+
+
+def resolve_workers(executor: str, n_workers: Optional[int]) -> int:
+    """Validate the executor name and return the number of workers to use.
+
+    Parameters
+    ----------
+    executor : str
+        'serial', 'threads' or 'processes'.
+    n_workers : int, optional
+        Requested number of workers. Defaults to the CPU count.
+
+    Returns
+    -------
+    n_workers : int
+        1 for the serial executor, otherwise the resolved worker count.
+    """
+    if executor not in EXECUTORS:
+        raise ValueError(
+            f"Unknown executor '{executor}'. Available: {', '.join(EXECUTORS)}"
+        )
+    if executor == 'serial':
+        return 1
+    if n_workers is None:
+        n_workers = os.cpu_count() or 1
+    if n_workers < 1:
+        raise ValueError("n_workers must be at least 1")
+    return n_workers
+
+
+def run_chunks(
+    func: Callable,
+    chunks: Sequence,
+    executor: str = 'serial',
+    n_workers: Optional[int] = None,
+    blas_threads: int = 1
+) -> list:
+    """Evaluate func on every chunk and return the results in chunk order.
+
+    Parameters
+    ----------
+    func : callable
+        Function of one argument. For the 'processes' executor it must be
+        picklable (a module-level function or a bound method of a
+        picklable object).
+    chunks : sequence
+        Arguments passed to func, one call per element.
+    executor : str
+        'serial': Evaluate in the calling thread.
+        'threads': Evaluate on a thread pool.
+        'processes': Evaluate on a pool of spawned processes; scripts
+        using it need an ``if __name__ == '__main__':`` guard.
+    n_workers : int, optional
+        Number of workers. Defaults to the CPU count.
+    blas_threads : int
+        Number of BLAS threads per worker, to avoid oversubscribing the
+        machine when many workers each call LAPACK. Default is 1.
+
+    Returns
+    -------
+    results : list
+        func(chunk) for every chunk, in the order of chunks.
+    """
+    n_workers = resolve_workers(executor, n_workers)
+
+    if executor == 'serial' or len(chunks) <= 1:
+        return [func(chunk) for chunk in chunks]
+
+    with _limit_blas_threads(blas_threads):
+        if executor == 'threads':
+            with ThreadPoolExecutor(max_workers=n_workers) as pool:
+                return list(pool.map(func, chunks))
+
+        # Spawned workers start a fresh interpreter, so they load BLAS with
+        # the limits above already in their environment; forked workers
+        # would inherit thread pools sized before the limits were set
+        with ProcessPoolExecutor(
+            max_workers=n_workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(blas_threads,)
+        ) as pool:
+            return list(pool.map(func, chunks))
+
+
+def fill_chunks(
+    func: Callable,
+    chunks: Sequence,
+    outs: Sequence[np.ndarray],
+    executor: str = 'serial',
+    n_workers: Optional[int] = None,
+    blas_threads: int = 1
+) -> list:
+    """Let func write each chunk's results directly into output arrays.
+
+    func is called as func(arrays, chunk) and must write its results into
+    the arrays (e.g. arrays[0][start:stop] = ...), returning only a small
+    status value. With the 'processes' executor the workers attach to the
+    output buffers instead of pickling results back to the parent:
+
+    - an np.memmap output (e.g. from :func:`shared_outputs`) is reopened
+      by file name in each worker and written in place;
+    - any other output is backed by a multiprocessing.shared_memory block
+      for the duration of the call and copied into the array once at the
+      end, so peak memory holds two full-size copies of it.
+
+    Parameters
+    ----------
+    func : callable
+        Function of (arrays, chunk). Must be picklable for 'processes'.
+    chunks : sequence
+        Chunk descriptors (e.g. (start, stop) ranges), one call per element.
+    outs : sequence of np.ndarray
+        Preallocated, C-contiguous output arrays.
+    executor : str
+        'serial', 'threads' or 'processes'.
+    n_workers : int, optional
+        Number of workers. Defaults to the CPU count.
+    blas_threads : int
+        Number of BLAS threads per worker. Default is 1.
+
+    Returns
+    -------
+    statuses : list
+        func's return value for every chunk, in chunk order.
+    """
+    n_workers = resolve_workers(executor, n_workers)
+
+    if executor != 'processes' or len(chunks) <= 1:
+        return run_chunks(
+            partial(func, list(outs)), chunks,
+            executor=executor, n_workers=n_workers, blas_threads=blas_threads
+        )
+
+    buffers = [SharedArray.for_output(out) for out in outs]
+    try:
+        handles = [buffer.handle for buffer in buffers]
+        statuses = run_chunks(
+            partial(_fill_in_worker, func, handles), chunks,
+            executor=executor, n_workers=n_workers, blas_threads=blas_threads
+        )
+        for out, buffer in zip(outs, buffers):
+            if buffer.is_shared_memory:
+                out[...] = buffer.array
+            else:
+                buffer.array.flush()
+    finally:
+        for buffer in buffers:
+            buffer.release()
+
+    return statuses
+
+
+@contextmanager
+def shared_outputs(
+    shapes: Sequence[Tuple[int, ...]],
+    executor: str,
+    n_chunks: int,
+    dtype=float
+):
+    """Allocate output arrays that fill_chunks can share without copying.
+
+    With the 'processes' executor and more than one chunk, every array is
+    an np.memmap of a temporary file (in /dev/shm where available), which
+    the workers write in place. The files are removed on exit; the mappings
+    stay valid for as long as the arrays are referenced (on Windows, where
+    mapped files cannot be removed, the files are left to the OS temporary
+    directory). Otherwise the arrays are plain np.empty arrays.
+
+    Parameters
+    ----------
+    shapes : sequence of tuple
+        Shape of every output array.
+    executor : str
+        'serial', 'threads' or 'processes'.
+    n_chunks : int
+        Number of chunks that will be passed to fill_chunks.
+    dtype : data-type
+        Data type of the arrays. Default is float64.
+
+    Yields
+    ------
+    arrays : list of np.ndarray
+        One C-contiguous array per shape.
+    """
+    if executor != 'processes' or n_chunks <= 1:
+        yield [np.empty(shape, dtype=dtype) for shape in shapes]
+        return
+
+    paths = []
+    try:
+        arrays = []
+        for shape in shapes:
+            if int(np.prod(shape)) == 0:
+                arrays.append(np.empty(shape, dtype=dtype))
+                continue
+            fd, path = tempfile.mkstemp(
+                prefix='odmr_sim_', suffix='.dat', dir=_SHARED_TMPDIR
+            )
+            os.close(fd)
+            paths.append(path)
+            arrays.append(np.memmap(path, dtype=dtype, mode='w+', shape=shape))
+        yield arrays
+    finally:
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+class SharedArray:
+    """Output buffer that worker processes can attach to by handle.
+
+    Use :meth:`for_output` to wrap a preallocated array and :meth:`attach`
+    in the worker to get a writable view of the same memory.
+
+    Attributes
+    ----------
+    array : np.ndarray
+        Parent-side view of the buffer.
+    handle : tuple
+        Picklable description used by workers to attach.
+    is_shared_memory : bool
+        True if backed by multiprocessing.shared_memory (results must be
+        copied out), False if backed by the output's own memory-mapped file.
+    """
+
+    def __init__(self, array: np.ndarray, handle: Tuple, shm=None):
+        self.array = array
+        self.handle = handle
+        self.is_shared_memory = shm is not None
+        self._shm = shm
+
+    @classmethod
+    def for_output(cls, out: np.ndarray) -> "SharedArray":
+        """Wrap an output array in a buffer that workers can attach to."""
+        if isinstance(out, np.memmap) and out.filename and out.flags.c_contiguous:
+            base = out
+            while isinstance(base.base, np.memmap):
+                base = base.base
+            if base is out:
+                handle = ('memmap', out.filename, out.dtype.str, out.shape, out.offset)
+                return cls(out, handle)
+
+        shm = shared_memory.SharedMemory(create=True, size=max(out.nbytes, 1))
+        array = np.ndarray(out.shape, dtype=out.dtype, buffer=shm.buf)
+        handle = ('shm', shm.name, out.dtype.str, out.shape, 0)
+        return cls(array, handle, shm)
+
+    @staticmethod
+    def attach(handle: Tuple):
+        """Attach to a buffer in a worker; returns (array, keep_alive)."""
+        kind, name, dtype, shape, offset = handle
+        if kind == 'memmap':
+            array = np.memmap(name, dtype=dtype, mode='r+', shape=shape, offset=offset)
+            return array, None
+        shm = shared_memory.SharedMemory(name=name)
+        return np.ndarray(shape, dtype=dtype, buffer=shm.buf), shm
+
+    def release(self) -> None:
+        """Free the shared-memory block, if any."""
+        if self._shm is not None:
+            self.array = None
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+
+def _fill_in_worker(func: Callable, handles: Sequence[Tuple], chunk):
+    """Attach to the shared outputs in a worker process and run func."""
+    arrays = []
+    blocks = []
+    for handle in handles:
+        array, shm = SharedArray.attach(handle)
+        arrays.append(array)
+        blocks.append(shm)
+
+    try:
+        return func(arrays, chunk)
+    finally:
+        for array in arrays:
+            if isinstance(array, np.memmap):
+                array.flush()
+        # Views must be dropped before the shared-memory blocks can close
+        arrays.clear()
+        for shm in blocks:
+            if shm is not None:
+                shm.close()
+
+
+def _init_worker(blas_threads: int) -> None:
+    """Limit BLAS threads in a worker process with threadpoolctl, if installed.
+
+    The environment variables are already set when the worker is spawned;
+    this also covers BLAS builds that ignore them.
+    """
+    _set_threadpool_limits(blas_threads)
+
+
+@contextmanager
+def _limit_blas_threads(blas_threads: int):
+    """Temporarily limit BLAS threads for this process and its children.
+
+    The environment variables are inherited by spawned worker processes and
+    take effect when they load BLAS; they do not affect libraries already
+    loaded in this process. threadpoolctl, if installed, also limits those,
+    which covers thread workers.
+    """
+    saved = {var: os.environ.get(var) for var in _BLAS_THREAD_VARS}
+    for var in _BLAS_THREAD_VARS:
+        os.environ[var] = str(blas_threads)
+
+    limiter = _set_threadpool_limits(blas_threads)
+    try:
+        yield
+    finally:
+        if limiter is not None:
+            limiter.restore_original_limits()
+        for var, value in saved.items():
+            if value is None:
+                os.environ.pop(var, None)
+            else:
+                os.environ[var] = value
+
+
+def _set_threadpool_limits(blas_threads: int):
+    """Limit loaded BLAS thread pools with threadpoolctl, if it is installed."""
+    try:
+        from threadpoolctl import threadpool_limits
+    except ImportError:
+        return None
+    return threadpool_limits(limits=blas_threads, user_api='blas')
@@ -0,0 +1,381 @@
+"""
+Pulse-sequence simulations with piecewise-constant drive.
+"""
+
+import numpy as np
+from collections import OrderedDict
+from typing import Optional, Sequence, Tuple, Union
+from odmr_sim.models.base import RateModel
+from odmr_sim.models.compiled import MHZ_TO_HZ
+from odmr_sim.models.seven_level import SevenLevelModel
+from odmr_sim.solvers.rate_solver import RateSolver
+
+
+class PulseSegment:
+    """One segment of a pulse sequence with constant optical and MW drive.
+
+    Parameters
+    ----------
+    duration : float
+        Segment length in seconds.
+    gamma : float
+        Optical excitation rate in MHz (0 for a dark segment).
+    kmw_minus : float
+        Microwave rate for |0> <-> |-> in MHz.
+    kmw_plus : float
+        Microwave rate for |0> <-> |+> in MHz.
+    gate : bool
+        If True, photons emitted during this segment are counted in the
+        gated PL of the sequence (e.g. the readout window).
+    n_points : int
+        Number of equally spaced time points recorded in the segment when
+        a time trace is requested. Default is 50.
+    label : str, optional
+        Name of the segment, e.g. 'init', 'wait', 'mw', 'readout'.
+    **params : float
+        Further dynamic parameters of generic rate models, in MHz.
+
+    Examples
+    --------
+    >>> sequence = [
+    ...     PulseSegment(3e-6, gamma=1.0, label='init'),
+    ...     PulseSegment(1e-6, label='wait'),
+    ...     PulseSegment(1e-7, kmw_minus=5.0, label='mw'),
+    ...     PulseSegment(3e-7, gamma=1.0, gate=True, label='readout'),
+    ... ]
+    """
+
+    def __init__(
+        self,
+        duration: float,
+        gamma: float = 0.0,
+        kmw_minus: float = 0.0,
+        kmw_plus: float = 0.0,
+        gate: bool = False,
+        n_points: int = 50,
+        label: Optional[str] = None,
+        **params
+    ):
+        if duration < 0:
+            raise ValueError(f"duration must be non-negative, got {duration}")
+        if n_points < 1:
+            raise ValueError(f"n_points must be at least 1, got {n_points}")
+
+        self.duration = float(duration)
+        self.params = {
+            'gamma': float(gamma),
+            'kmw_minus': float(kmw_minus),
+            'kmw_plus': float(kmw_plus),
+        }
+        self.params.update({name: float(value) for name, value in params.items()})
+        self.gate = gate
+        self.n_points = n_points
+        self.label = label
+
+    @property
+    def key(self) -> Tuple:
+        """Hashable description of the segment's drive parameters."""
+        return tuple(sorted(self.params.items()))
+
+    def __repr__(self) -> str:
+        drive = ", ".join(f"{k}={v}" for k, v in self.params.items() if v != 0)
+        label = f"'{self.label}', " if self.label else ""
+        gate = ", gate=True" if self.gate else ""
+        return f"PulseSegment({label}{self.duration:g} s{', ' + drive if drive else ''}{gate})"
+
+
+class PulseSequenceSimulation:
+    """Simulation of repeated pulse sequences (init, wait, MW, readout, ...).
+
+    Every segment has a constant rate matrix, so its evolution is a
+    matrix exponential. The propagators are augmented with the PL weight
+    vector (see :meth:`RateSolver.propagator`) so that products of them
+    also accumulate the emitted photons, and are cached by (segment
+    parameters, duration, PL weights). A repeated sequence therefore costs one matrix
+    exponential per distinct segment and then only matrix-vector products.
+
+    Parameters
+    ----------
+    model : RateModel or SevenLevelModel
+        The rate equation model to use.
+    pl_weights : np.ndarray, optional
+        Photon emission rate per unit population of each state, in MHz.
+        Defaults to the model's 'pl' observable (the radiative rates for
+        SevenLevelModel); models without either report no PL.
+    cache_size : int, optional
+        Maximum number of segment propagators kept between calls.
+        Default is 256.
+
+    Examples
+    --------
+    >>> from odmr_sim.models import SevenLevelModel
+    >>> from odmr_sim.simulations import PulseSegment, PulseSequenceSimulation
+    >>>
+    >>> sim = PulseSequenceSimulation(SevenLevelModel())
+    >>> result = sim.run(sequence, n_repeats=10)
+    >>> result['gated_counts'][-1]   # photons per emitter, last repetition
+    """
+
+    def __init__(
+        self,
+        model: Union[RateModel, SevenLevelModel],
+        pl_weights: Optional[np.ndarray] = None,
+        cache_size: int = 256
+    ):
+        self.model = model
+        self.solver = RateSolver()
+        self.pl_weights = pl_weights
+
+        # Augmented segment propagators keyed by (params, duration, PL
+        # weights), LRU order
+        self.cache_size = cache_size
+        self._propagators: "OrderedDict[Tuple, np.ndarray]" = OrderedDict()
+        self._propagator_compiled = None
+
+    def clear_cache(self) -> None:
+        """Discard cached segment propagators."""
+        self._propagators.clear()
+        self._propagator_compiled = None
+
+    def run(
+        self,
+        segments: Sequence[PulseSegment],
+        P0: Optional[np.ndarray] = None,
+        n_repeats: int = 1,
+        return_trace: bool = True
+    ) -> dict:
+        """Run a pulse sequence, optionally repeated.
+
+        Parameters
+        ----------
+        segments : sequence of PulseSegment
+            The segments of one repetition, in order.
+        P0 : np.ndarray, optional
+            Initial population. If None, uses the mixed ground state for
+            SevenLevelModel or equal population for generic RateModel.
+        n_repeats : int
+            Number of back-to-back repetitions of the sequence.
+        return_trace : bool
+            If True, record populations and PL at every segment's time
+            points. If False, only whole-segment propagators are applied.
+
+        Returns
+        -------
+        result : dict
+            Dictionary containing:
+            - 't': time array in seconds, starting at 0 (if return_trace)
+            - 't_ns': time array in nanoseconds (if return_trace)
+            - 'populations': population array (n_times, n_states) (if return_trace)
+            - 'pl': PL rate in photons/s at each time (if return_trace)
+            - 'segment_index', 'repeat_index': segment and repetition of
+              each time point (if return_trace)
+            - 'segment_counts': photons emitted per segment, shape
+              (n_repeats, n_segments)
+            - 'gated_counts': photons emitted in gated segments, shape
+              (n_repeats,)
+            - 'final_state': populations at the end of the last repetition
+            - 'cycle_states': populations at the start of every repetition
+              and at the end, shape (n_repeats + 1, n_states)
+            - 'labels': state labels
+            - 'params': simulation parameters
+            PL entries are None for generic models without pl_weights.
+        """
+        segments = list(segments)
+        if not segments:
+            raise ValueError("segments must contain at least one PulseSegment")
+        if n_repeats < 1:
+            raise ValueError(f"n_repeats must be at least 1, got {n_repeats}")
+
+        n_states = self.model.n_states
+        weights = self._weights()
+        has_pl = weights is not None
+
+        if P0 is None:
+            P0 = self.model.get_default_initial_state()
+        state = np.zeros(n_states + 1)
+        state[:n_states] = P0
+
+        segment_counts = np.zeros((n_repeats, len(segments)))
+        cycle_states = np.zeros((n_repeats + 1, n_states))
+        cycle_states[0] = state[:n_states]
+        if return_trace:
+            n_times = 1 + n_repeats * sum(seg.n_points for seg in segments)
+            t = np.zeros(n_times)
+            trace = np.zeros((n_times, n_states + 1))
+            segment_index = np.zeros(n_times, dtype=int)
+            repeat_index = np.zeros(n_times, dtype=int)
+            trace[0] = state
+
+        i = 1
+        t_start = 0.0
+        for r in range(n_repeats):
+            for s, segment in enumerate(segments):
+                counts_before = state[-1]
+                if return_trace:
+                    dt = segment.duration / segment.n_points
+                    U_step = self._propagator(segment, dt)
+                    for k in range(1, segment.n_points + 1):
+                        state = U_step @ state
+                        t[i] = t_start + k * dt
+                        trace[i] = state
+                        segment_index[i] = s
+                        repeat_index[i] = r
+                        i += 1
+                else:
+                    state = self._propagator(segment, segment.duration) @ state
+                segment_counts[r, s] = state[-1] - counts_before
+                t_start += segment.duration
+            cycle_states[r + 1] = state[:n_states]
+
+        gate = np.array([segment.gate for segment in segments])
+        result = {
+            'segment_counts': segment_counts if has_pl else None,
+            'gated_counts': segment_counts[:, gate].sum(axis=1) if has_pl else None,
+            'final_state': state[:n_states],
+            'cycle_states': cycle_states,
+            'labels': self.model.state_labels,
+            'params': {
+                'segments': segments,
+                'n_repeats': n_repeats,
+                'P0': P0,
+            }
+        }
+        if return_trace:
+            populations = trace[:, :n_states]
+            result.update({
+                't': t,
+                't_ns': t * 1e9,
+                'populations': populations,
+                'pl': populations @ weights if has_pl else None,
+                'segment_index': segment_index,
+                'repeat_index': repeat_index,
+            })
+        return result
+
+    def run_periodic(
+        self,
+        segments: Sequence[PulseSegment],
+        n_convergence_cycles: int = 0,
+        P0: Optional[np.ndarray] = None,
+        return_trace: bool = False
+    ) -> dict:
+        """Periodic steady state of an endlessly repeated pulse sequence.
+
+        Instead of evolving through many repetitions, the one-period
+        propagator U_cycle is formed once and its fixed point
+        P = U_cycle @ P with sum(P) = 1 is solved for directly. The
+        columns of U_cycle sum to one, so U_cycle - I is a valid rate
+        matrix and the fixed point is its steady state. The result is the
+        exact limit of infinitely many repetitions.
+
+        Parameters
+        ----------
+        segments : sequence of PulseSegment
+            The segments of one repetition, in order.
+        n_convergence_cycles : int
+            If > 0, also evolve P0 through this many cycles and return
+            the approach to the periodic steady state.
+        P0 : np.ndarray, optional
+            Initial population for the convergence trajectory. If None,
+            uses the model's default initial state.
+        return_trace : bool
+            If True, include the time trace of one cycle in the periodic
+            steady state (as returned by :meth:`run`).
+
+        Returns
+        -------
+        result : dict
+            Dictionary containing:
+            - 'populations': periodic steady state at the start of a cycle
+            - 'segment_counts': photons emitted per segment and cycle
+            - 'gated_counts': photons emitted in gated segments per cycle
+            - 'relaxation_factor': magnitude of the second-largest
+              eigenvalue of U_cycle; the distance to the periodic steady
+              state shrinks by about this factor every cycle
+            - 'convergence': run() result for the first n_convergence_cycles
+              cycles from P0, whose 'cycle_states' and 'gated_counts' show
+              the approach to the periodic steady state (if requested)
+            - 'trace': run() result for one cycle from the periodic steady
+              state (if return_trace)
+            - 'labels': state labels
+        """
+        segments = list(segments)
+        if not segments:
+            raise ValueError("segments must contain at least one PulseSegment")
+        if n_convergence_cycles < 0:
+            raise ValueError("n_convergence_cycles must be non-negative")
+
+        n_states = self.model.n_states
+        U_cycle = self.cycle_propagator(segments)[:n_states, :n_states]
+        P_periodic = self.solver.solve_steady_state(U_cycle - np.eye(n_states))
+
+        moduli = np.sort(np.abs(np.linalg.eigvals(U_cycle)))
+        relaxation_factor = float(moduli[-2]) if n_states > 1 else 0.0
+
+        cycle = self.run(segments, P0=P_periodic, return_trace=return_trace)
+        result = {
+            'populations': P_periodic,
+            'segment_counts': None,
+            'gated_counts': None,
+            'relaxation_factor': relaxation_factor,
+            'labels': self.model.state_labels,
+        }
+        if cycle['segment_counts'] is not None:
+            result['segment_counts'] = cycle['segment_counts'][0]
+            result['gated_counts'] = float(cycle['gated_counts'][0])
+        if return_trace:
+            result['trace'] = cycle
+        if n_convergence_cycles > 0:
+            result['convergence'] = self.run(
+                segments, P0=P0, n_repeats=n_convergence_cycles, return_trace=False
+            )
+        return result
+
+    def cycle_propagator(self, segments: Sequence[PulseSegment]) -> np.ndarray:
+        """Augmented propagator of one full repetition of the sequence.
+
+        Returns
+        -------
+        U_cycle : np.ndarray
+            Product of the segment propagators with shape
+            (n_states + 1, n_states + 1). Its last row accumulates the
+            photons emitted in the cycle (zero for models without PL).
+        """
+        U_cycle = np.eye(self.model.n_states + 1)
+        for segment in segments:
+            U_cycle = self._propagator(segment, segment.duration) @ U_cycle
+        return U_cycle
+
+    def _propagator(self, segment: PulseSegment, duration: float) -> np.ndarray:
+        """Cached augmented propagator of a segment over `duration` seconds."""
+        compiled = self.model.compile()
+        if compiled is not self._propagator_compiled:
+            self._propagators.clear()
+            self._propagator_compiled = compiled
+
+        weights = self._weights()
+        if weights is None:
+            weights = np.zeros(self.model.n_states)
+        # The weights are part of the key: pl_weights may be reassigned or
+        # edited in place between calls
+        key = (segment.key, float(duration), weights.tobytes())
+        U = self._propagators.get(key)
+        if U is not None:
+            self._propagators.move_to_end(key)
+            return U
+
+        W = compiled.build(**segment.params)
+        U = self.solver.propagator(W, duration, weights=weights)
+
+        self._propagators[key] = U
+        while len(self._propagators) > self.cache_size:
+            self._propagators.popitem(last=False)
+        return U
+
+    def _weights(self) -> Optional[np.ndarray]:
+        """Photon emission rate per unit population, in 1/s."""
+        if self.pl_weights is not None:
+            return np.asarray(self.pl_weights, dtype=float) * MHZ_TO_HZ
+        if 'pl' in self.model.observables:
+            return self.model.observable_weights(['pl'])[0] * MHZ_TO_HZ
+        return None
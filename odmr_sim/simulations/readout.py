@@ -3,8 +3,9 @@ Optical readout simulations.
 """
 
 import numpy as np
-from typing import Optional, List, Union, Dict
+from typing import Optional, List, Sequence, Union, Dict
 from odmr_sim.models.base import RateModel
+from odmr_sim.models.compiled import MHZ_TO_HZ
 from odmr_sim.models.seven_level import SevenLevelModel
 from odmr_sim.solvers.rate_solver import RateSolver
 
@@ -43,6 +44,7 @@ class ReadoutSimulation:
         t_min: float = 0.0,
         n_points: int = 1000,
         use_log_time: bool = False,
+        observables: Optional[Sequence[str]] = None,
         **model_kwargs
     ) -> dict:
         """Run readout simulation from a specific initial state.
@@ -64,6 +66,10 @@ class ReadoutSimulation:
             Number of time points.
         use_log_time : bool
             If True, use logarithmic time spacing.
+        observables : sequence of str, optional
+            Names of model observables (e.g. ['pl', 'es_total']) to
+            evaluate instead of the populations. They are projected during
+            the propagation, so memory scales with n_points * n_observables.
         **model_kwargs
             Additional keyword arguments for model.build_rate_matrix().
 
@@ -73,7 +79,10 @@ class ReadoutSimulation:
             Dictionary containing:
             - 't': time array in seconds
             - 't_ns': time array in nanoseconds
-            - 'populations': population array
+            - 'populations': population array, or None if observables are
+              requested
+            - 'observables': dict of observable name -> (n_times,) array
+              (if observables are requested)
             - 'es_total': total excited state population (if applicable)
             - 'initial_state': the initial state used
         """
@@ -97,18 +106,26 @@ class ReadoutSimulation:
             t_eval = np.linspace(t_min, t_max, n_points)
 
         # Solve
-        populations = self.solver.solve_expm(W, P0, t_eval)
+        if observables is not None:
+            weights = self.model.observable_weights(observables)
+            values = self.solver.solve_expm(W, P0, t_eval, method='auto', weights=weights)
+            populations = None
+            observable_values = {
+                name: values[:, i] for i, name in enumerate(observables)
+            }
+            es_total = observable_values.get('es_total')
+        else:
+            populations = self.solver.solve_expm(W, P0, t_eval, method='auto')
+            observable_values = None
 
-        # Calculate excited state total (for 7-level model)
-        es_total = None
-        if isinstance(self.model, SevenLevelModel):
-            es_total = (
-                populations[:, SevenLevelModel.ES_0] +
-                populations[:, SevenLevelModel.ES_MINUS] +
-                populations[:, SevenLevelModel.ES_PLUS]
-            )
+            # Excited state total (for models that declare it)
+            es_total = None
+            if 'es_total' in self.model.observables:
+                es_total = self.model.evaluate_observables(
+                    populations, ['es_total']
+                )['es_total']
 
-        return {
+        result = {
             't': t_eval,
             't_ns': t_eval * 1e9,
             'populations': populations,
@@ -120,6 +137,9 @@ class ReadoutSimulation:
                 'P0': P0,
             }
         }
+        if observable_values is not None:
+            result['observables'] = observable_values
+        return result
 
     def run_comparison(
         self,
@@ -152,6 +172,152 @@ class ReadoutSimulation:
 
         return results
 
+    def cumulative_pl(
+        self,
+        t_eval: np.ndarray,
+        initial_states: Sequence[Union[str, int, np.ndarray]],
+        gamma: float = 12.8,
+        **model_kwargs
+    ) -> np.ndarray:
+        """Integrated PL photons from t = 0 to every time point, for many initial states.
+
+        The photon count is linear in the initial state, N(t) = c(t) @ P0
+        with c(t) = w @ ∫₀ᵗ exp(W s) ds. The row c(t) is propagated once
+        for all initial states, as the adjoint system
+
+            d/dt [u; c] = [[W^T, 0], [I, 0]] [u; c],    u(0) = w,  c(0) = 0
+
+        so the prefix integrals are exact and need no quadrature.
+
+        Parameters
+        ----------
+        t_eval : np.ndarray
+            Time points in seconds.
+        initial_states : sequence
+            Initial states as accepted by :meth:`run`.
+        gamma : float
+            Optical excitation rate in MHz.
+        **model_kwargs
+            Additional keyword arguments for model.build_rate_matrix()
+            (non-SevenLevelModel models only).
+
+        Returns
+        -------
+        cumulative : np.ndarray
+            Emitted photons with shape (n_times, n_initial_states).
+        """
+        if 'pl' not in self.model.observables:
+            raise ValueError("cumulative_pl requires a model with a 'pl' observable")
+
+        if isinstance(self.model, SevenLevelModel):
+            W = self.model.build_rate_matrix(gamma=gamma, kmw_minus=0.0, kmw_plus=0.0)
+        else:
+            W = self.model.build_rate_matrix(gamma=gamma, **model_kwargs)
+        weights = self.model.observable_weights(['pl'])[0] * MHZ_TO_HZ
+        P0 = np.stack([self._parse_initial_state(state) for state in initial_states])
+
+        n_states = self.model.n_states
+        adjoint = np.zeros((2 * n_states, 2 * n_states))
+        adjoint[:n_states, :n_states] = W.T
+        adjoint[n_states:, :n_states] = np.eye(n_states)
+        start = np.concatenate([weights, np.zeros(n_states)])
+        integral_rows = np.hstack([np.zeros((n_states, n_states)), np.eye(n_states)])
+
+        c = self.solver.solve_expm(
+            adjoint, start, np.asarray(t_eval, dtype=float),
+            method='auto', weights=integral_rows
+        )
+        return c @ P0.T
+
+    def optimize_window(
+        self,
+        gamma: float = 12.8,
+        t_max: float = 1e-6,
+        n_points: int = 500,
+        bright_state: Union[str, int, np.ndarray] = 'gs0',
+        dark_state: Union[str, int, np.ndarray] = 'gs_minus',
+        collection_efficiency: float = 1.0,
+        **model_kwargs
+    ) -> dict:
+        """Find the readout window with the best single-shot spin SNR.
+
+        For a window [t_i, t_j] the detected photons of each initial state
+        are differences of the cumulative counts, N = η (C(t_j) - C(t_i)),
+        and the shot-noise-limited SNR is
+
+            SNR = (N_bright - N_dark) / sqrt(N_bright + N_dark)
+
+        The SNR of every window pair is evaluated as one (n_points,
+        n_points) array expression on top of a single propagation (see
+        :meth:`cumulative_pl`).
+
+        Parameters
+        ----------
+        gamma : float
+            Optical excitation rate in MHz.
+        t_max : float
+            Latest window end in seconds.
+        n_points : int
+            Number of candidate window edges, uniform on [0, t_max].
+        bright_state, dark_state : str, int or np.ndarray
+            Initial states to distinguish, as accepted by :meth:`run`.
+        collection_efficiency : float
+            Fraction of emitted photons that are detected. Default is 1.
+        **model_kwargs
+            Additional keyword arguments for model.build_rate_matrix()
+            (non-SevenLevelModel models only).
+
+        Returns
+        -------
+        result : dict
+            Dictionary containing:
+            - 't': window edges in seconds
+            - 'cumulative': detected photons from 0 to t for the bright and
+              dark states, shape (n_points, 2)
+            - 'snr': SNR of window [t[i], t[j]] at [i, j]; NaN for j <= i
+            - 'window': optimal (start, stop) in seconds
+            - 'index': optimal (i, j)
+            - 'snr_max': the optimal SNR
+            - 'counts': detected (bright, dark) photons in that window
+        """
+        if n_points < 2:
+            raise ValueError("n_points must be at least 2")
+        if not 0 < collection_efficiency <= 1:
+            raise ValueError("collection_efficiency must be in (0, 1]")
+
+        t_eval = np.linspace(0.0, t_max, n_points)
+        cumulative = collection_efficiency * self.cumulative_pl(
+            t_eval, [bright_state, dark_state], gamma=gamma, **model_kwargs
+        )
+
+        # counts[i, j] = photons in [t_i, t_j]
+        counts = cumulative[np.newaxis, :, :] - cumulative[:, np.newaxis, :]
+        signal = counts[..., 0] - counts[..., 1]
+        noise = np.sqrt(np.maximum(counts[..., 0] + counts[..., 1], 0.0))
+        snr = np.full((n_points, n_points), np.nan)
+        valid = np.triu(noise > 0, k=1)
+        snr[valid] = signal[valid] / noise[valid]
+
+        if not valid.any():
+            raise ValueError("No readout window collects any photons")
+        i, j = np.unravel_index(np.nanargmax(snr), snr.shape)
+
+        return {
+            't': t_eval,
+            'cumulative': cumulative,
+            'snr': snr,
+            'window': (t_eval[i], t_eval[j]),
+            'index': (int(i), int(j)),
+            'snr_max': float(snr[i, j]),
+            'counts': tuple(float(c) for c in counts[i, j]),
+            'params': {
+                'gamma': gamma,
+                'bright_state': bright_state,
+                'dark_state': dark_state,
+                'collection_efficiency': collection_efficiency,
+            },
+        }
+
     def _parse_initial_state(self, initial_state) -> np.ndarray:
         """Convert initial state specification to population vector."""
         if isinstance(initial_state, np.ndarray):
@@ -0,0 +1,240 @@
+"""
+Multi-dimensional parameter-grid sweeps of steady-state observables.
+"""
+
+import numpy as np
+from functools import partial
+from typing import Dict, List, Optional, Tuple, Union, Sequence
+from odmr_sim.models.base import RateModel
+from odmr_sim.models.seven_level import SevenLevelModel
+from odmr_sim.solvers.rate_solver import RateSolver
+from odmr_sim.simulations.parallel import fill_chunks, resolve_workers, shared_outputs
+
+
+class GridSweep:
+    """Steady-state sweep over a Cartesian grid of model parameters.
+
+    Each axis can be a dynamic parameter (e.g. 'gamma', 'kmw_minus'), a
+    named fixed rate (e.g. 'k47', 'k71' for SevenLevelModel) or a
+    (from_state, to_state) tuple. The grid is evaluated in flat chunks
+    whose size is set by a memory budget, with one batched rate-matrix
+    build and one batched steady-state solve per chunk.
+
+    Parameters
+    ----------
+    model : RateModel or SevenLevelModel
+        The rate equation model to use.
+    max_memory_mb : float, optional
+        Approximate memory budget per chunk in megabytes. Default is 256.
+        With parallel executors each worker holds one chunk at a time.
+    mw_params : sequence of str, optional
+        Dynamic parameters that are switched off for the contrast
+        reference. Default is ('kmw_minus', 'kmw_plus').
+
+    Examples
+    --------
+    >>> from odmr_sim.models import get_preset
+    >>> from odmr_sim.simulations import GridSweep
+    >>>
+    >>> sweep = GridSweep(get_preset('g9_g8_30dp'))
+    >>> result = sweep.run(
+    ...     axes={'gamma': np.logspace(-2, 1, 200),
+    ...           'kmw_minus': np.logspace(-2, 1, 200),
+    ...           'k71': np.linspace(100, 500, 50)},
+    ... )
+    >>> result['contrast'].shape
+    (200, 200, 50)
+    """
+
+    def __init__(
+        self,
+        model: Union[RateModel, SevenLevelModel],
+        max_memory_mb: float = 256.0,
+        mw_params: Sequence[str] = ('kmw_minus', 'kmw_plus')
+    ):
+        self.model = model
+        self.solver = RateSolver()
+        self.max_memory_mb = max_memory_mb
+        self.mw_params = tuple(mw_params)
+
+    def run(
+        self,
+        axes: Dict[Union[str, Tuple[int, int]], np.ndarray],
+        return_populations: bool = True,
+        executor: str = 'serial',
+        n_workers: Optional[int] = None,
+        **fixed
+    ) -> dict:
+        """Evaluate steady-state observables over a parameter grid.
+
+        Parameters
+        ----------
+        axes : dict
+            Ordered mapping of parameter name to 1-D array of values. The
+            order of the keys sets the order of the result dimensions.
+        return_populations : bool
+            If True, include the full steady-state populations.
+        executor : str
+            'serial', 'threads' or 'processes' for evaluating the chunks.
+        n_workers : int, optional
+            Number of workers for 'threads' and 'processes'. Defaults to
+            the CPU count.
+        **fixed : float
+            Parameters held constant over the grid (dynamic parameters or
+            named fixed rates), in MHz.
+
+        Returns
+        -------
+        result : dict
+            Dictionary containing:
+            - 'dims': tuple of axis names, in result order
+            - 'coords': dict mapping axis name to its values
+            - 'populations': array of shape grid_shape + (n_states,)
+              (if return_populations)
+            - 'pl': PL intensity with microwave (models with a 'pl' observable)
+            - 'pl_reference': PL intensity without microwave (models with a
+              'pl' observable)
+            - 'contrast': ODMR contrast (models with a 'pl' observable)
+            - 'labels': state labels
+            - 'params': the fixed parameters
+        """
+        dims = tuple(axes)
+        coords = {
+            name: np.asarray(values, dtype=float).ravel()
+            for name, values in axes.items()
+        }
+        for name in dims + tuple(fixed):
+            self._resolve(name)
+
+        has_pl = 'pl' in self.model.observables
+
+        n_workers = resolve_workers(executor, n_workers)
+        parallel = {'executor': executor, 'n_workers': n_workers}
+
+        populations, pl = self._solve_grid(
+            dims, coords, fixed, return_populations, **parallel
+        )
+
+        result = {
+            'dims': dims,
+            'coords': coords,
+            'labels': self.model.state_labels,
+            'params': dict(fixed),
+        }
+        if return_populations:
+            result['populations'] = populations
+
+        if has_pl:
+            # Reference without microwave only depends on the non-MW axes
+            ref_dims = tuple(d for d in dims if d not in self.mw_params)
+            ref_fixed = {k: v for k, v in fixed.items() if k not in self.mw_params}
+            _, pl_ref = self._solve_grid(
+                ref_dims, coords, ref_fixed, False, **parallel
+            )
+            pl_ref = pl_ref.reshape(
+                [len(coords[d]) if d in ref_dims else 1 for d in dims]
+            )
+            pl_ref = np.broadcast_to(pl_ref, pl.shape)
+
+            contrast = np.zeros(pl.shape)
+            nonzero = pl_ref != 0
+            contrast[nonzero] = (pl_ref[nonzero] - pl[nonzero]) / pl_ref[nonzero]
+
+            result['pl'] = pl
+            result['pl_reference'] = np.array(pl_ref)
+            result['contrast'] = contrast
+
+        return result
+
+    def _solve_grid(
+        self,
+        dims: Tuple,
+        coords: Dict,
+        fixed: Dict,
+        return_populations: bool,
+        executor: str = 'serial',
+        n_workers: int = 1
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Solve steady states over the grid spanned by dims, chunk by chunk."""
+        n_states = self.model.n_states
+        shape = tuple(len(coords[d]) for d in dims)
+        n_total = int(np.prod(shape))
+
+        # Enough chunks to respect the memory budget and occupy every worker
+        chunk_size = min(self._chunk_size(), -(-n_total // n_workers))
+        ranges = [
+            (start, min(start + chunk_size, n_total))
+            for start in range(0, n_total, chunk_size)
+        ]
+        # Workers write straight into the outputs (shared memory for processes)
+        shapes = [(n_total,)]
+        if return_populations:
+            shapes.append((n_total, n_states))
+        with shared_outputs(shapes, executor, len(ranges)) as outs:
+            fill_chunks(
+                partial(self._solve_chunk, dims, shape, {d: coords[d] for d in dims}, fixed),
+                ranges, outs, executor=executor, n_workers=n_workers
+            )
+        pl = np.asarray(outs[0])
+
+        if return_populations:
+            populations = np.asarray(outs[1])
+            return populations.reshape(shape + (n_states,)), pl.reshape(shape)
+        return None, pl.reshape(shape)
+
+    def _solve_chunk(
+        self,
+        dims: Tuple,
+        shape: Tuple[int, ...],
+        coords: Dict,
+        fixed: Dict,
+        arrays: List[np.ndarray],
+        flat_range: Tuple[int, int]
+    ) -> Tuple[int, int]:
+        """Write PL (and populations) for one flat range [start, stop) of the grid."""
+        start, stop = flat_range
+        n_states = self.model.n_states
+        grid_index = np.unravel_index(np.arange(start, stop), shape) if dims else ()
+
+        values = dict(fixed)
+        for name, index in zip(dims, grid_index):
+            values[name] = coords[name][index]
+
+        params, rates = self._split(values)
+        W = self.model.compile().build(rates=rates, **params)
+        W = np.broadcast_to(W, (stop - start, n_states, n_states))
+        P_ss = self.solver.solve_steady_state_batch(W)
+
+        if 'pl' in self.model.observables:
+            arrays[0][start:stop] = self.model.evaluate_observables(
+                P_ss, ['pl'], rates=rates
+            )['pl']
+        else:
+            arrays[0][start:stop] = 0.0
+        if len(arrays) > 1:
+            arrays[1][start:stop] = P_ss
+
+        return flat_range
+
+    def _split(self, values: Dict) -> Tuple[Dict, Dict]:
+        """Split named values into dynamic parameters and fixed-rate overrides."""
+        params = {}
+        rates = {}
+        for name, value in values.items():
+            kind, key = self._resolve(name)
+            if kind == 'param':
+                params[key] = value
+            else:
+                rates[key] = value
+        return params, rates
+
+    def _resolve(self, name: Union[str, Tuple[int, int]]) -> Tuple[str, object]:
+        """Classify a sweep parameter as a dynamic parameter or a fixed rate."""
+        return self.model.resolve_parameter(name)
+
+    def _chunk_size(self) -> int:
+        """Number of grid points per chunk under the memory budget."""
+        n_states = self.model.n_states
+        # Rate-matrix stack plus the solver's working copy
+        bytes_per_point = 3 * n_states * n_states * 8
+        return max(1, int(self.max_memory_mb * 1e6 // bytes_per_point))
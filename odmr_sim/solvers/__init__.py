@@ -1,5 +1,16 @@
 """Solvers for rate equation systems."""
 
 from odmr_sim.solvers.rate_solver import RateSolver
+from odmr_sim.solvers.krylov import expm_action
+from odmr_sim.solvers.sparse_lu import SparseSteadyStateSolver
+from odmr_sim.solvers.spectral import SpectralPropagator
+from odmr_sim.solvers.stepping import UniformStepper, is_uniform_grid
 
-__all__ = ["RateSolver"]
+__all__ = [
+    "RateSolver",
+    "SparseSteadyStateSolver",
+    "SpectralPropagator",
+    "UniformStepper",
+    "expm_action",
+    "is_uniform_grid",
+]
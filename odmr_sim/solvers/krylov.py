@@ -0,0 +1,203 @@
+"""
+Action of the matrix exponential for large (sparse) rate models.
+
+Computes exp(W*t) @ P0 without ever forming exp(W*t), using a
+shift-and-invert (rational) Krylov subspace: the Arnoldi process is run on
+Z = (I - γW)^-1, which captures the slow, physically relevant modes of a
+stiff rate matrix in a few dozen vectors. W is projected onto that
+subspace as W_m = (I - H_m^-1) / γ and the small m×m problem is
+propagated to every time point. Only one sparse LU factorization of
+(I - γW) is needed per time segment, so the cost scales with the number of
+nonzeros of W rather than with n_states**3 or with ||W|| * t.
+
+References
+----------
+- J. van den Eshof and M. Hochbruck, SIAM J. Sci. Comput. 27, 1438 (2006)
+"""
+
+import numpy as np
+import scipy.sparse as sp
+from typing import Optional, Tuple
+from scipy.linalg import expm, lu_factor, lu_solve
+from scipy.sparse.linalg import splu
+
+from odmr_sim.solvers.spectral import SpectralPropagator
+
+
+def expm_action(
+    W,
+    P0: np.ndarray,
+    t_eval: np.ndarray,
+    tol: float = 1e-10,
+    max_krylov_dim: int = 100,
+    segment_ratio: float = 100.0,
+    weights: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """Evaluate P(t) = exp(W*t) @ P0 at every time point.
+
+    The sorted time points are split into segments spanning at most a
+    factor ``segment_ratio`` in time. Each segment starts from the state at
+    the end of the previous one and gets its own shift-and-invert Krylov
+    subspace, grown until the solution over the segment converges.
+
+    Parameters
+    ----------
+    W : np.ndarray or scipy.sparse matrix
+        Rate matrix with shape (n_states, n_states) in units of 1/s.
+        Sparse matrices are kept sparse.
+    P0 : np.ndarray
+        Initial population vector with shape (n_states,).
+    t_eval : np.ndarray
+        Time points in seconds (t >= 0, any order).
+    tol : float, optional
+        Absolute convergence tolerance on the populations. Default is 1e-10.
+    max_krylov_dim : int, optional
+        Largest Krylov subspace dimension per segment. Default is 100.
+    segment_ratio : float, optional
+        Largest ratio between the end and start times of a segment.
+    weights : np.ndarray, optional
+        Observable weights with shape (n_obs, n_states). If given, the
+        Krylov solution is projected with weights @ V, and only the
+        observables are stored.
+
+    Returns
+    -------
+    populations : np.ndarray
+        Population array with shape (len(t_eval), n_states), or the
+        observables with shape (len(t_eval), n_obs) if weights is given.
+    """
+    t_eval = np.asarray(t_eval, dtype=float)
+    P0 = np.asarray(P0, dtype=float)
+    n_states = len(P0)
+
+    if weights is not None:
+        weights = np.atleast_2d(np.asarray(weights, dtype=float))
+    n_out = n_states if weights is None else weights.shape[0]
+
+    def project(P):
+        return P if weights is None else P @ weights.T
+
+    populations = np.zeros((len(t_eval), n_out))
+    if len(t_eval) == 0:
+        return populations
+    if np.any(t_eval < 0):
+        raise ValueError("expm_action requires non-negative times")
+
+    if sp.issparse(W):
+        W = sp.csc_matrix(W)
+        identity = sp.identity(n_states, format='csc')
+    else:
+        W = np.asarray(W, dtype=float)
+        identity = np.eye(n_states)
+
+    order = np.argsort(t_eval, kind='stable')
+    sorted_t = t_eval[order]
+
+    P_start = P0
+    t_start = 0.0
+    i = 0
+    while i < len(sorted_t):
+        # Collect the points of this segment
+        if sorted_t[i] == t_start:
+            populations[order[i]] = project(P_start)
+            i += 1
+            continue
+        t_limit = max(segment_ratio * t_start, sorted_t[i])
+        j = i
+        while j < len(sorted_t) and sorted_t[j] <= t_limit:
+            j += 1
+
+        taus = sorted_t[i:j] - t_start
+        Y, V = _rational_krylov_propagate(
+            W, identity, P_start, taus, tol, max_krylov_dim
+        )
+        basis = V if weights is None else weights @ V
+        populations[order[i:j]] = Y @ basis.T
+
+        P_start = V @ Y[-1]
+        t_start = sorted_t[j - 1]
+        i = j
+
+    return populations
+
+
+def _rational_krylov_propagate(
+    W,
+    identity,
+    v0: np.ndarray,
+    taus: np.ndarray,
+    tol: float,
+    max_krylov_dim: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Propagate v0 to every tau with a shift-and-invert Krylov subspace.
+
+    Returns the solution in Krylov coordinates: Y with shape
+    (len(taus), m) and the orthonormal basis V with shape (n_states, m),
+    such that the populations are Y @ V.T.
+    """
+    n_states = len(v0)
+    beta = np.linalg.norm(v0)
+    if beta == 0:
+        return np.zeros((len(taus), 1)), np.zeros((n_states, 1))
+
+    # Shift chosen relative to the segment length (van den Eshof & Hochbruck)
+    gamma = taus[-1] / 10.0
+    shifted = identity - gamma * W
+    if sp.issparse(shifted):
+        lu = splu(sp.csc_matrix(shifted))
+        solve = lu.solve
+    else:
+        lu = lu_factor(shifted)
+        solve = lambda b: lu_solve(lu, b)
+
+    m_max = min(max_krylov_dim, n_states)
+    V = np.zeros((n_states, m_max + 1))
+    H = np.zeros((m_max + 1, m_max))
+    V[:, 0] = v0 / beta
+
+    previous = None
+    for j in range(m_max):
+        w = solve(V[:, j])
+
+        # Arnoldi with one step of re-orthogonalization
+        for _ in range(2):
+            h = V[:, :j + 1].T @ w
+            w -= V[:, :j + 1] @ h
+            H[:j + 1, j] += h
+        H[j + 1, j] = np.linalg.norm(w)
+
+        m = j + 1
+        breakdown = H[j + 1, j] <= 1e-14 * np.linalg.norm(H[:m + 1, :m])
+        if breakdown or m == m_max or m % 5 == 0:
+            current = _project_back(H[:m, :m], beta, gamma, taus)
+            if breakdown or m == m_max:
+                return current, V[:, :m]
+            if previous is not None:
+                # V is orthonormal, so this bounds the population change
+                change = current.copy()
+                change[:, :previous.shape[1]] -= previous
+                if np.max(np.linalg.norm(change, axis=1)) <= tol:
+                    return current, V[:, :m]
+            previous = current
+
+        V[:, j + 1] = w / H[j + 1, j]
+
+    return previous, V[:, :previous.shape[1]]
+
+
+def _project_back(
+    H: np.ndarray,
+    beta: float,
+    gamma: float,
+    taus: np.ndarray
+) -> np.ndarray:
+    """Solve the projected problem; returns Krylov coordinates per tau."""
+    m = H.shape[0]
+    W_m = (np.eye(m) - np.linalg.inv(H)) / gamma
+    e1 = np.zeros(m)
+    e1[0] = beta
+
+    propagator = SpectralPropagator(W_m)
+    if propagator.is_well_conditioned:
+        return propagator.propagate(e1, taus)
+    return np.array([expm(W_m * tau) @ e1 for tau in taus])
@@ -5,11 +5,37 @@ Provides matrix exponential and ODE integration methods for solving
 the rate equation dP/dt = W @ P.
 """
 
+import warnings
+from functools import partial
+
 import numpy as np
-from scipy.linalg import expm
+import scipy.sparse as sp
+from scipy.linalg import LinAlgWarning, expm, lu_factor, lu_solve
 from scipy.integrate import solve_ivp
+from scipy.sparse.linalg import MatrixRankWarning, spsolve
 from typing import Optional, Tuple, Literal
 
+from odmr_sim.solvers.krylov import expm_action
+from odmr_sim.solvers.sparse_lu import SparseSteadyStateSolver
+from odmr_sim.solvers.spectral import SpectralPropagator
+from odmr_sim.solvers.stepping import UniformStepper, is_uniform_grid
+
+
+# Rough costs of dense operations in units of one n_states x n_states
+# matrix product, used by RateSolver.select_method
+_PADE_COST = 10.0
+_SQUARING_COST = 1.5
+_EIG_COST = 60.0
+# Per time point: stepping runs one interpreted matrix-vector step, which
+# for the small matrices of these models costs about a matrix product;
+# spectral evaluates all points in one vectorized contraction
+_STEP_COST = 1.0
+_SPECTRAL_POINT_COST = 0.05
+
+# Dense matrices at least this large and this sparse use the Krylov path
+_KRYLOV_MIN_STATES = 500
+_KRYLOV_MAX_DENSITY = 0.05
+
 
 class RateSolver:
     """Solver for rate equation systems.
@@ -19,7 +45,8 @@ class RateSolver:
     - W is the rate matrix
 
     Two methods are available:
-    1. Matrix exponential: P(t) = exp(W*t) @ P0 (exact, fast for small systems)
+    1. Matrix exponential: P(t) = exp(W*t) @ P0 (exact, fast for small systems),
+       evaluated per time point (Padé) or from one eigendecomposition (spectral)
     2. ODE integration: scipy.integrate.solve_ivp (flexible, handles stiff systems)
 
     Examples
@@ -36,11 +63,20 @@ class RateSolver:
     >>> populations = solver.solve_expm(W, P0, t_eval)
     """
 
+    def __init__(self):
+        # Reuses the LU analysis of sparse rate matrices across calls
+        self._sparse_steady_state = SparseSteadyStateSolver()
+        # Path actually taken by the last solve_expm call
+        self.last_method: Optional[str] = None
+
     def solve_expm(
         self,
         W: np.ndarray,
         P0: np.ndarray,
-        t_eval: np.ndarray
+        t_eval: np.ndarray,
+        method: Literal['pade', 'spectral', 'stepping', 'krylov', 'auto'] = 'pade',
+        atol: float = 1e-8,
+        weights: Optional[np.ndarray] = None
     ) -> np.ndarray:
         """Solve using matrix exponential method.
 
@@ -48,29 +84,513 @@ class RateSolver:
 
         Parameters
         ----------
-        W : np.ndarray
+        W : np.ndarray or scipy.sparse matrix
             Rate matrix with shape (n_states, n_states) in units of 1/s.
+            Sparse matrices always use the 'krylov' method.
         P0 : np.ndarray
             Initial population vector with shape (n_states,).
         t_eval : np.ndarray
             Time points at which to evaluate the solution, in seconds.
+        method : str
+            'pade': One scipy.linalg.expm (Padé) evaluation per time point.
+            'spectral': Diagonalize W once and evaluate all time points in
+            a single broadcast exp(λ*t) contraction. The result is checked
+            against 'pade' at a few time points; if the eigenvectors are
+            ill-conditioned or the check fails, 'pade' is used instead.
+            'stepping': One expm for the step of a uniform grid, then
+            repeated products. Non-uniform grids use 'pade'.
+            'krylov': Shift-and-invert Krylov action of exp(W*t) on P0,
+            for large sparse models.
+            'auto': Pick one of the above with :meth:`select_method`. If
+            the picked 'spectral' path is rejected, uniform grids fall back
+            to 'stepping' rather than 'pade'. The path actually taken
+            (after any fallback) is stored in ``self.last_method``.
+        atol : float
+            Absolute population tolerance for the 'spectral' check.
+        weights : np.ndarray, optional
+            Observable weights with shape (n_states,) or (n_obs, n_states),
+            e.g. from model.observable_weights(). If given, only
+            weights @ P(t) is evaluated and returned; every method projects
+            while propagating, so no (n_times, n_states) array is formed.
 
         Returns
         -------
         populations : np.ndarray
             Population array with shape (len(t_eval), n_states).
             populations[i, j] is the population of state j at time t_eval[i].
+            With weights, the observables with shape (len(t_eval), n_obs).
         """
-        n_states = len(P0)
+        if weights is not None:
+            weights = np.atleast_2d(np.asarray(weights, dtype=float))
+
+        if method not in ('pade', 'spectral', 'stepping', 'krylov', 'auto'):
+            raise ValueError(f"Unknown method: {method}")
+
+        auto = method == 'auto'
+        if auto:
+            method = self.select_method(W, t_eval)
+            if method == 'krylov' and not sp.issparse(W):
+                W = sp.csc_matrix(W)
+
+        if method == 'krylov' or sp.issparse(W):
+            self.last_method = 'krylov'
+            return expm_action(W, P0, t_eval, weights=weights)
+
+        if method == 'spectral':
+            populations = self._solve_spectral(W, P0, t_eval, atol, weights)
+            if populations is not None:
+                self.last_method = 'spectral'
+                return populations
+            if auto:
+                method = 'stepping'
+        if method == 'stepping':
+            if is_uniform_grid(t_eval):
+                self.last_method = 'stepping'
+                return UniformStepper(W).propagate(P0, t_eval, weights=weights)
+
+        self.last_method = 'pade'
+        return self._solve_pade(W, P0, t_eval, weights)
+
+    def select_method(self, W: np.ndarray, t_eval: np.ndarray) -> str:
+        """Choose the fastest accurate solve_expm path for W and t_eval.
+
+        - Sparse matrices, and large dense matrices that are mostly zero,
+          use 'krylov'.
+        - Otherwise the dense paths are compared with a rough cost model
+          in units of one matrix product. Padé pays for every time point,
+          and its scaling-and-squaring cost grows with log2(||W|| * t),
+          i.e. with the spread between the fastest rate and the time
+          scale. 'spectral' pays one eigendecomposition, three Padé
+          spot checks and a small vectorized cost per point. 'stepping'
+          (uniform grids only) pays one expm per re-anchoring interval
+          plus one interpreted step per point, so it only wins on short
+          uniform grids.
+
+        Parameters
+        ----------
+        W : np.ndarray or scipy.sparse matrix
+            Rate matrix with shape (n_states, n_states) in units of 1/s.
+        t_eval : np.ndarray
+            Time points in seconds.
+
+        Returns
+        -------
+        method : str
+            'pade', 'spectral', 'stepping' or 'krylov'.
+        """
+        if sp.issparse(W):
+            return 'krylov'
+
+        W = np.asarray(W)
+        t_eval = np.asarray(t_eval, dtype=float)
+        n_states = W.shape[0]
         n_times = len(t_eval)
 
-        populations = np.zeros((n_times, n_states))
+        if (n_states >= _KRYLOV_MIN_STATES
+                and np.count_nonzero(W) <= _KRYLOV_MAX_DENSITY * n_states ** 2):
+            return 'krylov'
+        if n_times <= 1:
+            return 'pade'
+
+        # ||W||_1 bounds the fastest decay rate (largest |eigenvalue|)
+        norm = np.max(np.sum(np.abs(W), axis=0))
+
+        def expm_cost(t):
+            return _PADE_COST + _SQUARING_COST * np.log2(max(norm * t, 1.0))
+
+        t_max = np.max(np.abs(t_eval))
+        costs = {
+            'pade': sum(expm_cost(abs(t)) for t in t_eval),
+            'spectral': (_EIG_COST + 3 * expm_cost(t_max)
+                         + _SPECTRAL_POINT_COST * n_times),
+        }
+        if is_uniform_grid(t_eval):
+            # Step propagator plus one exact re-anchor per 256 steps
+            # (UniformStepper's default)
+            dt = abs(t_eval[1] - t_eval[0])
+            n_anchors = -(-n_times // 256)
+            costs['stepping'] = (expm_cost(dt) + n_anchors * expm_cost(t_max)
+                                 + _STEP_COST * n_times)
+
+        return min(costs, key=costs.get)
+
+    def _solve_pade(
+        self,
+        W: np.ndarray,
+        P0: np.ndarray,
+        t_eval: np.ndarray,
+        weights: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """Evaluate exp(W*t) @ P0 with one Padé expm per time point."""
+        n_out = len(P0) if weights is None else weights.shape[0]
+        n_times = len(t_eval)
+
+        populations = np.zeros((n_times, n_out))
 
         for i, t in enumerate(t_eval):
-            populations[i] = expm(W * t) @ P0
+            P = expm(W * t) @ P0
+            populations[i] = P if weights is None else weights @ P
 
         return populations
 
+    def _solve_spectral(
+        self,
+        W: np.ndarray,
+        P0: np.ndarray,
+        t_eval: np.ndarray,
+        atol: float,
+        weights: Optional[np.ndarray] = None
+    ) -> Optional[np.ndarray]:
+        """Evaluate exp(W*t) @ P0 from one eigendecomposition.
+
+        Returns None if the decomposition cannot be trusted, so that the
+        caller can fall back to the per-point Padé path.
+        """
+        propagator = SpectralPropagator(W)
+        if not propagator.is_well_conditioned:
+            return None
+
+        # Spot-check the full populations against Padé at the first,
+        # middle and last time points
+        t_eval = np.asarray(t_eval, dtype=float)
+        n_times = len(t_eval)
+        if n_times > 0:
+            check_t = t_eval[np.unique([0, n_times // 2, n_times - 1])]
+            reference = self._solve_pade(W, P0, check_t)
+            if np.max(np.abs(propagator.propagate(P0, check_t) - reference)) > atol:
+                return None
+
+        return propagator.propagate(P0, t_eval, weights=weights)
+
+    def propagator(
+        self,
+        W: np.ndarray,
+        t: float,
+        weights: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """Dense propagator exp(W*t), optionally carrying integrated observables.
+
+        With observable weights w of shape (n_obs, n_states) the propagator
+        of the augmented system
+
+            M = [[W, 0],
+                 [w, 0]]
+
+        is returned. Applied to [P; c] it gives [P(t); c + w @ ∫₀ᵗ P ds],
+        so products of such propagators accumulate time-integrated
+        observables (e.g. photon counts) along a sequence of segments.
+
+        Parameters
+        ----------
+        W : np.ndarray or scipy.sparse matrix
+            Rate matrix with shape (n_states, n_states) in units of 1/s.
+        t : float
+            Propagation time in seconds.
+        weights : np.ndarray, optional
+            Observable weights with shape (n_states,) or (n_obs, n_states).
+
+        Returns
+        -------
+        U : np.ndarray
+            exp(W*t) with shape (n_states, n_states), or the augmented
+            propagator with shape (n_states + n_obs, n_states + n_obs).
+        """
+        W = W.toarray() if sp.issparse(W) else np.asarray(W, dtype=float)
+        if weights is None:
+            return expm(W * t)
+
+        weights = np.atleast_2d(np.asarray(weights, dtype=float))
+        n_states = W.shape[0]
+        n_total = n_states + weights.shape[0]
+
+        M = np.zeros((n_total, n_total))
+        M[:n_states, :n_states] = W
+        M[n_states:, :n_states] = weights
+        return expm(M * t)
+
+    def solve_time_integrated(
+        self,
+        W: np.ndarray,
+        P0: np.ndarray,
+        t_end: float,
+        weights: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """Integrate populations exactly over [0, t_end].
+
+        Computes ∫₀ᵀ exp(W*t) @ P0 dt from a single matrix exponential of
+        the augmented matrix
+
+            M = [[W, P0],
+                 [0,  0]]
+
+        whose exponential exp(M*T) holds the integral in its last column.
+
+        Parameters
+        ----------
+        W : np.ndarray or scipy.sparse matrix
+            Rate matrix with shape (n_states, n_states) in units of 1/s.
+        P0 : np.ndarray
+            Initial population vector with shape (n_states,).
+        t_end : float
+            Integration time T in seconds.
+        weights : np.ndarray, optional
+            Observable weights with shape (n_states,) or (n_obs, n_states).
+            If given, the integrated observable weights @ ∫P dt is returned
+            instead of the integrated populations.
+
+        Returns
+        -------
+        integral : np.ndarray
+            Time-integrated populations with shape (n_states,) in units of
+            seconds, or the integrated observable(s) if weights is given.
+        """
+        n_states = len(P0)
+
+        if sp.issparse(W):
+            # Sparse: only the action of exp(M*T) on the last unit vector.
+            # expm_action converges to an absolute tolerance, so the P0
+            # column is scaled by 1/T to make the integral O(1) (the mean
+            # population) and rescaled afterwards.
+            if t_end == 0:
+                integral = np.zeros(n_states)
+            else:
+                column = np.asarray(P0, dtype=float).reshape(-1, 1) / t_end
+                M = sp.bmat([
+                    [W, sp.csc_matrix(column)],
+                    [None, sp.csc_matrix((1, 1))],
+                ], format='csc')
+                e_last = np.zeros(n_states + 1)
+                e_last[n_states] = 1.0
+                mean = expm_action(M, e_last, np.array([t_end]))[0, :n_states]
+                integral = mean * t_end
+        else:
+            M = np.zeros((n_states + 1, n_states + 1))
+            M[:n_states, :n_states] = W
+            M[:n_states, n_states] = P0
+            integral = expm(M * t_end)[:n_states, n_states]
+
+        if weights is not None:
+            return np.asarray(weights) @ integral
+        return integral
+
+    def solve_sensitivity(
+        self,
+        W: np.ndarray,
+        dW: np.ndarray,
+        P0: np.ndarray,
+        t_end: float,
+        integrated: bool = False,
+        weights: Optional[np.ndarray] = None,
+        dweights: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Populations at t_end and their derivatives with respect to parameters.
+
+        The forward sensitivities S_k = dP/dθ_k obey dS_k/dt = W S_k + dW_k P
+        with S_k(0) = 0, i.e. S_k(T) = ∫₀ᵀ exp(W(T-s)) dW_k exp(Ws) P0 ds.
+
+        With observable weights only w @ S_k is needed, which is
+        tr(dW_k G) with the adjoint Gram matrix
+
+            G = ∫₀ᵀ exp(Ws) P0 w^T exp(W(T-s)) ds
+
+        shared by every parameter. G is the corner block of one small
+        matrix exponential (Van Loan's method), of [[W, P0 w^T], [0, W]]
+        (2n x 2n), or for the integral over [0, t_end] (where the adjoint is
+        integrated too) of [[W, P0, 0], [0, 0, w^T], [0, 0, W]]
+        ((2n+1) x (2n+1)). The cost is one such exponential per observable,
+        whatever the number of parameters.
+
+        Without weights the full derivatives are needed; P and all S_k are
+        then propagated together with the (p+1)n x (p+1)n block
+        lower-triangular matrix
+
+            M = [[W,     0,  ...,  0],
+                 [dW_1,  W,  ...,  0],
+                 ...
+                 [dW_p,  0,  ...,  W]]
+
+        in one matrix exponential, or integrated with the augmented matrix
+        of :meth:`solve_time_integrated`. This is much more expensive for
+        many parameters.
+
+        Parameters
+        ----------
+        W : np.ndarray
+            Rate matrix with shape (n_states, n_states) in units of 1/s.
+        dW : np.ndarray
+            Derivatives dW/dθ with shape (n_params, n_states, n_states).
+        P0 : np.ndarray
+            Initial population vector (independent of the parameters).
+        t_end : float
+            Time in seconds.
+        integrated : bool
+            If True, return ∫₀ᵀ P dt and its derivatives instead of P(T).
+        weights : np.ndarray, optional
+            Observable weights with shape (n_states,) or (n_obs, n_states).
+        dweights : np.ndarray, optional
+            Derivatives of the weights with shape (n_params, n_obs,
+            n_states), e.g. from model.observable_weight_derivatives().
+
+        Returns
+        -------
+        P : np.ndarray
+            Populations (or integrated populations) with shape (n_states,),
+            or observables with shape (n_obs,) if weights is given.
+        dP : np.ndarray
+            Derivatives with shape (n_params, n_states), or (n_params,
+            n_obs) if weights is given.
+        """
+        if weights is not None:
+            return self._observable_sensitivity(
+                W, dW, P0, t_end, weights, dweights, integrated
+            )
+
+        M, x0 = self._sensitivity_system(W, dW, P0)
+        if integrated:
+            x = self.solve_time_integrated(M, x0, t_end)
+        else:
+            x = expm(M * t_end) @ x0
+
+        x = x.reshape(len(dW) + 1, len(P0))
+        return x[0], x[1:]
+
+    @staticmethod
+    def _observable_sensitivity(
+        W: np.ndarray,
+        dW: np.ndarray,
+        P0: np.ndarray,
+        t_end: float,
+        weights: np.ndarray,
+        dweights: Optional[np.ndarray],
+        integrated: bool
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Observables and their derivatives from the adjoint Gram matrix."""
+        W = np.asarray(W, dtype=float)
+        dW = np.asarray(dW, dtype=float)
+        P0 = np.asarray(P0, dtype=float)
+        weights = np.atleast_2d(np.asarray(weights, dtype=float))
+        n_params, n_states = dW.shape[0], W.shape[0]
+        n_obs = weights.shape[0]
+        # Adjoint block starts after the P0 column when integrating
+        a = n_states + 1 if integrated else n_states
+
+        M = np.zeros((a + n_states, a + n_states))
+        M[:n_states, :n_states] = W
+        M[a:, a:] = W
+        if integrated:
+            M[:n_states, n_states] = P0
+
+        values = np.empty(n_obs)
+        derivatives = np.empty((n_params, n_obs))
+        for i, w in enumerate(weights):
+            # Scale the coupling to W; the corner block is linear in it
+            scale = max(np.max(np.abs(w)), 1e-300) / max(np.max(np.abs(W)), 1e-300)
+            if integrated:
+                M[n_states, a:] = w / scale
+            else:
+                M[:n_states, a:] = np.outer(P0, w / scale)
+            F = expm(M * t_end)
+
+            G = F[:n_states, a:] * scale
+            P = F[:n_states, n_states] if integrated else F[:n_states, :n_states] @ P0
+            values[i] = w @ P
+            derivatives[:, i] = np.einsum('kij,ji->k', dW, G)
+
+        if dweights is not None:
+            dweights = np.asarray(dweights, dtype=float).reshape(n_params, n_obs, n_states)
+            derivatives += dweights @ P
+        return values, derivatives
+
+    def solve_expm_sensitivity(
+        self,
+        W: np.ndarray,
+        dW: np.ndarray,
+        P0: np.ndarray,
+        t_eval: np.ndarray,
+        weights: Optional[np.ndarray] = None,
+        dweights: Optional[np.ndarray] = None,
+        method: str = 'auto'
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Populations (or observables) and their derivatives over time.
+
+        Propagates the block sensitivity system of :meth:`solve_sensitivity`
+        with :meth:`solve_expm`, so all time points share one solve.
+        Observables w(θ) @ P are differentiated as w @ dP + dw @ P, both
+        terms being projected during the propagation.
+
+        Parameters
+        ----------
+        W : np.ndarray
+            Rate matrix with shape (n_states, n_states) in units of 1/s.
+        dW : np.ndarray
+            Derivatives dW/dθ with shape (n_params, n_states, n_states).
+        P0 : np.ndarray
+            Initial population vector (independent of the parameters).
+        t_eval : np.ndarray
+            Time points in seconds.
+        weights : np.ndarray, optional
+            Observable weights with shape (n_states,) or (n_obs, n_states).
+        dweights : np.ndarray, optional
+            Derivatives of the weights with shape (n_params, n_obs,
+            n_states), e.g. from model.observable_weight_derivatives().
+        method : str
+            solve_expm method for the block system. Default is 'auto',
+            which never picks 'spectral' for it (the block system is
+            defective).
+
+        Returns
+        -------
+        values : np.ndarray
+            Populations with shape (n_times, n_states), or observables with
+            shape (n_times, n_obs) if weights is given.
+        derivatives : np.ndarray
+            Derivatives with shape (n_times, n_params, n_states) or
+            (n_times, n_params, n_obs).
+        """
+        n_params = len(dW)
+        n_states = len(P0)
+        M, x0 = self._sensitivity_system(W, dW, P0)
+
+        if weights is None:
+            weights = np.eye(n_states)
+        weights = np.atleast_2d(np.asarray(weights, dtype=float))
+        n_obs = weights.shape[0]
+
+        # Block projection: value = w @ P, derivative k = dw_k @ P + w @ S_k
+        projection = np.kron(np.eye(n_params + 1), weights)
+        if dweights is not None:
+            dweights = np.asarray(dweights, dtype=float).reshape(n_params, n_obs, n_states)
+            projection[n_obs:, :n_states] = dweights.reshape(n_params * n_obs, n_states)
+
+        if method == 'auto':
+            method = self.select_method(M, t_eval)
+            if method == 'spectral':
+                # M is defective (every eigenvalue of W repeated, with Jordan
+                # coupling through dW); its nearly parallel eigenvectors cost
+                # about half the digits, so step or use Padé instead
+                method = 'stepping' if is_uniform_grid(t_eval) else 'pade'
+
+        x = self.solve_expm(M, x0, t_eval, method=method, weights=projection)
+        x = x.reshape(len(x), n_params + 1, n_obs)
+        return x[:, 0], x[:, 1:]
+
+    @staticmethod
+    def _sensitivity_system(
+        W: np.ndarray,
+        dW: np.ndarray,
+        P0: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Block matrix and initial vector of the forward sensitivity system."""
+        W = np.asarray(W, dtype=float)
+        dW = np.asarray(dW, dtype=float)
+        n_params, n_states = dW.shape[0], W.shape[0]
+
+        M = np.kron(np.eye(n_params + 1), W)
+        M[n_states:, :n_states] = dW.reshape(n_params * n_states, n_states)
+        x0 = np.zeros((n_params + 1) * n_states)
+        x0[:n_states] = P0
+        return M, x0
+
     def solve_ivp(
         self,
         W: np.ndarray,
@@ -83,14 +603,20 @@ class RateSolver:
         """Solve using ODE integration (scipy.integrate.solve_ivp).
 
         This method is more flexible and can handle stiff systems with
-        appropriate method choice (e.g., 'Radau', 'BDF').
+        appropriate method choice (e.g., 'Radau', 'BDF'). The system is
+        linear, so the implicit methods ('Radau', 'BDF', 'LSODA') are given
+        the exact Jacobian W instead of estimating it by finite differences;
+        'Radau' and 'BDF' receive it as a sparse matrix for large or
+        batched systems.
 
         Parameters
         ----------
-        W : np.ndarray
+        W : np.ndarray or scipy.sparse matrix
             Rate matrix with shape (n_states, n_states) in units of 1/s.
         P0 : np.ndarray
-            Initial population vector with shape (n_states,).
+            Initial population vector with shape (n_states,), or a batch of
+            initial conditions with shape (n_states, n_batch) that are
+            integrated together.
         t_span : tuple
             (t0, tf) - start and end times in seconds.
         t_eval : np.ndarray, optional
@@ -101,19 +627,34 @@ class RateSolver:
             Use 'Radau' or 'BDF' for stiff problems.
         **kwargs
             Additional arguments passed to scipy.integrate.solve_ivp.
+            An explicit ``jac`` overrides the analytic Jacobian.
 
         Returns
         -------
         populations : np.ndarray
-            Population array with shape (len(t_eval), n_states).
+            Population array with shape (len(t_eval), n_states), or
+            (len(t_eval), n_states, n_batch) for a batch of initial conditions.
         """
+        P0 = np.asarray(P0, dtype=float)
+        n_states = W.shape[0]
+        n_batch = P0.size // n_states
+
         def rate_equations(t, P):
-            return W @ P
+            # P is (n_states * n_batch,) or, vectorized, (n_states * n_batch, k)
+            return (W @ P.reshape(n_states, -1)).reshape(P.shape)
+
+        if method in ('Radau', 'BDF') and 'jac' not in kwargs:
+            kwargs['jac'] = self._ivp_jacobian(W, n_batch, allow_sparse=True)
+        elif method == 'LSODA' and 'jac' not in kwargs:
+            # LSODA takes the Jacobian only as a callable returning a dense array
+            J = self._ivp_jacobian(W, n_batch, allow_sparse=False)
+            kwargs['jac'] = lambda t, P: J
+        kwargs.setdefault('vectorized', True)
 
         solution = solve_ivp(
             rate_equations,
             t_span,
-            P0,
+            P0.ravel(),
             method=method,
             t_eval=t_eval,
             **kwargs
@@ -123,7 +664,30 @@ class RateSolver:
             raise RuntimeError(f"ODE solver failed: {solution.message}")
 
         # Transpose to get (n_times, n_states) shape
-        return solution.y.T
+        return solution.y.T.reshape((-1,) + P0.shape)
+
+    @staticmethod
+    def _ivp_jacobian(W, n_batch: int, allow_sparse: bool):
+        """Jacobian of the (batched) linear rate equations.
+
+        The flattened batch state is ordered state-major, so the Jacobian
+        is kron(W, I_batch).
+        """
+        # Below this size dense LU beats sparse LU in the Newton iterations
+        use_sparse = allow_sparse and (
+            sp.issparse(W) or n_batch > 1 or W.shape[0] >= 64
+        )
+
+        if use_sparse:
+            J = sp.csc_matrix(W)
+            if n_batch > 1:
+                J = sp.kron(J, sp.identity(n_batch), format='csc')
+            return J
+
+        J = W.toarray() if sp.issparse(W) else np.asarray(W)
+        if n_batch > 1:
+            J = np.kron(J, np.eye(n_batch))
+        return J
 
     def solve_steady_state(self, W: np.ndarray) -> np.ndarray:
         """Find the steady-state population (null space of W).
@@ -132,7 +696,7 @@ class RateSolver:
 
         Parameters
         ----------
-        W : np.ndarray
+        W : np.ndarray or scipy.sparse matrix
             Rate matrix with shape (n_states, n_states).
 
         Returns
@@ -140,22 +704,179 @@ class RateSolver:
         P_ss : np.ndarray
             Normalized steady-state population vector.
         """
-        # Find eigenvalues and eigenvectors
-        eigenvalues, eigenvectors = np.linalg.eig(W)
+        if sp.issparse(W):
+            return self._steady_state_sparse(W)
+        return self.solve_steady_state_batch(np.asarray(W)[np.newaxis])[0]
 
-        # Find the eigenvector corresponding to eigenvalue ≈ 0
-        zero_idx = np.argmin(np.abs(eigenvalues))
+    def _steady_state_sparse(self, W) -> np.ndarray:
+        """Steady state of a sparse W.
 
-        P_ss = np.real(eigenvectors[:, zero_idx])
+        Uses the pinned-state solver, whose ordering and structure are
+        reused for every W with the same sparsity pattern. If the pinned
+        system is singular, falls back to a sparse normalization-row solve
+        and finally to the eigenvector method.
+        """
+        P_ss = self._sparse_steady_state.solve(W)
+        if P_ss is not None:
+            P_ss = np.maximum(P_ss, 0)
+            return P_ss / np.sum(P_ss)
+
+        W = sp.csr_matrix(W)
+        n_states = W.shape[0]
+        scale = abs(W).max() or 1.0
+
+        A = sp.vstack([W[:-1], sp.csr_matrix(np.full((1, n_states), scale))], format='csc')
+        b = np.zeros(n_states)
+        b[-1] = scale
+
+        with warnings.catch_warnings():
+            # Singular systems are handled by the eigenvector fallback
+            warnings.simplefilter('ignore', MatrixRankWarning)
+            P_ss = spsolve(A, b)
+        if not np.all(np.isfinite(P_ss)):
+            return self._steady_state_eig(W.toarray())
+
+        P_ss = np.maximum(P_ss, 0)
+        return P_ss / np.sum(P_ss)
+
+    def solve_steady_state_batch(self, W_stack: np.ndarray) -> np.ndarray:
+        """Find the steady states of a stack of rate matrices.
+
+        Each steady state is found by replacing the last balance equation
+        of W @ P = 0 with the normalization sum(P) = 1 and solving the
+        resulting linear system. All systems are solved in one batched
+        LAPACK call.
+
+        Parameters
+        ----------
+        W_stack : np.ndarray
+            Rate matrices with shape (..., n_states, n_states).
+
+        Returns
+        -------
+        P_ss : np.ndarray
+            Normalized steady-state populations with shape (..., n_states).
 
-        # Normalize to sum to 1
-        P_ss = P_ss / np.sum(P_ss)
+        Notes
+        -----
+        Matrices whose normalized system is singular (e.g. reducible models
+        with several stationary states) fall back to the eigenvector of the
+        eigenvalue closest to zero.
+        """
+        W_stack = np.asarray(W_stack, dtype=float)
+        batch_shape = W_stack.shape[:-2]
+        n_states = W_stack.shape[-1]
+        W_flat = W_stack.reshape(-1, n_states, n_states)
+
+        # Normalization row, scaled to the magnitude of each matrix so the
+        # system stays well balanced (rates are ~1e6-1e9 1/s)
+        scale = np.max(np.abs(W_flat), axis=(1, 2))
+        scale[scale == 0] = 1.0
+
+        A = W_flat.copy()
+        A[:, -1, :] = scale[:, np.newaxis]
+        b = np.zeros((len(W_flat), n_states, 1))
+        b[:, -1, 0] = scale
+
+        try:
+            P_ss = np.linalg.solve(A, b)[:, :, 0]
+        except np.linalg.LinAlgError:
+            P_ss = np.full((len(W_flat), n_states), np.nan)
+            for i in range(len(W_flat)):
+                try:
+                    P_ss[i] = np.linalg.solve(A[i], b[i])[:, 0]
+                except np.linalg.LinAlgError:
+                    pass
+
+        for i in np.flatnonzero(~np.all(np.isfinite(P_ss), axis=1)):
+            P_ss[i] = self._steady_state_eig(W_flat[i])
 
         # Ensure non-negative (should be, but fix numerical issues)
         P_ss = np.maximum(P_ss, 0)
-        P_ss = P_ss / np.sum(P_ss)
+        P_ss = P_ss / np.sum(P_ss, axis=1, keepdims=True)
+
+        return P_ss.reshape(batch_shape + (n_states,))
+
+    def solve_steady_state_sensitivity(
+        self,
+        W: np.ndarray,
+        dW: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Steady state and its derivatives with respect to parameters.
+
+        The steady state solves A @ P = b, where A is W with its last row
+        replaced by the (constant) normalization row. Differentiating gives
+        A @ dP/dθ_k = -(dW_k @ P) with the last entry set to zero, so all
+        derivatives reuse the single LU factorization of A. Stacks of rate
+        matrices are solved in two batched LAPACK calls.
+
+        Parameters
+        ----------
+        W : np.ndarray
+            Rate matrix with shape (n_states, n_states), or a stack with
+            shape (..., n_states, n_states), in units of 1/s.
+        dW : np.ndarray
+            Derivatives dW/dθ with shape (n_params, n_states, n_states),
+            shared by every matrix of the stack.
 
-        return P_ss
+        Returns
+        -------
+        P_ss : np.ndarray
+            Normalized steady-state populations with shape (..., n_states).
+        dP_ss : np.ndarray
+            Derivatives with shape (..., n_params, n_states).
+
+        Raises
+        ------
+        ValueError
+            If a steady state is not unique (singular normalized system).
+        """
+        W = np.asarray(W, dtype=float)
+        dW = np.asarray(dW, dtype=float)
+        n_states = W.shape[-1]
+
+        scale = np.max(np.abs(W), axis=(-2, -1))
+        scale = np.where(scale == 0, 1.0, scale)
+        A = W.copy()
+        A[..., -1, :] = scale[..., np.newaxis]
+
+        if W.ndim == 2:
+            try:
+                with warnings.catch_warnings():
+                    # A singular factorization is reported below instead
+                    warnings.simplefilter('ignore', LinAlgWarning)
+                    lu = lu_factor(A, check_finite=False)
+            except (np.linalg.LinAlgError, ValueError):
+                lu = None
+            if lu is None or np.any(np.diag(lu[0]) == 0):
+                raise ValueError("Steady state is not unique; sensitivities are undefined")
+            solve = partial(lu_solve, lu)
+        else:
+            def solve(b):
+                try:
+                    return np.linalg.solve(A, b)
+                except np.linalg.LinAlgError:
+                    raise ValueError(
+                        "Steady state is not unique; sensitivities are undefined"
+                    ) from None
+
+        b = np.zeros(W.shape[:-1] + (1,))
+        b[..., -1, 0] = scale
+        P_ss = solve(b)[..., 0]
+
+        rhs = -np.einsum('kij,...j->...ik', dW, P_ss)
+        rhs[..., -1, :] = 0.0
+        dP_ss = np.swapaxes(solve(rhs), -1, -2)
+        return P_ss, dP_ss
+
+    @staticmethod
+    def _steady_state_eig(W: np.ndarray) -> np.ndarray:
+        """Steady state from the eigenvector with eigenvalue closest to zero."""
+        eigenvalues, eigenvectors = np.linalg.eig(W)
+        zero_idx = np.argmin(np.abs(eigenvalues))
+
+        P_ss = np.real(eigenvectors[:, zero_idx])
+        return P_ss / np.sum(P_ss)
 
     def compute_photon_emission(
         self,
@@ -171,7 +892,8 @@ class RateSolver:
         Parameters
         ----------
         populations : np.ndarray
-            Population array with shape (n_times, n_states).
+            Population array with shape (n_times, n_states), or any
+            batch shape (..., n_states).
         radiative_rates : np.ndarray
             Radiative decay rates for excited states in MHz.
         excited_state_indices : np.ndarray
@@ -180,7 +902,8 @@ class RateSolver:
         Returns
         -------
         emission_rate : np.ndarray
-            Photon emission rate at each time point (arbitrary units).
+            Photon emission rate at each time point (arbitrary units),
+            with shape populations.shape[:-1].
         """
         n_es = len(excited_state_indices)
         if len(radiative_rates) != n_es:
@@ -189,9 +912,5 @@ class RateSolver:
                 f"number of excited states ({n_es})"
             )
 
-        emission_rate = np.zeros(len(populations))
-
-        for i, es_idx in enumerate(excited_state_indices):
-            emission_rate += populations[:, es_idx] * radiative_rates[i]
-
-        return emission_rate
+        populations = np.asarray(populations)
+        return populations[..., excited_state_indices] @ np.asarray(radiative_rates, dtype=float)
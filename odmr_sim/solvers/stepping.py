@@ -0,0 +1,158 @@
+"""
+Propagator stepping on uniform time grids.
+
+On a grid t_k = t_0 + k*dt the solution of dP/dt = W @ P satisfies
+
+    P(t_{k+1}) = U @ P(t_k),    U = exp(W*dt)
+
+so one matrix exponential replaces one per time point.
+"""
+
+import numpy as np
+from typing import Optional
+from scipy.linalg import expm
+
+
+def is_uniform_grid(t_eval: np.ndarray, rtol: float = 1e-9) -> bool:
+    """Check whether time points are equally spaced.
+
+    Parameters
+    ----------
+    t_eval : np.ndarray
+        Time points in seconds.
+    rtol : float, optional
+        Relative tolerance on the spacing, measured against the mean step.
+
+    Returns
+    -------
+    uniform : bool
+        True if t_eval is increasing with constant spacing.
+    """
+    t_eval = np.asarray(t_eval, dtype=float)
+    if t_eval.ndim != 1 or len(t_eval) < 2:
+        return False
+
+    steps = np.diff(t_eval)
+    dt = (t_eval[-1] - t_eval[0]) / (len(t_eval) - 1)
+    if dt <= 0:
+        return False
+
+    # Allow for the round-off of linspace itself at large offsets
+    tol = rtol * dt + 4 * np.finfo(float).eps * np.max(np.abs(t_eval))
+    return bool(np.all(np.abs(steps - dt) <= tol))
+
+
+class UniformStepper:
+    """Repeated application of a single-step propagator on a uniform grid.
+
+    The one-step propagator U = exp(W*dt) is computed once; every further
+    time point costs one matrix-vector product. To bound the accumulation
+    of round-off, the state is re-anchored to the exact solution
+    exp(W*t_k) @ P0 every ``reanchor_every`` steps.
+
+    Parameters
+    ----------
+    W : np.ndarray
+        Rate matrix with shape (n_states, n_states) in units of 1/s.
+    reanchor_every : int, optional
+        Number of steps between exact re-anchoring evaluations.
+        Default is 256.
+
+    Examples
+    --------
+    >>> stepper = UniformStepper(W)
+    >>> populations = stepper.propagate(P0, np.linspace(0, 1e-5, 10000))
+    """
+
+    def __init__(self, W: np.ndarray, reanchor_every: int = 256):
+        if reanchor_every < 1:
+            raise ValueError("reanchor_every must be at least 1")
+
+        self.W = np.asarray(W, dtype=float)
+        self.reanchor_every = reanchor_every
+
+        # One-step propagators, keyed by step size
+        self._step_cache = {}
+
+    def step_propagator(self, dt: float) -> np.ndarray:
+        """Get the one-step propagator exp(W*dt), computing it on first use.
+
+        Parameters
+        ----------
+        dt : float
+            Step size in seconds.
+
+        Returns
+        -------
+        U : np.ndarray
+            Propagator with shape (n_states, n_states).
+        """
+        U = self._step_cache.get(dt)
+        if U is None:
+            U = expm(self.W * dt)
+            self._step_cache[dt] = U
+        return U
+
+    def propagate(
+        self,
+        P0: np.ndarray,
+        t_eval: np.ndarray,
+        weights: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """Evaluate P(t) = exp(W*t) @ P0 on a uniform time grid.
+
+        Parameters
+        ----------
+        P0 : np.ndarray
+            Initial population vector with shape (n_states,).
+        t_eval : np.ndarray
+            Equally spaced time points in seconds.
+        weights : np.ndarray, optional
+            Observable weights with shape (n_obs, n_states). If given, only
+            weights @ P(t) is stored at each step.
+
+        Returns
+        -------
+        populations : np.ndarray
+            Population array with shape (len(t_eval), n_states), or the
+            observables with shape (len(t_eval), n_obs) if weights is given.
+
+        Raises
+        ------
+        ValueError
+            If t_eval is not a uniform grid.
+        """
+        t_eval = np.asarray(t_eval, dtype=float)
+        P0 = np.asarray(P0, dtype=float)
+        n_times = len(t_eval)
+
+        if weights is not None:
+            weights = np.atleast_2d(np.asarray(weights, dtype=float))
+        n_out = len(P0) if weights is None else weights.shape[0]
+
+        def project(P):
+            return P if weights is None else weights @ P
+
+        populations = np.zeros((n_times, n_out))
+        if n_times == 0:
+            return populations
+        if n_times == 1:
+            populations[0] = project(expm(self.W * t_eval[0]) @ P0)
+            return populations
+
+        if not is_uniform_grid(t_eval):
+            raise ValueError("UniformStepper requires equally spaced time points")
+
+        dt = (t_eval[-1] - t_eval[0]) / (n_times - 1)
+        U = self.step_propagator(dt)
+
+        P = None
+        for k in range(n_times):
+            if k % self.reanchor_every == 0:
+                # Exact anchor bounds the error accumulated by stepping
+                P = expm(self.W * t_eval[k]) @ P0
+            else:
+                P = U @ P
+            populations[k] = project(P)
+
+        return populations
@@ -66,6 +66,16 @@ class TestSevenLevelModel:
         assert len(P0) == 7
         np.testing.assert_almost_equal(np.sum(P0), 1.0)
 
+    def test_default_initial_state(self):
+        """Test the default initial state of seven-level and generic models."""
+        model = SevenLevelModel()
+        np.testing.assert_array_equal(
+            model.get_default_initial_state(), model.get_ground_state_mixed()
+        )
+        np.testing.assert_array_equal(
+            RateModel(n_states=4).get_default_initial_state(), [0.5, 0.5, 0.0, 0.0]
+        )
+
 
 class TestPresets:
     """Tests for preset configurations."""
@@ -97,3 +107,115 @@ class TestPresets:
         """Test NV configuration presets are 7-level models."""
         model = get_preset("g4_g9_90dp")
         assert model.n_states == 7
+
+
+class TestCompiledRateModel:
+    """Tests for compiled (batched) rate-matrix construction."""
+
+    def test_build_rate_matrices_matches_single(self):
+        """Test stacked rate matrices match one-at-a-time construction."""
+        model = SevenLevelModel()
+        gammas = np.array([0.0, 0.1, 12.8])
+        W_stack = model.build_rate_matrices(gamma=gammas, kmw_minus=1.0)
+        assert W_stack.shape == (3, 7, 7)
+        for gamma, W in zip(gammas, W_stack):
+            np.testing.assert_allclose(
+                W, model.build_rate_matrix(gamma=gamma, kmw_minus=1.0)
+            )
+
+    def test_build_rate_matrices_broadcast(self):
+        """Test parameter arrays broadcast to an N-D stack."""
+        model = SevenLevelModel()
+        W_stack = model.build_rate_matrices(
+            gamma=np.array([0.1, 1.0])[:, None],
+            kmw_minus=np.array([0.0, 1.0, 2.0])[None, :],
+        )
+        assert W_stack.shape == (2, 3, 7, 7)
+        np.testing.assert_array_almost_equal(np.sum(W_stack, axis=-2), 0.0)
+
+    def test_compile_invalidated_by_set_rate(self):
+        """Test changing a rate rebuilds the compiled model."""
+        model = RateModel(n_states=2)
+        model.set_rate(0, 1, 1.0)
+        assert model.build_rate_matrix()[1, 0] == 1e6
+        model.set_rate(0, 1, 2.0)
+        assert model.build_rate_matrix()[1, 0] == 2e6
+
+    def test_build_sparse_matches_dense(self):
+        """Test the sparse rate matrix equals the dense one."""
+        import scipy.sparse as sp
+        model = SevenLevelModel()
+        W_sparse = model.build_rate_matrix(gamma=1.0, kmw_plus=0.5, sparse='csc')
+        assert sp.issparse(W_sparse) and W_sparse.format == 'csc'
+        np.testing.assert_allclose(
+            W_sparse.toarray(),
+            model.build_rate_matrix(gamma=1.0, kmw_plus=0.5)
+        )
+        with pytest.raises(ValueError):
+            model.build_rate_matrix(gamma=1.0, sparse='lil')
+
+    def test_parameter_derivatives(self):
+        """Test dW/dθ and PL weight derivatives match rate-matrix differences."""
+        model = SevenLevelModel()
+        dW = model.rate_matrix_derivatives(['gamma', 'k41', (0, 2)])
+        W = model.build_rate_matrix(gamma=1.0)
+        np.testing.assert_allclose(dW[0], model.build_rate_matrix(gamma=2.0) - W)
+        np.testing.assert_allclose(
+            dW[1], model.compile().build(rates={(3, 0): model.k41 + 1.0}, gamma=1.0) - W
+        )
+        np.testing.assert_allclose(np.sum(dW[2], axis=0), 0.0)
+
+        dweights = model.observable_weight_derivatives(['gamma', 'k41', 'k47'], ['pl'])
+        assert dweights.shape == (3, 1, 7)
+        np.testing.assert_array_equal(dweights[:, 0, 3], [0.0, 1.0, 0.0])
+        with pytest.raises(ValueError):
+            model.rate_matrix_derivatives(['k99'])
+
+
+class TestObservables:
+    """Tests for named linear observables."""
+
+    def test_seven_level_observables_batched(self):
+        """Test standard observables evaluate over batched populations."""
+        model = SevenLevelModel(k41=60.0, k52=50.0, k63=40.0)
+        populations = np.random.default_rng(0).random((4, 3, 7))
+        values = model.evaluate_observables(populations)
+
+        assert set(values) == {'pl', 'es_total', 'gs0', 'singlet'}
+        assert values['pl'].shape == (4, 3)
+        np.testing.assert_allclose(
+            values['pl'], populations[..., 3:6] @ np.array([60.0, 50.0, 40.0])
+        )
+        np.testing.assert_allclose(values['es_total'], populations[..., 3:6].sum(axis=-1))
+        np.testing.assert_allclose(values['singlet'], populations[..., 6])
+
+    def test_transition_observable_follows_rates(self):
+        """Test transition-based weights track set_rate and overrides."""
+        model = RateModel(n_states=2)
+        model.set_rate(1, 0, 10.0)
+        model.add_observable('flux', transitions=[(1, 0)])
+        P = np.array([0.5, 0.5])
+        assert model.evaluate_observables(P)['flux'] == 5.0
+
+        model.set_rate(1, 0, 20.0)
+        assert model.evaluate_observables(P)['flux'] == 10.0
+
+        swept = model.evaluate_observables(
+            np.tile(P, (3, 1)), rates={(1, 0): np.array([1.0, 2.0, 3.0])}
+        )
+        np.testing.assert_allclose(swept['flux'], [0.5, 1.0, 1.5])
+
+        with pytest.raises(ValueError):
+            model.evaluate_observables(P, ['missing'])
+
+    def test_resolve_photon_transitions(self):
+        """Test photon transitions default to the 'pl' observable and are validated."""
+        model = SevenLevelModel()
+        assert model.resolve_photon_transitions() == model.observable_transitions('pl')
+        assert model.resolve_photon_transitions([[3, 0]]) == [(3, 0)]
+        with pytest.raises(ValueError):
+            model.resolve_photon_transitions([(3, 9)])
+        with pytest.raises(ValueError):
+            model.resolve_photon_transitions([])
+        with pytest.raises(ValueError):
+            RateModel(n_states=2).resolve_photon_transitions()
@@ -2,8 +2,14 @@
 
 import pytest
 import numpy as np
-from odmr_sim.models import get_preset
-from odmr_sim.simulations import ODMRSimulation, InitializationSimulation
+from odmr_sim.models import SevenLevelModel, get_preset
+from odmr_sim.models.presets import get_preset_info
+from odmr_sim.simulations import (
+    ODMRSimulation, InitializationSimulation, GridSweep,
+    PulseSegment, PulseSequenceSimulation,
+    ContrastData, ReadoutData, RateFitter, ReadoutSimulation,
+    PhotonTrajectorySimulation, PhotonCorrelationSimulation,
+)
 
 
 class TestODMRSimulation:
@@ -32,6 +38,19 @@ class TestODMRSimulation:
         )
         assert isinstance(contrast, float)
 
+    def test_compute_contrast_time_integrated(self, simulation):
+        """Test time-integrated contrast tends to the steady-state value."""
+        contrast = simulation.compute_contrast(
+            gamma=1.0, kmw_minus=1.0, kmw_plus=1.0,
+            method='time_integrated', t_integration=1e-1
+        )
+        contrast_ss = simulation.compute_contrast(
+            gamma=1.0, kmw_minus=1.0, kmw_plus=1.0,
+            method='steady_state'
+        )
+        assert isinstance(contrast, float)
+        assert contrast == pytest.approx(contrast_ss, rel=1e-2)
+
     def test_contrast_positive_for_nv(self, simulation):
         """Test NV bulk gives positive contrast."""
         contrast = simulation.compute_contrast(
@@ -49,6 +68,110 @@ class TestODMRSimulation:
         assert len(result_gammas) == 3
         assert len(contrasts) == 3
 
+    def test_reference_cache_reused(self, simulation):
+        """Test the no-MW reference is solved once per gamma."""
+        spectrum = simulation.run_spectrum(gamma=0.1, n_points=51)
+        assert list(simulation._reference_cache) == [0.1]
+
+        # Cached and freshly computed contrasts agree point by point
+        freq = spectrum['frequencies'][10]
+        params = spectrum['params']
+        kmw_minus = params['kmw_amplitude'] * simulation._lorentzian(
+            freq, params['peak_freq_minus'], params['linewidth'])
+        kmw_plus = params['kmw_amplitude'] * simulation._lorentzian(
+            freq, params['peak_freq_plus'], params['linewidth'])
+        simulation.clear_cache()
+        contrast = simulation.compute_contrast(
+            gamma=0.1, kmw_minus=kmw_minus, kmw_plus=kmw_plus
+        )
+        assert contrast == pytest.approx(spectrum['contrast'][10])
+
+    def test_run_spectrum_custom_frequencies_batched(self, simulation):
+        """Test explicit frequency arrays are solved in chunks."""
+        frequencies = np.concatenate([
+            np.linspace(2.5, 2.85, 40), np.linspace(2.85, 2.90, 200)
+        ])
+        full = simulation.run_spectrum(gamma=0.1, frequencies=frequencies)
+        chunked = simulation.run_spectrum(
+            gamma=0.1, frequencies=frequencies, batch_size=17
+        )
+        assert full['contrast'].shape == frequencies.shape
+        np.testing.assert_allclose(chunked['contrast'], full['contrast'])
+
+    @pytest.mark.parametrize('method', ['steady_state', 'transient', 'time_integrated'])
+    def test_contrast_gradient_matches_finite_differences(self, simulation, method):
+        """Test the analytic contrast gradient against central differences."""
+        model = simulation.model
+        kwargs = dict(gamma=0.5, kmw_minus=2.0, kmw_plus=0.3, method=method,
+                      t_integration=2e-7)
+        contrast, gradient = simulation.compute_contrast_with_gradient(**kwargs)
+        assert contrast == pytest.approx(simulation.compute_contrast(**kwargs))
+        assert list(gradient)[:3] == ['gamma', 'kmw_minus', 'kmw_plus']
+        assert len(gradient) == 12
+
+        h = 1e-3
+        for name in ['gamma', 'kmw_minus', 'k41', 'k47', 'k71']:
+            values = []
+            for step in (h, -h):
+                kind, key = model.resolve_parameter(name)
+                if kind == 'param':
+                    shifted = dict(kwargs, **{name: kwargs[name] + step})
+                    values.append(simulation.compute_contrast(**shifted))
+                else:
+                    rate = model.compile().rates[key]
+                    model.set_rate(*key, rate + step)
+                    values.append(simulation.compute_contrast(**kwargs))
+                    model.set_rate(*key, rate)
+            finite_difference = (values[0] - values[1]) / (2 * h)
+            assert gradient[name] == pytest.approx(finite_difference, rel=1e-4, abs=1e-12)
+
+    @pytest.mark.parametrize('method', ['steady_state', 'transient', 'time_integrated'])
+    def test_contrast_gradient_dark_reference(self, simulation, method):
+        """Test gamma=0 gives zero contrast and gradient, as compute_contrast does."""
+        import warnings
+        kwargs = dict(gamma=0.0, kmw_minus=1.0, kmw_plus=0.0, method=method,
+                      t_integration=2e-7)
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            contrast, gradient = simulation.compute_contrast_with_gradient(**kwargs)
+        assert contrast == simulation.compute_contrast(**kwargs) == 0.0
+        assert all(value == 0.0 for value in gradient.values())
+
+    def test_sensitivity_map_matches_spectrum(self, simulation):
+        """Test η against a finite-difference slope of a dense spectrum."""
+        gamma, amplitude, linewidth = 1.0, 0.5, 0.005
+        result = simulation.sensitivity_map(
+            [0.1, gamma], [amplitude, 2.0], [linewidth, 0.01],
+            detunings=np.linspace(0.01, 5, 2000)
+        )
+        assert result['sensitivity'].shape == (2, 2, 2)
+        # Linewidth only rescales the slope: η ∝ linewidth
+        np.testing.assert_allclose(
+            result['sensitivity'][..., 1], 2 * result['sensitivity'][..., 0]
+        )
+        optimum = result['optimum']
+        assert optimum['sensitivity'] == np.min(result['sensitivity'])
+
+        frequencies = 2.87 + np.linspace(-5 * linewidth, 5 * linewidth, 20001)
+        spectrum = simulation.run_spectrum(
+            gamma=gamma, frequencies=frequencies, peak_freq_minus=2.87,
+            peak_freq_plus=100.0, linewidth=linewidth, kmw_amplitude=amplitude
+        )
+        rate = result['pl_rate'][1] * (1 - spectrum['contrast'])
+        slope = np.gradient(rate, (frequencies[1] - frequencies[0]) * 1e9)
+        with np.errstate(divide='ignore'):
+            eta = np.sqrt(rate) / (28.024951e9 * np.abs(slope))
+        assert result['sensitivity'][1, 0, 0] == pytest.approx(np.min(eta[1:-1]), rel=1e-4)
+        assert result['contrast'][1, 0] == pytest.approx(np.max(spectrum['contrast']), rel=1e-6)
+
+    def test_sensitivity_map_dark_gamma(self, simulation):
+        """Test gamma=0 gets η = inf and never becomes the optimum."""
+        result = simulation.sensitivity_map([0.0, 1.0], [0.5], [0.005])
+        assert np.all(np.isinf(result['sensitivity'][0]))
+        assert np.all(np.isfinite(result['sensitivity'][1]))
+        assert result['optimum']['gamma'] == 1.0
+        assert result['contrast'][0, 0] == 0.0
+
     def test_invalid_method_raises(self, simulation):
         """Test invalid method raises error."""
         with pytest.raises(ValueError):
@@ -86,3 +209,427 @@ class TestInitializationSimulation:
         assert len(results) == 3
         for result in results:
             assert 'populations' in result
+
+    def test_observables_only(self, simulation):
+        """Test observable-only runs match projected populations."""
+        full = simulation.run(gamma=0.1, t_max=1e-3, n_points=100)
+        projected = simulation.run(
+            gamma=0.1, t_max=1e-3, n_points=100, observables=['gs0', 'pl']
+        )
+        assert projected['populations'] is None
+        np.testing.assert_allclose(
+            projected['observables']['gs0'], full['populations'][:, 0], atol=1e-12
+        )
+
+        results = simulation.run_sweep_gamma(
+            [0.1, 1.0], t_max=1e-3, n_points=50, observables=['es_total']
+        )
+        assert results[1]['observables']['es_total'].shape == (50,)
+
+
+class TestReadoutSimulation:
+    """Tests for ReadoutSimulation class."""
+
+    def test_observables_only(self):
+        """Test readout can return only observables."""
+        sim = ReadoutSimulation(SevenLevelModel())
+        full = sim.run(gamma=12.8, n_points=200)
+        projected = sim.run(gamma=12.8, n_points=200, observables=['es_total'])
+        assert projected['populations'] is None
+        np.testing.assert_allclose(projected['es_total'], full['es_total'], atol=1e-12)
+
+    def test_window_optimizer(self):
+        """Test prefix integrals match quadrature and the optimum is the SNR maximum."""
+        sim = ReadoutSimulation(get_preset('nv_bulk'))
+        result = sim.optimize_window(
+            gamma=12.8, t_max=2e-6, n_points=400, collection_efficiency=0.03
+        )
+        t = result['t']
+
+        for k, state in enumerate(['gs0', 'gs_minus']):
+            pl = sim.run(
+                gamma=12.8, initial_state=state, t_max=2e-6, n_points=400,
+                observables=['pl']
+            )['observables']['pl'] * 1e6 * 0.03
+            trapz = np.concatenate([[0], np.cumsum(np.diff(t) * (pl[1:] + pl[:-1]) / 2)])
+            np.testing.assert_allclose(
+                result['cumulative'][:, k], trapz, atol=1e-3 * trapz[-1]
+            )
+
+        snr = result['snr']
+        assert np.all(np.isnan(np.tril(snr)[np.tril_indices(400)]))
+        assert result['snr_max'] == np.nanmax(snr)
+        i, j = result['index']
+        bright, dark = result['counts']
+        assert result['window'] == (t[i], t[j])
+        assert np.isclose((bright - dark) / np.sqrt(bright + dark), result['snr_max'])
+        assert 0 <= t[i] < t[j] < 1e-6
+
+
+class TestGridSweep:
+    """Tests for GridSweep class."""
+
+    @pytest.fixture
+    def sweep(self):
+        """Create grid sweep with a small chunk budget for testing."""
+        model = get_preset('g9_g8_30dp')
+        return GridSweep(model, max_memory_mb=0.005)
+
+    def test_grid_shapes(self, sweep):
+        """Test N-D result arrays follow the axis order."""
+        result = sweep.run(
+            axes={
+                'gamma': [0.1, 1.0],
+                'kmw_minus': [0.0, 1.0, 2.0],
+                'k71': [100.0, 279.1],
+            },
+            kmw_plus=0.5,
+        )
+        assert result['dims'] == ('gamma', 'kmw_minus', 'k71')
+        assert result['contrast'].shape == (2, 3, 2)
+        assert result['pl'].shape == (2, 3, 2)
+        assert result['populations'].shape == (2, 3, 2, 7)
+
+    def test_grid_matches_compute_contrast(self, sweep):
+        """Test grid contrasts match single-point contrasts."""
+        result = sweep.run(axes={'gamma': [0.1, 1.0], 'kmw_minus': [0.5, 2.0]})
+        odmr = ODMRSimulation(sweep.model)
+        for i, gamma in enumerate(result['coords']['gamma']):
+            for j, kmw in enumerate(result['coords']['kmw_minus']):
+                expected = odmr.compute_contrast(gamma=gamma, kmw_minus=kmw)
+                assert result['contrast'][i, j] == pytest.approx(expected)
+
+    def test_fixed_rate_axis(self, sweep):
+        """Test sweeping a named fixed rate matches a rebuilt model."""
+        result = sweep.run(axes={'k47': [0.007, 1.0]}, gamma=0.5, kmw_minus=1.0)
+        params = dict(get_preset_info('g9_g8_30dp'))
+        params.update(k47=1.0)
+        params.pop('description')
+        params.pop('references')
+        odmr = ODMRSimulation(SevenLevelModel(**params))
+        expected = odmr.compute_contrast(gamma=0.5, kmw_minus=1.0)
+        assert result['contrast'][1] == pytest.approx(expected)
+
+    def test_unknown_axis_raises(self, sweep):
+        """Test unknown parameter names raise error."""
+        with pytest.raises(ValueError):
+            sweep.run(axes={'not_a_rate': [1.0]})
+
+
+class TestParallelSweeps:
+    """Tests for executor-backed sweeps."""
+
+    @pytest.mark.parametrize("executor", ["threads", "processes"])
+    def test_sweep_gamma_executor_matches_serial(self, executor):
+        """Test parallel sweeps reassemble results in order."""
+        simulation = ODMRSimulation(get_preset('nv_bulk'))
+        gammas = np.logspace(-2, 1, 9)
+        _, serial = simulation.sweep_gamma(gammas, kmw_minus=1.0)
+        _, parallel = simulation.sweep_gamma(
+            gammas, kmw_minus=1.0, executor=executor, n_workers=2
+        )
+        np.testing.assert_allclose(parallel, serial)
+
+    def test_sweep_gamma_threads_beyond_reference_cache(self):
+        """Test threaded sweeps with far more gammas than the reference cache holds."""
+        simulation = ODMRSimulation(get_preset('nv_bulk'), reference_cache_size=8)
+        gammas = np.linspace(0.1, 20, 50000)
+        _, serial = simulation.sweep_gamma(gammas, kmw_minus=1.0)
+        # Evictions used to race with lookups in other threads
+        for _ in range(3):
+            simulation.clear_cache()
+            _, parallel = simulation.sweep_gamma(
+                gammas, kmw_minus=1.0, executor='threads', n_workers=8
+            )
+            np.testing.assert_allclose(parallel, serial)
+        assert len(simulation._reference_cache) <= 8
+
+    def test_initialization_sweep_threads(self):
+        """Test threaded initialization sweep keeps gamma order."""
+        simulation = InitializationSimulation(get_preset('nv_bulk'))
+        gammas = [0.1, 0.3, 1.0]
+        results = simulation.run_sweep_gamma(
+            gammas, t_max=1e-3, n_points=20, executor='threads', n_workers=2
+        )
+        assert [r['params']['gamma'] for r in results] == gammas
+
+    def test_grid_sweep_processes(self):
+        """Test process-parallel grid sweep matches serial."""
+        sweep = GridSweep(get_preset('nv_bulk'), max_memory_mb=0.005)
+        axes = {'gamma': [0.1, 1.0, 10.0], 'kmw_minus': [0.0, 1.0]}
+        serial = sweep.run(axes=axes)
+        parallel = sweep.run(axes=axes, executor='processes', n_workers=2)
+        np.testing.assert_allclose(parallel['contrast'], serial['contrast'])
+
+    def test_unknown_executor_raises(self):
+        """Test unknown executor names raise error."""
+        simulation = ODMRSimulation(get_preset('nv_bulk'))
+        with pytest.raises(ValueError):
+            simulation.sweep_gamma([0.1], executor='gpu')
+
+    def test_initialization_sweep_processes_shared_output(self, tmp_path):
+        """Test process workers write populations into a memmap output."""
+        simulation = InitializationSimulation(get_preset('nv_bulk'))
+        gammas = [0.1, 0.3, 1.0]
+        out = np.memmap(
+            tmp_path / 'pops.dat', dtype=float, mode='w+', shape=(3, 20, 7)
+        )
+        results = simulation.run_sweep_gamma(
+            gammas, t_max=1e-3, n_points=20, executor='processes',
+            n_workers=2, out=out
+        )
+        serial = simulation.run_sweep_gamma(gammas, t_max=1e-3, n_points=20)
+        for result, expected in zip(results, serial):
+            np.testing.assert_allclose(result['populations'], expected['populations'])
+        np.testing.assert_allclose(out[2], serial[2]['populations'])
+
+    def test_initialization_sweep_processes_shared_memory(self, monkeypatch):
+        """Test the default output is written in place, without a shared-memory copy."""
+        from odmr_sim.simulations import parallel
+
+        def no_copy(*args, **kwargs):
+            raise AssertionError("default outputs must not be copied")
+
+        monkeypatch.setattr(parallel.shared_memory, 'SharedMemory', no_copy)
+        simulation = InitializationSimulation(get_preset('nv_bulk'))
+        gammas = [0.1, 1.0]
+        results = simulation.run_sweep_gamma(
+            gammas, t_max=1e-3, n_points=20, executor='processes', n_workers=2
+        )
+        expected = simulation.run(gamma=1.0, t_max=1e-3, n_points=20)
+        assert type(results[1]['populations']) is np.ndarray
+        np.testing.assert_allclose(results[1]['populations'], expected['populations'])
+
+
+class TestPulseSequenceSimulation:
+    """Tests for pulse-sequence simulations."""
+
+    @pytest.fixture
+    def sequence(self):
+        """Init, wait, MW and gated readout segments."""
+        return [
+            PulseSegment(3e-6, gamma=1.0, label='init'),
+            PulseSegment(1e-6, label='wait'),
+            PulseSegment(1e-7, kmw_minus=5.0, label='mw'),
+            PulseSegment(3e-7, gamma=1.0, gate=True, label='readout'),
+        ]
+
+    def test_single_segment_matches_solver(self):
+        """Test a constant segment reproduces solve_expm and the exact PL integral."""
+        from odmr_sim.solvers import RateSolver
+        model = SevenLevelModel()
+        sim = PulseSequenceSimulation(model)
+        P0 = model.get_ground_state_mixed()
+        result = sim.run([PulseSegment(2e-6, gamma=1.0, gate=True, n_points=20)], P0=P0)
+
+        solver = RateSolver()
+        W = model.build_rate_matrix(gamma=1.0)
+        np.testing.assert_allclose(
+            result['populations'], solver.solve_expm(W, P0, result['t']), atol=1e-10
+        )
+        weights = np.zeros(7)
+        weights[[3, 4, 5]] = [model.k41, model.k52, model.k63]
+        expected = solver.solve_time_integrated(W, P0, 2e-6) @ weights * 1e6
+        np.testing.assert_allclose(result['gated_counts'], [expected], rtol=1e-8)
+
+    def test_trace_and_fast_path_agree(self, sequence):
+        """Test whole-segment propagation matches the recorded trace."""
+        sim = PulseSequenceSimulation(SevenLevelModel())
+        traced = sim.run(sequence, n_repeats=5)
+        fast = sim.run(sequence, n_repeats=5, return_trace=False)
+
+        assert traced['populations'].shape == (1 + 5 * 200, 7)
+        np.testing.assert_allclose(fast['gated_counts'], traced['gated_counts'], rtol=1e-9)
+        np.testing.assert_allclose(fast['final_state'], traced['final_state'], atol=1e-12)
+        np.testing.assert_allclose(
+            sim.cycle_propagator(sequence)[-1, -1], 1.0
+        )
+
+    def test_propagators_cached_per_segment(self, sequence):
+        """Test repeated segments reuse propagators until the model changes."""
+        model = SevenLevelModel()
+        sim = PulseSequenceSimulation(model)
+        sim.run(sequence, n_repeats=3, return_trace=False)
+        assert len(sim._propagators) == 4
+
+        model.set_rate(SevenLevelModel.ES_0, SevenLevelModel.GS_0, 50.0, name='k41')
+        sim.run(sequence[:1], return_trace=False)
+        assert len(sim._propagators) == 1
+
+    def test_propagator_cache_follows_pl_weights(self, sequence):
+        """Test edited PL weights are not served from stale cached propagators."""
+        model = SevenLevelModel()
+        weights = model.observable_weights(['pl'])[0].copy()
+        sim = PulseSequenceSimulation(model, pl_weights=weights)
+        first = sim.run(sequence, n_repeats=2, return_trace=False)
+
+        weights *= 2.0
+        second = sim.run(sequence, n_repeats=2, return_trace=False)
+        np.testing.assert_allclose(second['gated_counts'], 2 * first['gated_counts'])
+
+    def test_periodic_steady_state_is_limit_of_repeats(self, sequence):
+        """Test the fixed point equals brute-force evolution over many cycles."""
+        sim = PulseSequenceSimulation(SevenLevelModel())
+        result = sim.run_periodic(sequence, n_convergence_cycles=200)
+
+        np.testing.assert_almost_equal(np.sum(result['populations']), 1.0)
+        assert 0 < result['relaxation_factor'] < 1
+        convergence = result['convergence']
+        assert convergence['cycle_states'].shape == (201, 7)
+        np.testing.assert_allclose(
+            convergence['cycle_states'][-1], result['populations'], atol=1e-9
+        )
+        np.testing.assert_allclose(
+            convergence['gated_counts'][-1], result['gated_counts'], rtol=1e-8
+        )
+
+    def test_invalid_segment_raises(self):
+        """Test invalid durations and empty sequences are rejected."""
+        with pytest.raises(ValueError):
+            PulseSegment(-1e-6)
+        with pytest.raises(ValueError):
+            PulseSequenceSimulation(SevenLevelModel()).run([])
+
+
+class TestRateFitter:
+    """Tests for RateFitter."""
+
+    @pytest.fixture
+    def datasets(self):
+        """Synthetic contrast curve and readout traces from a modified nv_bulk."""
+        truth = get_preset('nv_bulk')
+        truth.set_rate(SevenLevelModel.SINGLET, SevenLevelModel.GS_0, 4.0, name='k71')
+        truth.set_rate(SevenLevelModel.ES_0, SevenLevelModel.SINGLET, 15.0, name='k47')
+
+        gammas = np.logspace(-1, 1, 10)
+        sim = ODMRSimulation(truth)
+        contrast = [sim.compute_contrast(gamma=g, kmw_minus=1.0, kmw_plus=1.0) for g in gammas]
+        datasets = [ContrastData(contrast, gamma=gammas, kmw_minus=1.0, kmw_plus=1.0,
+                                 sigma=1e-3)]
+        for state in (SevenLevelModel.GS_0, SevenLevelModel.GS_MINUS):
+            trace = ReadoutSimulation(truth).run(
+                gamma=12.8, initial_state=state, t_max=3e-6, n_points=200,
+                observables=['pl']
+            )
+            datasets.append(ReadoutData(
+                trace['t'], 5.0 * trace['observables']['pl'], gamma=12.8,
+                initial_state=state, sigma=5.0
+            ))
+        return datasets
+
+    def test_jacobian_matches_finite_differences(self, datasets):
+        """Test the analytic Jacobian, including the free readout scale."""
+        fitter = RateFitter(get_preset('nv_bulk'), datasets)
+        x = fitter.initial_values() * 1.3
+        jacobian = fitter.jacobian(x)
+        assert jacobian.shape == (fitter.n_residuals, 6)
+
+        steps = x * 1e-6
+        finite_difference = np.stack([
+            (fitter.residuals(x + h * e) - fitter.residuals(x - h * e)) / (2 * h)
+            for e, h in zip(np.eye(len(x)), steps)
+        ], axis=1)
+        np.testing.assert_allclose(
+            jacobian, finite_difference, atol=1e-7 * np.max(np.abs(finite_difference))
+        )
+
+    def test_fit_recovers_rates(self, datasets):
+        """Test a multi-start fit recovers the rates of the synthetic data."""
+        model = get_preset('nv_bulk')
+        fitter = RateFitter(model, datasets, parameters=['k47', 'k71'])
+        result = fitter.fit(
+            starts=['nv_bulk', {'k71': 8.0}], executor='threads', n_workers=2
+        )
+        assert result['success']
+        assert len(result['starts']) == 2
+        assert set(result['dataset_costs']) == {0, 1, 2}
+        assert result['values']['k47'] == pytest.approx(15.0, rel=1e-5)
+        assert result['values']['k71'] == pytest.approx(4.0, rel=1e-5)
+        # The model itself is left untouched
+        assert model.k71 == 3.0
+
+    def test_invalid_parameters_raise(self, datasets):
+        """Test dynamic parameters and unknown presets are rejected."""
+        with pytest.raises(ValueError):
+            RateFitter(get_preset('nv_bulk'), datasets, parameters=['gamma'])
+        fitter = RateFitter(get_preset('nv_bulk'), datasets)
+        with pytest.raises(ValueError):
+            fitter.fit(starts=['no_such_preset'])
+
+
+class TestPhotonTrajectorySimulation:
+    """Tests for PhotonTrajectorySimulation."""
+
+    def test_photon_rates_match_steady_state(self):
+        """Test mean photon rates per channel against the steady-state fluxes."""
+        model = get_preset('nv_bulk')
+        sim = PhotonTrajectorySimulation(model)
+        params = {'gamma': 2.0, 'kmw_minus': 1.0}
+        t_max, n_emitters = 2e-5, 2000
+        result = sim.run(t_max, n_emitters, seed=3, **params)
+
+        P_ss = sim.solver.solve_steady_state(model.build_rate_matrix(**params))
+        for channel, (from_state, to_state) in enumerate(sim.photon_transitions):
+            rate = model.compile().rates[(from_state, to_state)] * 1e6
+            expected = rate * P_ss[from_state] * t_max * n_emitters
+            observed = np.sum(result['channels'] == channel)
+            assert abs(observed - expected) < 5 * np.sqrt(expected)
+
+    def test_streams_are_reproducible_and_grouped(self):
+        """Test seeding, per-emitter layout, thinning and binning."""
+        sim = PhotonTrajectorySimulation(SevenLevelModel())
+        first = sim.run(1e-5, 50, gamma=5.0, seed=7)
+        second = sim.run(1e-5, 50, gamma=5.0, seed=7)
+        np.testing.assert_array_equal(first['times'], second['times'])
+
+        offsets = first['offsets']
+        assert offsets[-1] == len(first['times']) == first['counts'].sum()
+        for i in range(50):
+            times = first['times'][offsets[i]:offsets[i + 1]]
+            assert np.all(np.diff(times) > 0)
+            assert np.all((times >= 0) & (times <= 1e-5))
+
+        thinned = sim.run(1e-5, 50, gamma=5.0, seed=7, detection_efficiency=0.1)
+        assert len(thinned['times']) < 0.2 * len(first['times'])
+
+        edges, counts = sim.bin_counts(first, 1e-6)
+        assert counts.shape == (50, 10)
+        np.testing.assert_array_equal(counts.sum(axis=1), first['counts'])
+
+
+class TestPhotonCorrelationSimulation:
+    """Tests for PhotonCorrelationSimulation."""
+
+    def test_g2_limits_and_propagator(self):
+        """Test antibunching, the long-delay limit and the direct expm result."""
+        from scipy.linalg import expm
+        model = get_preset('nv_bulk')
+        sim = PhotonCorrelationSimulation(model)
+        tau = np.logspace(-10, -3, 500)
+        result = sim.g2(tau, gamma=5.0)
+        g2 = result['g2']
+
+        assert g2[0] < 0.05
+        assert g2[-1] == pytest.approx(1.0, abs=1e-6)
+        assert np.max(g2) > 1.0  # bunching from the metastable singlet
+
+        W = model.build_rate_matrix(gamma=5.0)
+        weights = model.observable_weights(['pl'])[0]
+        for i in (100, 300):
+            expected = (weights @ expm(W * tau[i]) @ result['post_emission_state']
+                        / (weights @ result['steady_state']))
+            assert g2[i] == pytest.approx(expected, rel=1e-8)
+
+        # Symmetric in tau
+        np.testing.assert_allclose(sim.g2(-tau[:5], gamma=5.0)['g2'], g2[:5])
+
+    def test_rate_overrides(self):
+        """Test fixed-rate overrides change g2 without modifying the model."""
+        model = get_preset('nv_bulk')
+        sim = PhotonCorrelationSimulation(model)
+        tau = np.logspace(-9, -5, 50)
+        slower = sim.g2(tau, rates={(6, 0): 1.0}, gamma=5.0)
+        reference = sim.g2(tau, gamma=5.0)
+        # Slower singlet decay gives stronger bunching
+        assert np.max(slower['g2']) > np.max(reference['g2'])
+        assert model.compile().rates[(6, 0)] == 3.0
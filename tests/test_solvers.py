@@ -71,3 +71,242 @@ class TestRateSolver:
 
         P_ss = solver.solve_steady_state(W)
         assert np.all(P_ss >= -1e-10)  # Allow small numerical errors
+
+    def test_solve_expm_spectral_matches_pade(self, model_and_solver):
+        """Test spectral propagation agrees with per-point Padé."""
+        model, solver = model_and_solver
+        W = model.build_rate_matrix(gamma=0.1, kmw_minus=1.0, kmw_plus=0.0)
+        P0 = model.get_ground_state_mixed()
+        t_eval = np.logspace(-9, -1, 50)
+
+        pop_pade = solver.solve_expm(W, P0, t_eval, method='pade')
+        pop_spectral = solver.solve_expm(W, P0, t_eval, method='spectral')
+        np.testing.assert_allclose(pop_spectral, pop_pade, atol=1e-10)
+
+    def test_solve_expm_invalid_method_raises(self, model_and_solver):
+        """Test unknown expm method raises error."""
+        model, solver = model_and_solver
+        W = model.build_rate_matrix(gamma=0.1)
+        P0 = model.get_ground_state_mixed()
+        with pytest.raises(ValueError):
+            solver.solve_expm(W, P0, np.linspace(0, 1, 5), method='invalid')
+
+    def test_solve_expm_stepping_matches_pade(self, model_and_solver):
+        """Test uniform-grid stepping agrees with per-point Padé."""
+        model, solver = model_and_solver
+        W = model.build_rate_matrix(gamma=12.8, kmw_minus=0.0, kmw_plus=0.0)
+        P0 = model.get_initial_state(SevenLevelModel.GS_0)
+        t_eval = np.linspace(0, 1e-5, 600)
+
+        pop_pade = solver.solve_expm(W, P0, t_eval, method='pade')
+        pop_stepping = solver.solve_expm(W, P0, t_eval, method='stepping')
+        np.testing.assert_allclose(pop_stepping, pop_pade, atol=1e-10)
+
+    def test_solve_expm_auto_selects_and_reports(self, model_and_solver):
+        """Test 'auto' picks a path per grid and records it."""
+        import scipy.sparse as sp
+        model, solver = model_and_solver
+        W = model.build_rate_matrix(gamma=1.0, kmw_minus=1.0, kmw_plus=0.0)
+        P0 = model.get_ground_state_mixed()
+
+        t_log = np.logspace(-9, -1, 200)
+        pop = solver.solve_expm(W, P0, t_log, method='auto')
+        assert solver.last_method == 'spectral'
+        np.testing.assert_allclose(pop, solver.solve_expm(W, P0, t_log), atol=1e-8)
+
+        solver.solve_expm(W, P0, np.array([1e-6]), method='auto')
+        assert solver.last_method == 'pade'
+
+        solver.solve_expm(sp.csr_matrix(W), P0, t_log, method='auto')
+        assert solver.last_method == 'krylov'
+
+    def test_solve_expm_auto_uniform_grid(self, model_and_solver):
+        """Test long uniform grids use the eigendecomposition, short ones may step."""
+        model, solver = model_and_solver
+        W = model.build_rate_matrix(gamma=1.0, kmw_minus=1.0, kmw_plus=0.0)
+        P0 = model.get_ground_state_mixed()
+
+        solver.solve_expm(W, P0, np.linspace(0, 1e-6, 1000), method='auto')
+        assert solver.last_method == 'spectral'
+        solver.solve_expm(W, P0, np.linspace(0, 1e-6, 10), method='auto')
+        assert solver.last_method == 'stepping'
+
+    def test_compute_photon_emission_batched(self, model_and_solver):
+        """Test photon emission over batched populations."""
+        model, solver = model_and_solver
+        populations = np.random.default_rng(1).random((5, 2, 7))
+        emission = solver.compute_photon_emission(
+            populations, np.array([62.5, 62.5, 62.5]), np.array([3, 4, 5])
+        )
+        assert emission.shape == (5, 2)
+        np.testing.assert_allclose(
+            emission, model.evaluate_observables(populations, ['pl'])['pl']
+        )
+
+    @pytest.mark.parametrize("method", ["pade", "spectral", "stepping", "krylov"])
+    def test_solve_expm_weights_project(self, model_and_solver, method):
+        """Test observable weights give the projected populations."""
+        model, solver = model_and_solver
+        W = model.build_rate_matrix(gamma=1.0, kmw_minus=1.0, kmw_plus=0.0)
+        P0 = model.get_ground_state_mixed()
+        t_eval = np.linspace(0, 1e-5, 300)
+        weights = model.observable_weights(['pl', 'gs0'])
+
+        full = solver.solve_expm(W, P0, t_eval, method=method)
+        projected = solver.solve_expm(W, P0, t_eval, method=method, weights=weights)
+        assert projected.shape == (300, 2)
+        np.testing.assert_allclose(projected, full @ weights.T, atol=1e-10)
+
+    def test_is_uniform_grid(self):
+        """Test uniform grid detection."""
+        from odmr_sim.solvers import is_uniform_grid
+        assert is_uniform_grid(np.linspace(0, 1e-5, 1000))
+        assert is_uniform_grid(np.linspace(1e-3, 2e-3, 10000))
+        assert not is_uniform_grid(np.logspace(-9, -1, 100))
+        assert not is_uniform_grid(np.array([0.0]))
+
+    def test_steady_state_batch_matches_single(self, model_and_solver):
+        """Test batched steady states match one-at-a-time solves."""
+        model, solver = model_and_solver
+        W_stack = np.array([
+            model.build_rate_matrix(gamma=g, kmw_minus=1.0, kmw_plus=0.0)
+            for g in [0.01, 0.1, 1.0, 10.0]
+        ])
+
+        P_batch = solver.solve_steady_state_batch(W_stack)
+        assert P_batch.shape == (4, 7)
+        for W, P_ss in zip(W_stack, P_batch):
+            np.testing.assert_allclose(P_ss, solver.solve_steady_state(W))
+            np.testing.assert_array_almost_equal(W @ P_ss, 0.0, decimal=6)
+
+    def test_steady_state_reducible_falls_back(self, model_and_solver):
+        """Test singular normalized systems still return a steady state."""
+        model, solver = model_and_solver
+        W = model.build_rate_matrix(gamma=0.0, kmw_minus=0.0, kmw_plus=0.0)
+
+        P_ss = solver.solve_steady_state(W)
+        np.testing.assert_almost_equal(np.sum(P_ss), 1.0)
+        np.testing.assert_array_almost_equal(W @ P_ss, 0.0, decimal=6)
+
+    def test_solve_time_integrated_matches_quadrature(self, model_and_solver):
+        """Test exact integral agrees with fine-grid trapezoidal quadrature."""
+        from scipy.integrate import trapezoid
+        model, solver = model_and_solver
+        W = model.build_rate_matrix(gamma=1.0, kmw_minus=1.0, kmw_plus=0.0)
+        P0 = model.get_ground_state_mixed()
+        t_eval = np.linspace(0, 1e-5, 20001)
+
+        populations = solver.solve_expm(W, P0, t_eval, method='stepping')
+        expected = trapezoid(populations, t_eval, axis=0)
+        integral = solver.solve_time_integrated(W, P0, 1e-5)
+        np.testing.assert_allclose(integral, expected, rtol=1e-6, atol=1e-15)
+        np.testing.assert_almost_equal(np.sum(integral), 1e-5)
+
+    @pytest.mark.parametrize("integrated", [False, True])
+    def test_observable_sensitivity_matches_block_system(self, model_and_solver, integrated):
+        """Test adjoint observable gradients against the full block system."""
+        model, solver = model_and_solver
+        parameters = ['gamma', 'kmw_minus', 'k41', 'k47', 'k71']
+        dW = model.rate_matrix_derivatives(parameters)
+        W = model.build_rate_matrix(gamma=0.5, kmw_minus=2.0, kmw_plus=0.3)
+        P0 = model.get_ground_state_mixed()
+        weights = model.observable_weights(['pl', 'es_total'])
+        dweights = model.observable_weight_derivatives(parameters, ['pl', 'es_total'])
+
+        P, dP = solver.solve_sensitivity(W, dW, P0, 2e-7, integrated=integrated)
+        values, derivatives = solver.solve_sensitivity(
+            W, dW, P0, 2e-7, integrated=integrated, weights=weights, dweights=dweights
+        )
+        np.testing.assert_allclose(values, weights @ P, rtol=1e-12)
+        np.testing.assert_allclose(
+            derivatives, dP @ weights.T + dweights @ P, rtol=1e-10, atol=1e-20
+        )
+
+    def test_solve_expm_krylov_sparse(self, model_and_solver):
+        """Test Krylov expm action on a sparse matrix matches Padé."""
+        import scipy.sparse as sp
+        model, solver = model_and_solver
+        W = model.build_rate_matrix(gamma=1.0, kmw_minus=1.0, kmw_plus=0.0)
+        P0 = model.get_ground_state_mixed()
+        t_eval = np.logspace(-9, -3, 30)
+
+        pop_pade = solver.solve_expm(W, P0, t_eval, method='pade')
+        pop_krylov = solver.solve_expm(
+            sp.csr_matrix(W), P0, t_eval, method='krylov'
+        )
+        np.testing.assert_allclose(pop_krylov, pop_pade, atol=1e-9)
+
+    def test_sparse_rate_matrix_matches_dense(self, model_and_solver):
+        """Test steady state and time integral accept sparse matrices."""
+        model, solver = model_and_solver
+        W = model.build_rate_matrix(gamma=1.0, kmw_minus=1.0, kmw_plus=0.0)
+        W_sparse = model.build_rate_matrix(
+            gamma=1.0, kmw_minus=1.0, kmw_plus=0.0, sparse='csr'
+        )
+        P0 = model.get_ground_state_mixed()
+
+        np.testing.assert_allclose(
+            solver.solve_steady_state(W_sparse),
+            solver.solve_steady_state(W), atol=1e-12
+        )
+        np.testing.assert_allclose(
+            solver.solve_time_integrated(W_sparse, P0, 1e-5),
+            solver.solve_time_integrated(W, P0, 1e-5), rtol=1e-8, atol=1e-18
+        )
+
+    @pytest.mark.parametrize("t_end", [1e-9, 1e-8, 1e-7])
+    def test_sparse_time_integrated_short_windows(self, model_and_solver, t_end):
+        """Test the sparse integral keeps relative accuracy for short windows."""
+        model, solver = model_and_solver
+        W = model.build_rate_matrix(gamma=1.0, kmw_minus=1.0, kmw_plus=0.0)
+        W_sparse = model.build_rate_matrix(
+            gamma=1.0, kmw_minus=1.0, kmw_plus=0.0, sparse='csr'
+        )
+        P0 = np.zeros(model.n_states)
+        P0[0] = 1.0
+        weights = model.observable_weights(['pl'])[0]
+
+        np.testing.assert_allclose(
+            solver.solve_time_integrated(W_sparse, P0, t_end, weights=weights),
+            solver.solve_time_integrated(W, P0, t_end, weights=weights), rtol=1e-8
+        )
+
+    def test_sparse_steady_state_reuses_analysis(self, model_and_solver):
+        """Test a sparse gamma sweep shares one cached LU analysis."""
+        model, solver = model_and_solver
+        for gamma in [0.01, 0.1, 1.0, 10.0]:
+            W_sparse = model.build_rate_matrix(
+                gamma=gamma, kmw_minus=1.0, sparse='csc'
+            )
+            np.testing.assert_allclose(
+                solver.solve_steady_state(W_sparse),
+                solver.solve_steady_state(W_sparse.toarray()), atol=1e-12
+            )
+        assert len(solver._sparse_steady_state._patterns) == 1
+
+    @pytest.mark.parametrize("method", ["Radau", "BDF", "LSODA"])
+    def test_solve_ivp_batched_matches_expm(self, model_and_solver, method):
+        """Test batched stiff integration with the analytic Jacobian."""
+        model, solver = model_and_solver
+        W = model.build_rate_matrix(gamma=1.0, kmw_minus=1.0, kmw_plus=0.0)
+        P0 = np.stack([model.get_ground_state_mixed(), np.eye(7)[0]], axis=1)
+        t_eval = np.logspace(-9, -4, 20)
+
+        populations = solver.solve_ivp(
+            W, P0, (0, 1e-4), t_eval=t_eval, method=method,
+            rtol=1e-8, atol=1e-12
+        )
+        assert populations.shape == (20, 7, 2)
+        for b in range(2):
+            np.testing.assert_allclose(
+                populations[:, :, b], solver.solve_expm(W, P0[:, b], t_eval),
+                atol=1e-6
+            )
+
+    def test_sparse_steady_state_reducible_falls_back(self, model_and_solver):
+        """Test a reducible sparse W still gives a valid steady state."""
+        model, solver = model_and_solver
+        W_sparse = model.build_rate_matrix(gamma=0.0, sparse='csr')
+        P_ss = solver.solve_steady_state(W_sparse)
+        np.testing.assert_almost_equal(np.sum(P_ss), 1.0)
+        np.testing.assert_allclose(W_sparse @ P_ss, 0.0, atol=1e-6)